@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Dict
+import asyncio
+import functools
+import multiprocessing
+import threading
+
+
+class AnalysisExecutor:
+    """
+    Runs blocking analysis work off the event loop.
+
+    I/O-bound calls (yfinance requests, vector store lookups, model inference
+    that releases the GIL) go to a thread pool. CPU-bound pure functions such as
+    indicator calculation go to a process pool; they must be picklable
+    module-level functions. With `cpu_workers=0` CPU work shares the thread pool.
+    """
+
+    def __init__(self, io_workers: int = 8, cpu_workers: int = 2):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="analysis-io")
+        # Workers are spawned rather than forked so they don't inherit model
+        # threads/locks from the server process.
+        self._cpu_pool = None
+        if cpu_workers > 0:
+            self._cpu_pool = ProcessPoolExecutor(
+                max_workers=cpu_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'io': self._empty_stats(io_workers),
+            'cpu': self._empty_stats(cpu_workers or io_workers),
+        }
+
+    @staticmethod
+    def _empty_stats(workers: int) -> Dict:
+        return {
+            'workers': workers,
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'in_flight': 0,
+            'max_queue_depth': 0,
+        }
+
+    async def run_io(self, func: Callable, *args, **kwargs):
+        """Run a blocking I/O-bound callable in the thread pool."""
+        return await self._run('io', self._io_pool, func, *args, **kwargs)
+
+    async def run_cpu(self, func: Callable, *args, **kwargs):
+        """Run a CPU-bound callable in the process pool (thread pool if disabled)."""
+        pool = self._cpu_pool or self._io_pool
+        return await self._run('cpu', pool, func, *args, **kwargs)
+
+    async def _run(self, kind: str, pool, func: Callable, *args, **kwargs):
+        stats = self._stats[kind]
+        with self._lock:
+            stats['submitted'] += 1
+            stats['in_flight'] += 1
+            stats['max_queue_depth'] = max(stats['max_queue_depth'], self._queue_depth(stats))
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+        except Exception:
+            with self._lock:
+                stats['failed'] += 1
+            raise
+        else:
+            with self._lock:
+                stats['completed'] += 1
+            return result
+        finally:
+            with self._lock:
+                stats['in_flight'] -= 1
+
+    @staticmethod
+    def _queue_depth(stats: Dict) -> int:
+        # Anything in flight beyond the worker count is waiting in the pool queue
+        return max(0, stats['in_flight'] - stats['workers'])
+
+    def metrics(self) -> Dict:
+        """Snapshot of pool sizes, throughput counters and current queue depth."""
+        with self._lock:
+            return {
+                kind: {**stats, 'queue_depth': self._queue_depth(stats)}
+                for kind, stats in self._stats.items()
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._io_pool.shutdown(wait=wait, cancel_futures=True)
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=wait, cancel_futures=True)
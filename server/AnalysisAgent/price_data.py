@@ -0,0 +1,137 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import date
+import pandas as pd
+from AnalysisAgent.executor import AnalysisExecutor
+
+
+class PriceDataStore:
+    """
+    Shared daily price bars for a universe of symbols.
+
+    Bars are downloaded in one batched yfinance request (instead of one
+    request per symbol) and cached for the rest of the trading day, so only
+    symbols not seen yet today are fetched. `refresh` pulls the latest bars
+    for already-cached symbols and notifies listeners about symbols whose
+    latest bar changed.
+
+    Without an `executor` it creates its own, which `close()` shuts down;
+    a passed-in executor belongs to the caller.
+    """
+
+    def __init__(self, executor: Optional[AnalysisExecutor] = None, period: str = "60d"):
+        self._owns_executor = executor is None
+        self.executor = executor or AnalysisExecutor()
+        self.period = period
+        self._day: Optional[date] = None
+        self._bars: Dict[str, pd.DataFrame] = {}  # symbol -> DataFrame[Close, Volume]
+        self._listeners: List[Callable[[List[str]], None]] = []
+
+    def close(self):
+        """Shut down the executor if this store created it."""
+        if self._owns_executor:
+            self.executor.shutdown()
+
+    def add_listener(self, callback: Callable[[List[str]], None]):
+        """Register a callback invoked with the symbols that received new bars."""
+        self._listeners.append(callback)
+
+    async def get_history(self, symbols: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Return (close, volume) frames indexed by date with one column per
+        symbol. Symbols with no data are left out.
+        """
+        today = date.today()
+        if self._day != today:
+            self._day = today
+            self._bars = {}
+
+        missing = [s for s in dict.fromkeys(symbols) if s not in self._bars]
+        if missing:
+            bars = await self.executor.run_io(self._download, missing)
+            for symbol in missing:
+                # cache empty frames too so unknown symbols aren't re-requested all day
+                self._bars[symbol] = bars.get(symbol, pd.DataFrame(columns=['Close', 'Volume']))
+
+        available = [s for s in dict.fromkeys(symbols) if not self._bars[s].empty]
+        close = pd.DataFrame({s: self._bars[s]['Close'] for s in available})
+        volume = pd.DataFrame({s: self._bars[s]['Volume'] for s in available})
+        return close.sort_index().ffill(), volume.sort_index().fillna(0)
+
+    async def refresh(self, symbols: List[str], period: str = "5d") -> List[str]:
+        """
+        Download the most recent bars for `symbols` in one request and merge
+        them into the cache. Symbols without cached bars (never loaded, or an
+        empty first download) get their full history instead, so the short
+        refresh window never stands in for it. Returns (and reports to
+        listeners) the symbols whose latest bar is new or has a different
+        close/volume.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return []
+        if self._day != date.today():
+            # New day: reload the full history for these symbols
+            await self.get_history(symbols)
+            changed = [s for s in symbols if not self._bars[s].empty]
+        else:
+            cold = [s for s in symbols if s not in self._bars or self._bars[s].empty]
+            warm = [s for s in symbols if s not in cold]
+            changed = []
+            if cold:
+                for symbol in cold:
+                    self._bars.pop(symbol, None)
+                await self.get_history(cold)
+                changed.extend(s for s in cold if not self._bars[s].empty)
+            recent = await self.executor.run_io(self._download, warm, period) if warm else {}
+            for symbol, bars in recent.items():
+                cached = self._bars[symbol]
+                last_before = cached.iloc[-1]
+                merged = pd.concat([cached, bars])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                self._bars[symbol] = merged
+                if merged.index[-1] != cached.index[-1] or not merged.iloc[-1].equals(last_before):
+                    changed.append(symbol)
+
+        if changed:
+            for listener in self._listeners:
+                try:
+                    listener(changed)
+                except Exception as e:
+                    print(f"[price_data][error] listener failed: {e}")
+        return changed
+
+    def _download(self, symbols: List[str], period: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Blocking batched download of daily bars.
+        """
+        import yfinance as yf
+        data = yf.download(
+            symbols,
+            period=period or self.period,
+            interval="1d",
+            group_by="column",
+            auto_adjust=True,
+            progress=False,
+            threads=True
+        )
+        if data is None or data.empty:
+            return {}
+
+        if not isinstance(data.columns, pd.MultiIndex):
+            data.columns = pd.MultiIndex.from_product([data.columns, symbols[:1]])
+
+        bars = {}
+        for symbol in symbols:
+            if symbol not in data['Close'].columns:
+                continue
+            frame = pd.DataFrame({
+                'Close': data['Close'][symbol],
+                'Volume': data['Volume'][symbol]
+            }).dropna(subset=['Close'])
+            if not frame.empty:
+                bars[symbol] = frame
+        return bars
+
+    def clear(self):
+        self._day = None
+        self._bars = {}
@@ -1,26 +1,154 @@
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
+from AnalysisAgent.executor import AnalysisExecutor
+from AnalysisAgent.price_data import PriceDataStore
+
+
+def calculate_indicators(hist: pd.DataFrame) -> Dict:
+    """
+    Calculate technical indicators such as moving averages, RSI, MACD.
+
+    Module-level so it can be shipped to the executor's process pool.
+    """
+    #RSI 
+    delta = hist['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+
+    #Moving Averages
+    ma_20 = hist['Close'].rolling(window=20).mean()
+    ma_50 = hist['Close'].rolling(window=50).mean()
+
+    #MACD
+    exp1 = hist['Close'].ewm(span=12, adjust=False).mean()
+    exp2 = hist['Close'].ewm(span=26, adjust=False).mean()
+    macd = exp1 - exp2
+    signal = macd.ewm(span=9, adjust=False).mean()
+
+    return {
+        'rsi': float(rsi.iloc[-1]),
+        'ma_20': float(ma_20.iloc[-1]),
+        'ma_50': float(ma_50.iloc[-1]),
+        'current_price': float(hist['Close'].iloc[-1]),
+        'macd': float(macd.iloc[-1]),
+        'macd_signal': float(signal.iloc[-1]),
+        'volume_trend': float(hist['Volume'].rolling(window=20).mean().iloc[-1])
+    }
+
+
+def calculate_indicator_frames(close: pd.DataFrame, volume: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Same indicators as `calculate_indicators`, computed column-wise over a
+    close/volume matrix (dates x symbols) and kept for every date.
+    """
+    #RSI
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+
+    #MACD
+    exp1 = close.ewm(span=12, adjust=False).mean()
+    exp2 = close.ewm(span=26, adjust=False).mean()
+    macd = exp1 - exp2
+
+    return {
+        'rsi': rsi,
+        'ma_20': close.rolling(window=20).mean(),
+        'ma_50': close.rolling(window=50).mean(),
+        'current_price': close,
+        'macd': macd,
+        'macd_signal': macd.ewm(span=9, adjust=False).mean(),
+        'volume_trend': volume.rolling(window=20).mean()
+    }
+
+
+def calculate_indicator_arrays(close: pd.DataFrame, volume: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Latest indicator values for every symbol column, as arrays.
+    """
+    frames = calculate_indicator_frames(close, volume)
+    return {key: frame.iloc[-1].to_numpy(dtype=float) for key, frame in frames.items()}
+
+
+def calculate_technical_scores(indicators: Dict[str, np.ndarray], ml_signals: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Array form of the TechnicalAnalyzer scoring rules. Works elementwise, so
+    indicators may be 1-D (one value per symbol) or 2-D (dates x symbols).
+    """
+    rsi = np.asarray(indicators['rsi'], dtype=float)
+    current_price = np.asarray(indicators['current_price'], dtype=float)
+    ma_20 = np.asarray(indicators['ma_20'], dtype=float)
+    ma_50 = np.asarray(indicators['ma_50'], dtype=float)
+    macd = np.asarray(indicators['macd'], dtype=float)
+    macd_signal = np.asarray(indicators['macd_signal'], dtype=float)
+
+    #RSI contribution
+    score = np.select(
+        [rsi < 30, rsi > 70, (rsi >= 40) & (rsi <= 60)],
+        [15.0, -15.0, 5.0],
+        default=0.0
+    )
+
+    # Moving average trend
+    score += np.select(
+        [
+            (current_price > ma_20) & (ma_20 > ma_50),
+            current_price > ma_20,
+            (current_price < ma_20) & (ma_20 < ma_50),
+            current_price < ma_20
+        ],
+        [20.0, 10.0, -20.0, -10.0],
+        default=0.0
+    )
+
+    #MACD contribution
+    score += np.where(macd > macd_signal, 10.0, -10.0)
+
+    confidence = np.asarray(ml_signals['confidence'], dtype=float)
+    score += np.where(np.asarray(ml_signals['buy'], dtype=bool), 15 * confidence, -15 * confidence)
+
+    # Clamp to 0-100
+    return np.clip(score, 0, 100)
+
 
 class TechnicalAnalyzer:
     """
     Technical analysis agent to evaluate stock price movements and patterns.
+
+    Without an `executor` it creates its own, which `close()` shuts down;
+    a passed-in executor belongs to the caller.
     """
 
-    def __init__(self):
+    def __init__(self, executor: Optional[AnalysisExecutor] = None):
         self.model = self.load_model()
+        self._owns_executor = executor is None
+        self.executor = executor or AnalysisExecutor()
+        self.price_store = PriceDataStore(executor=self.executor)
+
+    def close(self):
+        """Shut down the executor if this analyzer created it."""
+        self.price_store.close()
+        if self._owns_executor:
+            self.executor.shutdown()
 
     async def analyze(self, symbol: str) -> Dict:
         """
         Analyze technical indicators for a given stock symbol.
+
+        The yfinance request and model inference run in the executor's thread
+        pool and the indicator maths in its process pool, so a slow symbol
+        doesn't block the event loop.
         """
-        import yfinance as yf
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="60d", interval="1d")
+        hist = await self.executor.run_io(self._fetch_history, symbol)
 
-        indicators = self._calculate_indicators(hist)
+        indicators = await self.executor.run_cpu(calculate_indicators, hist)
 
-        ml_signal = self._get_ml_prediction(indicators)
+        ml_signal = await self.executor.run_io(self._get_ml_prediction, indicators)
 
         composite_score = self._calculate_technical_score(indicators, ml_signal)
 
@@ -29,37 +157,37 @@ class TechnicalAnalyzer:
             "ml_signal": ml_signal,
             "composite_score": composite_score,
         }
+
+    async def analyze_universe(self, symbols: List[str]) -> pd.Series:
+        """
+        Technical scores for a whole universe from one batched price download.
+
+        Indicators are computed column-wise and scored with
+        `_calculate_technical_scores`, so the cost is a few array operations
+        regardless of universe size. Symbols without price data are omitted.
+        """
+        close, volume = await self.price_store.get_history(symbols)
+        if close.empty:
+            return pd.Series(dtype=float)
+
+        indicators = await self.executor.run_cpu(calculate_indicator_arrays, close, volume)
+        ml_signals = self._get_ml_predictions(indicators)
+        scores = self._calculate_technical_scores(indicators, ml_signals)
+        return pd.Series(scores, index=close.columns)
+
+    def _fetch_history(self, symbol: str) -> pd.DataFrame:
+        """
+        Blocking yfinance download of the last 60 daily bars.
+        """
+        import yfinance as yf
+        ticker = yf.Ticker(symbol)
+        return ticker.history(period="60d", interval="1d")
     
     def _calculate_indicators(self, hist: pd.DataFrame) -> Dict:
         """
         Calculate technical indicators such as moving averages, RSI, MACD.
         """
-        #RSI 
-        delta = hist['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-
-        #Moving Averages
-        ma_20 = hist['Close'].rolling(window=20).mean()
-        ma_50 = hist['Close'].rolling(window=50).mean()
-
-        #MACD
-        exp1 = hist['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = hist['Close'].ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9, adjust=False).mean()
-
-        return {
-            'rsi': float(rsi.iloc[-1]),
-            'ma_20': float(ma_20.iloc[-1]),
-            'ma_50': float(ma_50.iloc[-1]),
-            'current_price': float(hist['Close'].iloc[-1]),
-            'macd': float(macd.iloc[-1]),
-            'macd_signal': float(signal.iloc[-1]),
-            'volume_trend': float(hist['Volume'].rolling(window=20).mean().iloc[-1])
-        }
+        return calculate_indicators(hist)
 
 
     def _get_ml_prediction(self, indicators: Dict) -> str:
@@ -83,6 +211,32 @@ class TechnicalAnalyzer:
             'confidence': float(confidence)
         }
     
+    def _get_ml_predictions(self, indicators: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Batched `_get_ml_prediction` over indicator arrays. Without a loaded
+        model every signal is neutral (zero confidence).
+        """
+        n = len(indicators['rsi'])
+        if self.model is None:
+            return {'buy': np.zeros(n, dtype=bool), 'confidence': np.zeros(n)}
+
+        features = np.column_stack([
+            indicators['rsi'],
+            indicators['ma_20'],
+            indicators['ma_50'],
+            indicators['macd'],
+            indicators['macd_signal'],
+            indicators['volume_trend']
+        ])
+
+        prediction = self.model.predict(features)
+        confidence = self.model.predict_proba(features).max(axis=1)
+
+        return {
+            'buy': np.asarray(prediction) > 0.5,
+            'confidence': np.asarray(confidence, dtype=float)
+        }
+
     def _calculate_technical_score(self, indicators: Dict, ml_signal: Dict) -> float:
         """
         Calculate a composite technical score based on indicators and ML signal.
@@ -123,6 +277,32 @@ class TechnicalAnalyzer:
         
         # Clamp to 0-100
         return max(0, min(100, score))
+
+    def _calculate_technical_scores(self, indicators: Dict[str, np.ndarray], ml_signals: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Vectorized form of `_calculate_technical_score` over a whole universe.
+
+        `indicators` maps the same keys as the scalar version to arrays (one
+        entry per symbol); `ml_signals` holds a boolean 'buy' array and a float
+        'confidence' array. Returns an array of scores clamped to 0-100.
+        """
+        return calculate_technical_scores(indicators, ml_signals)
+
+    def _stack_indicators(self, indicators: List[Dict], ml_signals: List[Dict]) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Convert per-symbol indicator and ML signal dicts into the column arrays
+        expected by `_calculate_technical_scores`.
+        """
+        keys = ['rsi', 'ma_20', 'ma_50', 'current_price', 'macd', 'macd_signal']
+        indicator_arrays = {
+            key: np.array([ind[key] for ind in indicators], dtype=float)
+            for key in keys
+        }
+        ml_arrays = {
+            'buy': np.array([sig['signal'] == 'BUY' for sig in ml_signals], dtype=bool),
+            'confidence': np.array([sig['confidence'] for sig in ml_signals], dtype=float)
+        }
+        return indicator_arrays, ml_arrays
     
     def load_model(self):
         import torch
@@ -0,0 +1,130 @@
+from typing import Callable, Dict, List, Optional
+import re
+try:
+    import tiktoken
+    _HAVE_TIKTOKEN = True
+except Exception:
+    _HAVE_TIKTOKEN = False
+
+# Per-source overhead of the "[Source N]" label and separator in _format_context
+_SOURCE_OVERHEAD = 8
+
+# Overhead of the system message that carries the running conversation summary
+_SUMMARY_OVERHEAD = 8
+
+
+class ContextPacker:
+    """
+    Fits the variable parts of a RAG prompt into a token budget.
+
+    The budget is split between conversation history (the running summary
+    of older exchanges, if any, then the newest messages first, whole
+    messages only), the portfolio summary and the retrieved
+    documents; whatever history and portfolio don't use goes to documents.
+    Documents are taken in relevance order and each gets a share of the
+    remaining budget proportional to its score, so top sources keep more
+    content. A source whose share is too small for a useful excerpt is
+    reduced to its leading sentence, and sources that no longer fit are
+    dropped.
+
+    Tokens are counted with tiktoken's cl100k_base (close to the Llama 3
+    tokenizer) when installed, otherwise estimated at ~4 characters each.
+    """
+
+    def __init__(self, budget: int = 3000, history_share: float = 0.25,
+                 portfolio_share: float = 0.15, min_excerpt_tokens: int = 40):
+        self.budget = budget
+        self.history_share = history_share
+        self.portfolio_share = portfolio_share
+        self.min_excerpt_tokens = min_excerpt_tokens
+        self._encoding = tiktoken.get_encoding("cl100k_base") if _HAVE_TIKTOKEN else None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut `text` to at most `max_tokens`, at a word boundary."""
+        if self.count(text) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        if self._encoding is not None:
+            cut = self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:max_tokens - 1])
+        else:
+            cut = text[:(max_tokens - 1) * 4]
+        return cut.rsplit(None, 1)[0].rstrip() + "…" if ' ' in cut else cut + "…"
+
+    def pack(self, documents: List[Dict], history: List[Dict], portfolio_summary: str,
+             render: Callable[[Dict], str], summary: Optional[str] = None) -> Dict:
+        """
+        Select and trim prompt context.
+
+        `documents` must be ordered by relevance ('score'); `render` formats
+        one document the way it will appear in the prompt. Returns the kept
+        documents (content trimmed), conversation summary, history messages
+        and portfolio summary, with per-section token counts and the number
+        of dropped/summarized sources.
+        """
+        # History: the conversation summary comes first, then newest messages
+        # first, stopping at the first one that doesn't fit
+        history_budget = int(self.budget * self.history_share)
+        if summary:
+            summary = self.truncate(summary, history_budget - _SUMMARY_OVERHEAD)
+        history_tokens = self.count(summary) + _SUMMARY_OVERHEAD if summary else 0
+        kept_history = []
+        for message in reversed(history):
+            tokens = self.count(message['content'])
+            if history_tokens + tokens > history_budget:
+                break
+            kept_history.insert(0, message)
+            history_tokens += tokens
+        # Start on a user turn so exchanges stay paired
+        while kept_history and kept_history[0]['role'] != 'user':
+            history_tokens -= self.count(kept_history.pop(0)['content'])
+
+        portfolio = self.truncate(portfolio_summary, int(self.budget * self.portfolio_share)) if portfolio_summary else ""
+        portfolio_tokens = self.count(portfolio)
+
+        remaining = self.budget - history_tokens - portfolio_tokens
+        packed, summarized, dropped = [], 0, 0
+        weights = [max(doc.get('score') or 0.0, 1e-3) for doc in documents]
+        for i, doc in enumerate(documents):
+            share = int(remaining * weights[i] / sum(weights[i:]))
+            full = self.count(render(doc)) + _SOURCE_OVERHEAD
+            if full <= share:
+                packed.append(doc)
+                remaining -= full
+                continue
+
+            header = self.count(render({**doc, 'content': ''})) + _SOURCE_OVERHEAD
+            if share - header >= self.min_excerpt_tokens:
+                doc = {**doc, 'content': self.truncate(doc.get('content', ''), share - header)}
+            else:
+                # Too little room for an excerpt: keep the leading sentence only
+                lead = re.split(r'(?<=[.!?])\s', doc.get('content', '') or '', maxsplit=1)[0]
+                doc = {**doc, 'content': self.truncate(lead, self.min_excerpt_tokens)}
+                summarized += 1
+            tokens = self.count(render(doc)) + _SOURCE_OVERHEAD
+            if tokens > remaining:
+                dropped += 1
+                continue
+            packed.append(doc)
+            remaining -= tokens
+
+        return {
+            'documents': packed,
+            'summary': summary,
+            'history': kept_history,
+            'portfolio_summary': portfolio,
+            'tokens': {
+                'history': history_tokens,
+                'portfolio': portfolio_tokens,
+                'documents': self.budget - history_tokens - portfolio_tokens - remaining
+            },
+            'summarized': summarized,
+            'dropped': dropped
+        }
@@ -0,0 +1,242 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+import json
+import time
+try:
+    import redis
+    from redis.exceptions import WatchError
+    _HAVE_REDIS = True
+except Exception:
+    _HAVE_REDIS = False
+
+    class WatchError(Exception):
+        pass
+
+# Messages are stored as compact JSON pairs: ["u", "text"] / ["a", "text"]
+_ROLE_CODES = {'user': 'u', 'assistant': 'a', 'system': 's'}
+_ROLES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+def encode_message(message: Dict) -> bytes:
+    return json.dumps(
+        [_ROLE_CODES.get(message['role'], message['role']), message['content']],
+        separators=(',', ':'), ensure_ascii=False
+    ).encode()
+
+
+def decode_message(payload) -> Dict:
+    role, content = json.loads(payload)
+    return {'role': _ROLES.get(role, role), 'content': content}
+
+
+class InMemoryConversationStore:
+    """
+    Bounded per-process conversation history.
+
+    Each conversation keeps its last `max_messages` messages in encoded
+    form, plus an optional running summary of older messages; conversations
+    idle for longer than `ttl` seconds expire, and the least recently used
+    ones are evicted beyond `max_conversations`.
+    """
+
+    # Calls never block, so the agent makes them on the event loop
+    blocking = False
+
+    def __init__(self, max_conversations: int = 1000, max_messages: int = 20, ttl: float = 3600.0):
+        self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._conversations: "OrderedDict[str, List[bytes]]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._summaries: Dict[str, str] = {}
+        self._stats = {'appends': 0, 'evicted': 0, 'expired': 0}
+
+    def _live(self, conversation_id: str) -> Optional[List[bytes]]:
+        messages = self._conversations.get(conversation_id)
+        if messages is None:
+            return None
+        if time.monotonic() - self._touched[conversation_id] > self.ttl:
+            self.delete(conversation_id)
+            self._stats['expired'] += 1
+            return None
+        return messages
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return self._live(conversation_id) is not None
+
+    def __getitem__(self, conversation_id: str) -> List[Dict]:
+        messages = self._live(conversation_id)
+        if messages is None:
+            raise KeyError(conversation_id)
+        return [decode_message(m) for m in messages]
+
+    def get(self, conversation_id: str, default=None) -> Optional[List[Dict]]:
+        return self[conversation_id] if conversation_id in self else default
+
+    def snapshot(self, conversation_id: str) -> Tuple[List[Dict], Optional[str]]:
+        """(messages, running summary) of a conversation; ([], None) if unknown"""
+        return self.get(conversation_id, []), self.summary(conversation_id)
+
+    def append(self, conversation_id: str, messages: Iterable[Dict]) -> int:
+        """Add messages; returns how many the conversation now holds"""
+        stored = self._live(conversation_id) or []
+        stored = (stored + [encode_message(m) for m in messages])[-self.max_messages:]
+        self._conversations[conversation_id] = stored
+        self._conversations.move_to_end(conversation_id)
+        self._touched[conversation_id] = time.monotonic()
+        self._stats['appends'] += 1
+
+        while len(self._conversations) > self.max_conversations:
+            oldest = next(iter(self._conversations))
+            self.delete(oldest)
+            self._stats['evicted'] += 1
+        return len(stored)
+
+    def summary(self, conversation_id: str) -> Optional[str]:
+        return self._summaries.get(conversation_id) if conversation_id in self else None
+
+    def compact(self, conversation_id: str, summary: str, summarized: List[Dict]) -> bool:
+        """
+        Replace `summarized`, the oldest messages as read before summarizing,
+        with `summary`. Skipped (False) if the conversation no longer starts
+        with them, e.g. appends trimmed its head in the meantime.
+        """
+        messages = self._live(conversation_id)
+        encoded = [encode_message(m) for m in summarized]
+        if messages is None or not encoded or messages[:len(encoded)] != encoded:
+            return False
+        self._conversations[conversation_id] = messages[len(encoded):]
+        self._summaries[conversation_id] = summary
+        return True
+
+    def delete(self, conversation_id: str):
+        self._conversations.pop(conversation_id, None)
+        self._touched.pop(conversation_id, None)
+        self._summaries.pop(conversation_id, None)
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            'backend': 'memory',
+            'conversations': len(self._conversations),
+            'bytes': sum(len(m) for messages in self._conversations.values() for m in messages)
+        }
+
+
+class RedisConversationStore:
+    """
+    Conversation history shared by all workers through Redis.
+
+    Each conversation is a Redis list of encoded messages, trimmed to
+    `max_messages` and given a sliding `ttl` on every append (one
+    pipelined round trip); its running summary lives under a `:summary`
+    key whose ttl slides with it. Global memory is bounded by the TTL plus the server's
+    maxmemory/LRU policy. `client` is any redis-py compatible client, so
+    tests can pass an in-process fake.
+
+    Calls are network round trips, so the agent runs them in its thread
+    pool rather than on the event loop (`blocking`).
+    """
+
+    blocking = True
+
+    def __init__(self, client, max_messages: int = 20, ttl: float = 3600.0, prefix: str = "conversation:"):
+        self.client = client
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.prefix = prefix
+        self._stats = {'appends': 0}
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.prefix}{conversation_id}"
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return bool(self.client.exists(self._key(conversation_id)))
+
+    def __getitem__(self, conversation_id: str) -> List[Dict]:
+        messages = self.client.lrange(self._key(conversation_id), 0, -1)
+        if not messages:
+            raise KeyError(conversation_id)
+        return [decode_message(m) for m in messages]
+
+    def get(self, conversation_id: str, default=None) -> Optional[List[Dict]]:
+        try:
+            return self[conversation_id]
+        except KeyError:
+            return default
+
+    def snapshot(self, conversation_id: str) -> Tuple[List[Dict], Optional[str]]:
+        """(messages, running summary) of a conversation in one round trip"""
+        key = self._key(conversation_id)
+        pipe = self.client.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.get(key + ":summary")
+        messages, summary = pipe.execute()
+        summary = summary.decode() if isinstance(summary, bytes) else summary
+        return [decode_message(m) for m in messages or []], summary
+
+    def append(self, conversation_id: str, messages: Iterable[Dict]) -> int:
+        """Add messages; returns how many the conversation now holds"""
+        key = self._key(conversation_id)
+        pipe = self.client.pipeline()
+        pipe.rpush(key, *[encode_message(m) for m in messages])
+        pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, int(self.ttl))
+        pipe.expire(key + ":summary", int(self.ttl))  # the summary lives as long as its messages
+        pipe.llen(key)
+        stored = pipe.execute()[-1]
+        self._stats['appends'] += 1
+        return stored
+
+    def summary(self, conversation_id: str) -> Optional[str]:
+        value = self.client.get(self._key(conversation_id) + ":summary")
+        return value.decode() if isinstance(value, bytes) else value
+
+    def compact(self, conversation_id: str, summary: str, summarized: List[Dict]) -> bool:
+        """
+        Replace `summarized`, the oldest messages as read before summarizing,
+        with `summary`. Skipped (False) if the list no longer starts with
+        them; the check and the trim are one WATCH/MULTI transaction, so an
+        append from any worker in between aborts it.
+        """
+        key = self._key(conversation_id)
+        encoded = [encode_message(m) for m in summarized]
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if not encoded or pipe.lrange(key, 0, len(encoded) - 1) != encoded:
+                    return False
+                pipe.multi()
+                pipe.ltrim(key, len(encoded), -1)
+                pipe.set(key + ":summary", summary, ex=int(self.ttl))
+                pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    def delete(self, conversation_id: str):
+        key = self._key(conversation_id)
+        self.client.delete(key, key + ":summary")
+
+    def close(self):
+        """Release the client's connection pool (server shutdown)."""
+        self.client.close()
+
+    def stats(self) -> Dict:
+        return {**self._stats, 'backend': 'redis'}
+
+
+def create_conversation_store(redis_url: Optional[str] = None, max_conversations: int = 1000,
+                              max_messages: int = 20, ttl: float = 3600.0):
+    """Redis-backed store when `redis_url` is set (and redis is installed), in-memory otherwise."""
+    if redis_url:
+        if _HAVE_REDIS:
+            return RedisConversationStore(redis.Redis.from_url(redis_url), max_messages=max_messages, ttl=ttl)
+        print("[conversation_store][warning] redis not installed; keeping conversations in memory")
+    return InMemoryConversationStore(max_conversations=max_conversations, max_messages=max_messages, ttl=ttl)
@@ -6,7 +6,22 @@ import os
 from datetime import datetime
 import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import functools
+import time
+from contextlib import aclosing
+from LLMAgent.response_cache import SemanticResponseCache
+from LLMAgent.context_packer import ContextPacker
+from LLMAgent.conversation_store import InMemoryConversationStore
+from LLMAgent.llm_gateway import LLMGateway
+from LLMAgent.query_router import QueryRouter, ROUTE_QUICK, ROUTE_RAG
+from LLMAgent.report_digests import ReportDigestStore, digest_key
+from LLMAgent.prefetch import ContextPrefetcher
+from LLMAgent.symbol_recognizer import SymbolRecognizer
+from LLMAgent.reranker import CrossEncoderReranker
+from AnalysisAgent.executor import AnalysisExecutor
+
+# Faster model for quick answers and conversation summaries
+QUICK_MODEL = "llama-3.1-8b-instant"
 
 class InvestmentAdvisorAgent:
     """
@@ -17,11 +32,61 @@ class InvestmentAdvisorAgent:
         self,
         vector_store,  # VectorStoreManager
         portfolio_manager,  # PortfolioManager
-        groq_api_key: Optional[str] = None
+        groq_api_key: Optional[str] = None,
+        retrieval_timeout: float = 2.0,
+        portfolio_timeout: float = 5.0,
+        context_budget: float = 6.0,
+        response_cache: Optional[SemanticResponseCache] = None,
+        context_packer: Optional[ContextPacker] = None,
+        conversation_store=None,  # InMemoryConversationStore / RedisConversationStore
+        summary_trigger: int = 0,
+        summary_keep_recent: int = 4,
+        gateway: Optional[LLMGateway] = None,
+        router: Optional[QueryRouter] = None,
+        report_digests: Optional[ReportDigestStore] = None,
+        prefetcher: Optional[ContextPrefetcher] = None,
+        symbol_recognizer: Optional[SymbolRecognizer] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        executor: Optional[AnalysisExecutor] = None
     ):
         self.vector_store = vector_store
         self.portfolio_manager = portfolio_manager
         
+        # Context assembly limits (seconds): per vector store query, for the
+        # portfolio analysis, and for the whole stage
+        self.retrieval_timeout = retrieval_timeout
+        self.portfolio_timeout = portfolio_timeout
+        self.context_budget = context_budget
+        
+        # Answers reused for near-identical questions over the same context
+        # (None disables caching)
+        self.response_cache = response_cache
+        
+        # Token budget for history, portfolio summary and documents
+        # (None sends the legacy fixed-size context)
+        self.context_packer = context_packer
+        
+        # Shared async LLM client (pooling, rate limits, retries); without one
+        # the synchronous Groq SDK runs in the thread pool
+        self.gateway = gateway
+        
+        # Sends simple questions to the quick path instead of full RAG (None: always RAG)
+        self.router = router
+        
+        # Precomputed stock reports, regenerated only when their inputs change
+        self.report_digests = report_digests if report_digests is not None else ReportDigestStore()
+        
+        # Warms analyses, retrieval pools and embeddings for the conversation's
+        # symbols after each turn (None disables prefetching)
+        self.prefetcher = prefetcher
+        
+        # Tickers and company names of the symbol universe
+        self.symbol_recognizer = symbol_recognizer if symbol_recognizer is not None else SymbolRecognizer.load()
+        
+        # Re-scores the top retrieved documents with a cross-encoder and keeps
+        # the best few (None keeps the 15 best by retrieval score)
+        self.reranker = reranker
+        
         # Initialize Groq client
         self.client = Groq(
             api_key=groq_api_key or os.environ.get("GROQ_API_KEY")
@@ -30,11 +95,28 @@ class InvestmentAdvisorAgent:
         # Model selection - Groq offers several Llama models
         self.model = "llama-3.3-70b-versatile"  # Fast and capable
         
-        # Conversation history storage (in-memory, could use Redis)
-        self.conversations = {}
+        # Conversation history storage (bounded in-memory, or Redis shared across workers)
+        self.conversations = conversation_store if conversation_store is not None else InMemoryConversationStore()
+        
+        # Rolling summarization: once a conversation holds `summary_trigger`
+        # messages, all but the last `summary_keep_recent` are folded into a
+        # running summary in the background (0 disables). The trigger is
+        # compared with the stored length, which the store caps at
+        # max_messages, so a larger trigger would never fire.
+        max_messages = getattr(self.conversations, 'max_messages', None)
+        if summary_trigger and max_messages and summary_trigger > max_messages:
+            print(f"[llm_agent][warning] summary_trigger {summary_trigger} exceeds the conversation store's "
+                  f"max_messages {max_messages}; summarizing at {max_messages}")
+            summary_trigger = max_messages
+        self.summary_trigger = summary_trigger
+        self.summary_keep_recent = summary_keep_recent
+        self._summarizing: Dict[str, asyncio.Task] = {}
         
-        # Thread pool for async execution
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # Blocking work (routing, embeddings, retrieval, reranking, the sync
+        # Groq SDK) runs on the shared analysis I/O pool; a private one is
+        # created when none is given
+        self._owns_executor = executor is None
+        self.executor = executor or AnalysisExecutor(io_workers=5, cpu_workers=0)
         
         # System prompt
         self.system_prompt = """You are an expert financial advisor AI assistant. You provide investment advice based on:
@@ -55,6 +137,11 @@ Guidelines:
 
 IMPORTANT: You must cite sources for any specific claims about stocks, news, or market events."""
 
+    def close(self):
+        """Shut down the executor if this agent created it."""
+        if self._owns_executor:
+            self.executor.shutdown()
+    
     async def chat(
         self,
         user_message: str,
@@ -73,60 +160,73 @@ IMPORTANT: You must cite sources for any specific claims about stocks, news, or
             temperature: Model temperature (0.0-1.0, lower = more factual)
             max_tokens: Maximum response length
         """
+        started = time.perf_counter()
         # Generate conversation ID if not provided
         if not conversation_id:
             conversation_id = self._generate_conversation_id()
         
-        # Extract stock symbols from message
-        symbols = self._extract_symbols(user_message)
-        
-        # Retrieve relevant context from vector store
-        context_docs = await self._retrieve_context(user_message, symbols)
+        route = await self._route(user_message, user_portfolio, conversation_id)
+        if route == ROUTE_QUICK:
+            return await self._quick_chat(user_message, conversation_id, started)
         
-        # Get portfolio analysis if applicable
-        portfolio_summary = ""
-        if user_portfolio:
-            portfolio_analysis = await self.portfolio_manager.monitor_existing_positions(
-                user_portfolio
-            )
-            portfolio_summary = self._format_portfolio_summary(portfolio_analysis)
-        
-        # Format context for LLM
-        context_text = self._format_context(context_docs)
+        # Symbols, retrieved documents and portfolio analysis (concurrent, time-boxed)
+        context = await self._assemble_context(user_message, user_portfolio)
+        symbols = context['symbols']
+        timings = context['timings']
         
-        # Build conversation history
-        messages = self._build_messages(
+        # Fit documents, history and portfolio summary into the prompt
+        history, summary = await self._conversation_call(self.conversations.snapshot, conversation_id)
+        context_docs, messages, packed_tokens = self._prepare_prompt(
             user_message,
-            context_text,
-            portfolio_summary,
-            conversation_id
+            context['documents'],
+            context['portfolio_summary'],
+            history,
+            summary
         )
         
-        # Call Groq API (synchronous, so wrap in executor)
-        response = await asyncio.get_event_loop().run_in_executor(
-            self.executor,
-            self._call_groq_api,
-            messages,
-            temperature,
-            max_tokens
+        # Same question over the same documents, portfolio and history: reuse the answer
+        cache_started = time.perf_counter()
+        cached, cache_key = await self._lookup_response(
+            'chat', user_message, context_docs,
+            self.model, temperature, max_tokens, context['portfolio_summary'], messages[1:-1]
         )
+        timings['response_cache'] = round(time.perf_counter() - cache_started, 4)
         
-        # Extract answer
-        answer = response.choices[0].message.content
+        if cached is not None:
+            answer = cached['answer']
+            usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        else:
+            # Call Groq API
+            llm_started = time.perf_counter()
+            response = await self._complete(messages, temperature, max_tokens)
+            timings['llm'] = round(time.perf_counter() - llm_started, 4)
+            
+            # Extract answer
+            answer = response.choices[0].message.content
+            
+            # Track usage
+            usage = {
+                'prompt_tokens': response.usage.prompt_tokens,
+                'completion_tokens': response.usage.completion_tokens,
+                'total_tokens': response.usage.total_tokens
+            }
+            
+            # Answers built on a degraded context are not worth reusing
+            if cache_key is not None and not context['degraded']:
+                self.response_cache.store(response={'answer': answer}, documents=context_docs, kind='chat', **cache_key)
         
         # Parse and enhance citations
         citations = self._extract_citations(context_docs)
         answer_with_links = self._enhance_citations_with_links(answer, citations)
         
         # Store conversation
-        self._store_conversation(conversation_id, user_message, answer)
+        stored = await self._store_conversation(conversation_id, user_message, answer)
+        self._schedule_summary(conversation_id, stored)
+        self._schedule_prefetch(symbols)
         
-        # Track usage
-        usage = {
-            'prompt_tokens': response.usage.prompt_tokens,
-            'completion_tokens': response.usage.completion_tokens,
-            'total_tokens': response.usage.total_tokens
-        }
+        timings['total'] = round(time.perf_counter() - started, 4)
+        if route is not None:
+            self.router.record(ROUTE_RAG, timings['total'])
         
         return {
             'answer': answer_with_links,
@@ -136,8 +236,148 @@ IMPORTANT: You must cite sources for any specific claims about stocks, news, or
             'conversation_id': conversation_id,
             'timestamp': datetime.now().isoformat(),
             'model': self.model,
-            'usage': usage
+            'usage': usage,
+            'cached': cached is not None,
+            'packed_tokens': packed_tokens,
+            'route': route,
+            'timings': timings,
+            'degraded': context['degraded']
+        }
+    
+    async def _route(
+        self,
+        user_message: str,
+        user_portfolio: Optional[List[str]],
+        conversation_id: str
+    ) -> Optional[str]:
+        """Routing decision for a chat message, or None without a router"""
+        if self.router is None:
+            return None
+        has_history = await self._conversation_call(self.conversations.__contains__, conversation_id)
+        # The classifier embeds the message, so keep it off the event loop
+        decision = await self.executor.run_io(
+            self.router.route,
+            user_message,
+            bool(user_portfolio),
+            has_history
+        )
+        return decision['route']
+    
+    async def _quick_chat(
+        self,
+        user_message: str,
+        conversation_id: str,
+        started: float
+    ) -> Dict:
+        """Answer a routed chat message with the quick model, in the chat response shape"""
+        quick = await self.answer_quick_question(user_message)
+        
+        stored = await self._store_conversation(conversation_id, user_message, quick['answer'])
+        self._schedule_summary(conversation_id, stored)
+        
+        total = round(time.perf_counter() - started, 4)
+        self.router.record(ROUTE_QUICK, total)
+        
+        return {
+            'answer': quick['answer'],
+            'citations': [],
+            'context_used': 0,
+            'symbols_analyzed': [],
+            'conversation_id': conversation_id,
+            'timestamp': quick['timestamp'],
+            'model': quick['model'],
+            'cached': quick['cached'],
+            'route': ROUTE_QUICK,
+            'timings': {'total': total},
+            'degraded': []
+        }
+    
+    async def _lookup_response(
+        self,
+        kind: str,
+        question: str,
+        documents: List[Dict],
+        *prompt_inputs
+    ):
+        """
+        Look up a cached answer for `question` over the retrieved `documents`;
+        `prompt_inputs` are the other inputs that shape the answer (model,
+        portfolio summary, history). Returns (cached response or None, key to
+        store the fresh answer under, or None when caching is off).
+        """
+        if self.response_cache is None:
+            return None, None
+        try:
+            embedding = await self.executor.run_io(
+                self.prefetcher.embedding if self.prefetcher is not None else self.vector_store.generate_embedding,
+                question
+            )
+        except Exception as e:
+            print(f"[llm_agent][warning] response cache skipped, embedding failed: {e}")
+            return None, None
+        
+        cache_key = {
+            'embedding': embedding,
+            'document_ids': [doc.get('id') for doc in documents],
+            'fingerprint': self.response_cache.fingerprint(*prompt_inputs)
         }
+        return self.response_cache.lookup(kind=kind, **cache_key), cache_key
+    
+    async def _complete(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        model: Optional[str] = None,
+        hedge: bool = False
+    ):
+        """Chat completion through the gateway, or the synchronous SDK in the thread pool"""
+        model = model or self.model
+        if self.gateway is not None:
+            return await self.gateway.chat(
+                messages, model=model, temperature=temperature, max_tokens=max_tokens, hedge=hedge
+            )
+        call = self._call_quick_model if model == QUICK_MODEL else self._call_groq_api
+        return await self.executor.run_io(call, messages, temperature, max_tokens)
+    
+    async def _stream_completion(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int
+    ):
+        """
+        Yield content deltas of a streaming completion. Without a gateway the
+        Groq stream is synchronous, so opening it and pulling each chunk run
+        in the thread pool.
+        """
+        if self.gateway is not None:
+            async with aclosing(self.gateway.stream(
+                messages, model=self.model, temperature=temperature, max_tokens=max_tokens
+            )) as chunks:
+                async for content in chunks:
+                    yield content
+            return
+        
+        stream = await self.executor.run_io(
+            self._open_groq_stream,
+            messages,
+            temperature,
+            max_tokens
+        )
+        chunks = iter(stream)
+        done = object()
+        try:
+            while True:
+                chunk = await self.executor.run_io(next, chunks, done)
+                if chunk is done:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Client went away mid-stream: release the HTTP response
+            if hasattr(stream, 'close'):
+                stream.close()
     
     def _call_groq_api(
         self,
@@ -155,6 +395,21 @@ IMPORTANT: You must cite sources for any specific claims about stocks, news, or
             stream=False
         )
     
+    def _open_groq_stream(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int
+    ):
+        """Open a streaming Groq completion (blocking until the response starts)"""
+        return self.client.chat.completions.create(
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+    
     async def chat_stream(
         self,
         user_message: str,
@@ -166,50 +421,78 @@ IMPORTANT: You must cite sources for any specific claims about stocks, news, or
         """
         Stream chat responses for better UX
         
-        Yields chunks of the response as they're generated
+        Yields chunks of the response as they're generated; the event loop
+        keeps serving other requests between chunks.
         """
+        started = time.perf_counter()
         if not conversation_id:
             conversation_id = self._generate_conversation_id()
         
-        symbols = self._extract_symbols(user_message)
-        context_docs = await self._retrieve_context(user_message, symbols)
+        route = await self._route(user_message, user_portfolio, conversation_id)
+        if route == ROUTE_QUICK:
+            # Quick answers are short: sent as one chunk
+            result = await self._quick_chat(user_message, conversation_id, started)
+            yield {
+                'chunk': result['answer'],
+                'conversation_id': conversation_id
+            }
+            yield {
+                'done': True,
+                'citations': [],
+                'symbols_analyzed': [],
+                'conversation_id': conversation_id,
+                'cached': result['cached'],
+                'route': ROUTE_QUICK,
+                'timings': result['timings'],
+                'degraded': []
+            }
+            return
         
-        portfolio_summary = ""
-        if user_portfolio:
-            portfolio_analysis = await self.portfolio_manager.monitor_existing_positions(
-                user_portfolio
-            )
-            portfolio_summary = self._format_portfolio_summary(portfolio_analysis)
+        context = await self._assemble_context(user_message, user_portfolio)
+        symbols = context['symbols']
         
-        context_text = self._format_context(context_docs)
-        messages = self._build_messages(
+        history, summary = await self._conversation_call(self.conversations.snapshot, conversation_id)
+        context_docs, messages, packed_tokens = self._prepare_prompt(
             user_message,
-            context_text,
-            portfolio_summary,
-            conversation_id
+            context['documents'],
+            context['portfolio_summary'],
+            history,
+            summary
         )
         
-        # Stream response
-        stream = self.client.chat.completions.create(
-            messages=messages,
-            model=self.model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=True
+        cached, cache_key = await self._lookup_response(
+            'chat', user_message, context_docs,
+            self.model, temperature, max_tokens, context['portfolio_summary'], messages[1:-1]
         )
         
-        full_response = ""
-        for chunk in stream:
-            if chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                full_response += content
-                yield {
-                    'chunk': content,
-                    'conversation_id': conversation_id
-                }
+        if cached is not None:
+            # Cached answer goes out as a single chunk
+            full_response = cached['answer']
+            yield {
+                'chunk': full_response,
+                'conversation_id': conversation_id
+            }
+        else:
+            # Stream response
+            full_response = ""
+            async with aclosing(self._stream_completion(messages, temperature, max_tokens)) as chunks:
+                async for content in chunks:
+                    full_response += content
+                    yield {
+                        'chunk': content,
+                        'conversation_id': conversation_id
+                    }
+            
+            if cache_key is not None and not context['degraded']:
+                self.response_cache.store(response={'answer': full_response}, documents=context_docs, kind='chat', **cache_key)
         
         # Store complete conversation
-        self._store_conversation(conversation_id, user_message, full_response)
+        stored = await self._store_conversation(conversation_id, user_message, full_response)
+        self._schedule_summary(conversation_id, stored)
+        self._schedule_prefetch(symbols)
+        
+        if route is not None:
+            self.router.record(ROUTE_RAG, time.perf_counter() - started)
         
         # Send final metadata
         citations = self._extract_citations(context_docs)
@@ -217,54 +500,218 @@ IMPORTANT: You must cite sources for any specific claims about stocks, news, or
             'done': True,
             'citations': citations,
             'symbols_analyzed': symbols,
-            'conversation_id': conversation_id
+            'conversation_id': conversation_id,
+            'cached': cached is not None,
+            'packed_tokens': packed_tokens,
+            'route': route,
+            'timings': context['timings'],
+            'degraded': context['degraded']
         }
     
-    async def _retrieve_context(
+    async def _assemble_context(
         self,
-        query: str,
-        symbols: List[str]
-    ) -> List[Dict]:
-        """Retrieve relevant context from vector store"""
-        context_docs = []
+        user_message: str,
+        user_portfolio: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Gather the RAG context for a chat turn.
+        
+        Each vector store query and the portfolio analysis run as parallel
+        tasks with their own timeout, and the whole stage is capped at
+        `context_budget` seconds. Components that fail or are still running at
+        the deadline are left out and listed under `degraded`, so a slow
+        retrieval delays the answer by at most the budget.
+        """
+        started = time.perf_counter()
+        timings = {}
+        
+        symbols = self._extract_symbols(user_message)
+        timings['symbol_extraction'] = round(time.perf_counter() - started, 4)
         
+        # With a reranker, retrieve enough candidates for it to choose from
+        per_symbol_k, general_k = 5, 10
+        if self.reranker is not None:
+            per_symbol_k = max(per_symbol_k, self.reranker.candidates // max(len(symbols), 1))
+            general_k = max(general_k, self.reranker.candidates)
+        
+        async def timed(name: str, coro, timeout: float):
+            task_started = time.perf_counter()
+            try:
+                return await asyncio.wait_for(coro, timeout=timeout)
+            finally:
+                timings[name] = round(time.perf_counter() - task_started, 4)
+        
+        # Follow-ups about prefetched symbols are ranked locally from their pools
+        prefetched = []
+        if symbols and self.prefetcher is not None:
+            try:
+                query_embedding = await self.executor.run_io(self.prefetcher.embedding, user_message)
+            except Exception as e:
+                print(f"[llm_agent][warning] prefetched pools skipped, embedding failed: {e}")
+            else:
+                for symbol in symbols:
+                    pool_started = time.perf_counter()
+                    docs = self.prefetcher.retrieve(symbol, query_embedding, top_k=per_symbol_k)
+                    if docs is not None:
+                        prefetched.append(docs)
+                        timings[f"retrieval:{symbol}"] = round(time.perf_counter() - pool_started, 4)
+        if user_portfolio and self.prefetcher is not None:
+            self.prefetcher.note_analysis(user_portfolio)
+        
+        tasks = {}
         if symbols:
-            # Get specific stock information
             for symbol in symbols:
-                docs = self.vector_store.query(
-                    query_text=query,
+                if f"retrieval:{symbol}" in timings:
+                    continue
+                query = functools.partial(
+                    self.vector_store.query,
+                    query_text=user_message,
                     symbol=symbol,
-                    top_k=5,
+                    top_k=per_symbol_k,
                     min_sentiment_score=None  # Include all sentiments
                 )
-                context_docs.extend(docs)
+                tasks[f"retrieval:{symbol}"] = asyncio.create_task(
+                    timed(f"retrieval:{symbol}", self.executor.run_io(query), self.retrieval_timeout)
+                )
         else:
             # General query across all stocks
-            docs = self.vector_store.query(
-                query_text=query,
-                top_k=10
+            query = functools.partial(self.vector_store.query, query_text=user_message, top_k=general_k)
+            tasks["retrieval"] = asyncio.create_task(
+                timed("retrieval", self.executor.run_io(query), self.retrieval_timeout)
+            )
+        if user_portfolio:
+            tasks["portfolio_analysis"] = asyncio.create_task(
+                timed(
+                    "portfolio_analysis",
+                    self.portfolio_manager.monitor_existing_positions(user_portfolio),
+                    self.portfolio_timeout
+                )
             )
-            context_docs.extend(docs)
+        
+        remaining = max(self.context_budget - (time.perf_counter() - started), 0)
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks.values(), timeout=remaining)
+        for task in pending:
+            task.cancel()
+        
+        degraded = []
+        results = {}
+        for name, task in tasks.items():
+            if task in pending:
+                degraded.append(name)
+                print(f"[llm_agent][warning] {name} missed the {self.context_budget}s context budget")
+            elif task.exception() is not None:
+                degraded.append(name)
+                error = task.exception()
+                reason = 'timed out' if isinstance(error, asyncio.TimeoutError) else error
+                print(f"[llm_agent][warning] {name} failed: {reason}")
+            else:
+                results[name] = task.result()
+        
+        # One ranked list per source (prefetched pool or vector store query)
+        sources = prefetched + [docs for name, docs in results.items() if name.startswith("retrieval")]
+        
+        portfolio_summary = ""
+        if "portfolio_analysis" in results:
+            portfolio_summary = self._format_portfolio_summary(results["portfolio_analysis"])
+        
+        documents = self._rank_documents(sources)
+        if self.reranker is not None and documents:
+            rerank_started = time.perf_counter()
+            try:
+                documents = await self.executor.run_io(self.reranker.rerank, user_message, documents)
+            except Exception as e:
+                degraded.append("rerank")
+                documents = documents[:15]
+                print(f"[llm_agent][warning] rerank failed: {e}")
+            timings['rerank'] = round(time.perf_counter() - rerank_started, 4)
+        
+        timings['context_assembly'] = round(time.perf_counter() - started, 4)
+        return {
+            'symbols': symbols,
+            'documents': documents,
+            'portfolio_summary': portfolio_summary,
+            'timings': timings,
+            'degraded': degraded
+        }
+    
+    def _rank_documents(self, sources: List[List[Dict]]) -> List[Dict]:
+        """
+        Merge ranked document lists, deduplicate, and keep the 15 most relevant
+        (the reranker's candidates with one).
+        
+        Documents are ordered by their rank within their own list, then by
+        score, so every symbol's best documents come first whichever path
+        retrieved them.
+        """
+        ranked = sorted(
+            ((rank, doc) for docs in sources for rank, doc in enumerate(docs)),
+            key=lambda item: (item[0], -item[1].get('score', 0))
+        )
         
         # Remove duplicates based on ID
         seen_ids = set()
         unique_docs = []
-        for doc in context_docs:
+        for _, doc in ranked:
             if doc['id'] not in seen_ids:
                 seen_ids.add(doc['id'])
                 unique_docs.append(doc)
         
-        # Sort by relevance score
-        unique_docs.sort(key=lambda x: x.get('score', 0), reverse=True)
+        limit = self.reranker.candidates if self.reranker is not None else 15
+        return unique_docs[:limit]
+    
+    def _prepare_prompt(
+        self,
+        user_message: str,
+        context_docs: List[Dict],
+        portfolio_summary: str,
+        history: List[Dict],
+        summary: Optional[str] = None
+    ):
+        """
+        Build the Groq messages for a chat turn from the conversation's
+        `history` and running `summary`. With a context packer the history,
+        portfolio summary and documents are fitted to its token budget.
+        Returns (documents used, messages, prompt tokens or None).
+        """
+        if self.context_packer is None:
+            messages = self._build_messages(
+                user_message,
+                self._format_context(context_docs),
+                portfolio_summary,
+                history[-10:],  # Last 5 Q&A pairs
+                summary
+            )
+            return context_docs, messages, None
         
-        return unique_docs[:15]  # Limit to top 15 most relevant
+        packed = self.context_packer.pack(
+            context_docs,
+            history[-10:],
+            portfolio_summary,
+            render=lambda doc: self._format_document(doc, max_content_chars=None),
+            summary=summary
+        )
+        if packed['dropped'] or packed['summarized']:
+            print(f"[llm_agent] context packed to {sum(packed['tokens'].values())} tokens: "
+                  f"{packed['summarized']} sources summarized, {packed['dropped']} dropped")
+        messages = self._build_messages(
+            user_message,
+            self._format_context(packed['documents'], max_content_chars=None),
+            packed['portfolio_summary'],
+            packed['history'],
+            packed['summary']
+        )
+        packed_tokens = sum(self.context_packer.count(m['content']) for m in messages)
+        return packed['documents'], messages, packed_tokens
     
     def _build_messages(
         self,
         user_message: str,
         context: str,
         portfolio_data: str,
-        conversation_id: str
+        history: List[Dict],
+        summary: Optional[str] = None
     ) -> List[Dict]:
         """Build message list for Groq API"""
         messages = [
@@ -274,12 +721,15 @@ IMPORTANT: You must cite sources for any specific claims about stocks, news, or
             }
         ]
         
+        # Older exchanges folded into a running summary, if any
+        if summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary}"
+            })
+        
         # Add conversation history if exists
-        if conversation_id in self.conversations:
-            history = self.conversations[conversation_id]
-            # Add last 5 exchanges to maintain context
-            for msg in history[-10:]:  # Last 5 Q&A pairs
-                messages.append(msg)
+        messages.extend(history)
         
         # Build current user message with context
         user_prompt = f"""Context from recent market data:
@@ -304,77 +754,138 @@ Please provide a comprehensive response with proper citations using [Source X] n
         
         return messages
     
-    def _store_conversation(
+    async def _conversation_call(self, func, *args):
+        """Call a conversation store method, in the thread pool if the store does I/O (Redis)"""
+        if not getattr(self.conversations, 'blocking', False):
+            return func(*args)
+        return await self.executor.run_io(func, *args)
+    
+    async def _store_conversation(
         self,
         conversation_id: str,
         user_message: str,
         assistant_response: str
-    ):
-        """Store conversation in memory"""
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
-        
-        self.conversations[conversation_id].extend([
+    ) -> int:
+        """Store conversation (the store keeps the last 20 messages per conversation); returns its length"""
+        return await self._conversation_call(self.conversations.append, conversation_id, [
             {"role": "user", "content": user_message},
             {"role": "assistant", "content": assistant_response}
         ])
-        
-        # Limit history to last 20 messages (10 exchanges)
-        if len(self.conversations[conversation_id]) > 20:
-            self.conversations[conversation_id] = self.conversations[conversation_id][-20:]
     
-    def _extract_symbols(self, text: str) -> List[str]:
-        """Extract stock symbols from text"""
-        import re
-        # Match $SYMBOL or standalone tickers
-        pattern = r'\$([A-Z]{1,5})\b|(?:^|\s)([A-Z]{2,5})(?:\s|$|[,.:;])'
-        matches = re.findall(pattern, text.upper())
-        symbols = [m[0] or m[1] for m in matches if m[0] or m[1]]
+    def _schedule_summary(self, conversation_id: str, stored: int):
+        """Start background summarization once a conversation holds summary_trigger messages"""
+        if not self.summary_trigger or conversation_id in self._summarizing:
+            return
+        if stored < self.summary_trigger:
+            return
+        task = asyncio.create_task(self._summarize_history(conversation_id))
+        self._summarizing[conversation_id] = task
+        task.add_done_callback(lambda _: self._summarizing.pop(conversation_id, None))
+    
+    def _schedule_prefetch(self, symbols: List[str]):
+        """Warm context for the symbols of this turn in the background"""
+        if self.prefetcher is not None and symbols:
+            self.prefetcher.schedule(symbols)
+    
+    async def _summarize_history(self, conversation_id: str):
+        """Fold all but the most recent messages into the conversation's running summary"""
+        history, previous = await self._conversation_call(self.conversations.snapshot, conversation_id)
+        older = history[:-self.summary_keep_recent] if self.summary_keep_recent else history
+        if not older:
+            return
         
-        # Filter to valid symbols
-        valid_symbols = [s for s in symbols if len(s) <= 5 and s.isalpha()]
+        transcript = "\n".join(f"{m['role'].title()}: {m['content']}" for m in older)
+        messages = [
+            {
+                "role": "system",
+                "content": "You maintain a running summary of a conversation between an investor and a financial advisor. "
+                           "Keep symbols, positions, figures, decisions and open questions; drop pleasantries. "
+                           "Reply with the updated summary only, under 200 words."
+            },
+            {
+                "role": "user",
+                "content": f"""{"Current summary:\n" + previous + "\n\n" if previous else ""}New messages:
+{transcript}"""
+            }
+        ]
         
-        # Remove common false positives
-        false_positives = {'I', 'A', 'IN', 'ON', 'AT', 'TO', 'FOR', 'AND', 'OR', 'THE', 'IS', 'IT'}
-        valid_symbols = [s for s in valid_symbols if s not in false_positives]
+        try:
+            response = await self._complete(messages, 0.1, 300, model=QUICK_MODEL)
+        except Exception as e:
+            print(f"[llm_agent][warning] summarizing conversation {conversation_id} failed: {e}")
+            return
         
-        return list(set(valid_symbols))
+        # Drops exactly the summarized messages; turns stored meanwhile stay.
+        # If appends trimmed the history in the meantime, the summary no
+        # longer lines up with it and is discarded (the next turn retries).
+        compacted = await self._conversation_call(
+            self.conversations.compact, conversation_id, response.choices[0].message.content.strip(), older
+        )
+        if not compacted:
+            print(f"[llm_agent] conversation {conversation_id} changed while summarizing; summary discarded")
     
-    def _format_context(self, docs: List[Dict]) -> str:
+    def _call_quick_model(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int
+    ):
+        """Call the fast Groq model synchronously"""
+        return self.client.chat.completions.create(
+            messages=messages,
+            model=QUICK_MODEL,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+    
+    def _extract_symbols(self, text: str) -> List[str]:
+        """Extract stock symbols (tickers or company names) from text"""
+        return self.symbol_recognizer.extract(text)
+    
+    def _format_context(self, docs: List[Dict], max_content_chars: Optional[int] = 600) -> str:
         """Format retrieved documents into context"""
         if not docs:
             return "No recent information available."
         
         context_parts = []
         for i, doc in enumerate(docs, 1):
-            # Format date nicely
-            timestamp = doc.get('timestamp', 'Unknown')
-            try:
-                dt = datetime.fromisoformat(timestamp)
-                formatted_date = dt.strftime("%B %d, %Y at %I:%M %p")
-            except:
-                formatted_date = timestamp
-            
-            context_parts.append(
-                f"[Source {i}]\n"
-                f"Type: {doc.get('data_type', 'Unknown').title()}\n"
-                f"Symbol: {doc.get('symbol', 'N/A')}\n"
-                f"Title: {doc.get('title', 'N/A')}\n"
-                f"Content: {doc.get('content', 'N/A')[:600]}\n"
-                f"Sentiment: {doc.get('sentiment', 'N/A').title()} "
-                f"(Score: {doc.get('sentiment_score', 0):.2f})\n"
-                f"Date: {formatted_date}\n"
-                f"URL: {doc.get('url', 'N/A')}"
-            )
+            context_parts.append(f"[Source {i}]\n" + self._format_document(doc, max_content_chars))
         
         return "\n\n---\n\n".join(context_parts)
     
+    def _format_document(self, doc: Dict, max_content_chars: Optional[int] = 600) -> str:
+        """Format one retrieved document (content cut to `max_content_chars`, None keeps it whole)"""
+        # Format date nicely
+        timestamp = doc.get('timestamp', 'Unknown')
+        try:
+            dt = datetime.fromisoformat(timestamp)
+            formatted_date = dt.strftime("%B %d, %Y at %I:%M %p")
+        except:
+            formatted_date = timestamp
+        
+        content = doc.get('content', 'N/A')
+        if max_content_chars is not None:
+            content = content[:max_content_chars]
+        
+        return (
+            f"Type: {doc.get('data_type', 'Unknown').title()}\n"
+            f"Symbol: {doc.get('symbol', 'N/A')}\n"
+            f"Title: {doc.get('title', 'N/A')}\n"
+            f"Content: {content}\n"
+            f"Sentiment: {doc.get('sentiment', 'N/A').title()} "
+            f"(Score: {doc.get('sentiment_score', 0):.2f})\n"
+            f"Date: {formatted_date}\n"
+            f"URL: {doc.get('url', 'N/A')}"
+        )
+    
     def _format_portfolio_summary(self, analysis: Dict) -> str:
         """Format portfolio analysis for LLM"""
         health = analysis['portfolio_health']
+        average = health.get('average_composite_score')
+        average_text = f"{average:.1f}/100" if average is not None else "N/A"
         
         summary = f"""**Portfolio Health Overview**
-Overall Rating: {health['health_rating']} (Score: {health['average_score']:.1f}/100)
+Overall Rating: {health['health_rating']} (Score: {average_text})
 
 **Position Breakdown:**
 - Positions with BUY signals: {health['position_breakdown']['buy']}
@@ -455,18 +966,45 @@ Overall Rating: {health['health_rating']} (Score: {health['average_score']:.1f}/
             temperature: Lower = more factual
             max_tokens: Maximum report length
         """
+        analysis, recent_docs = await self._report_inputs(symbol)
+        return await self._write_stock_report(symbol, analysis, recent_docs, temperature, max_tokens)
+    
+    async def _report_inputs(self, symbol: str):
+        """Analysis snapshot and up to 15 recent documents a stock report is written from"""
         # Get comprehensive analysis
+        if self.prefetcher is not None:
+            self.prefetcher.note_analysis([symbol])
         analysis = await self.portfolio_manager.analyze_stock_for_entry(symbol)
         
-        # Get recent documents
-        recent_docs = self.vector_store.get_recent_documents(
-            symbol=symbol,
-            hours=72,  # Last 3 days
-            data_types=['news', 'social_media']
+        # Get recent documents (prefetched after a chat turn about the symbol)
+        recent_docs = self.prefetcher.recent_documents(symbol) if self.prefetcher is not None else None
+        if recent_docs is not None:
+            return analysis, recent_docs[:15]
+        recent_docs = await self.executor.run_io(
+            functools.partial(
+                self.vector_store.get_recent_documents,
+                symbol=symbol,
+                hours=72,  # Last 3 days
+                data_types=['news', 'social_media']
+            )
         )
-        
+        return analysis, recent_docs[:15]
+    
+    async def _write_stock_report(
+        self,
+        symbol: str,
+        analysis: Dict,
+        recent_docs: List[Dict],
+        temperature: float = 0.2,
+        max_tokens: int = 2500
+    ) -> Dict:
+        """Generate the report text for a symbol from its analysis and documents"""
         # Format context
-        context = self._format_context(recent_docs[:15])
+        context = self._format_context(recent_docs)
+        
+        technical = analysis['technical_analysis']
+        news = analysis['sentiment_analysis']['news']
+        social = analysis['sentiment_analysis']['social']
         
         # Build report prompt
         report_prompt = f"""Generate a comprehensive investment analysis report for {symbol}.
@@ -474,16 +1012,13 @@ Overall Rating: {health['health_rating']} (Score: {health['average_score']:.1f}/
 **Available Data:**
 
 Technical Analysis:
-- Composite Technical Score: {analysis['technical_analysis']['composite_score']:.1f}/100
-- ML Signal: {analysis['technical_analysis']['ml_signal']}
-- Key Indicators: {json.dumps(analysis['technical_analysis']['indicators'], indent=2)}
+- Composite Technical Score: {technical['composite_score']:.1f}/100
+- ML Signal: {technical.get('ml_signal', 'N/A')}
+- Key Indicators: {json.dumps(technical.get('indicators', {}), indent=2, default=str)}
 
 Sentiment Analysis:
-- Overall Sentiment: {analysis['sentiment_analysis']['combined']['overall_sentiment'].title()}
-- Sentiment Score: {analysis['sentiment_analysis']['combined']['sentiment_score']:.2f} (-1 to +1)
-- News Sentiment: {analysis['sentiment_analysis']['financial']['overall_sentiment'].title()}
-- Social Media Sentiment: {analysis['sentiment_analysis']['social']['overall_sentiment'].title()}
-- Confidence: {analysis['sentiment_analysis']['combined']['confidence']:.2f}
+- News Sentiment: {news.get('overall_sentiment', 'neutral').title()} (Confidence: {news.get('overall_confidence', 0.0):.2f}, {news.get('document_count', 0)} articles)
+- Social Media Sentiment: {social.get('overall_sentiment', 'neutral').title()} (Confidence: {social.get('overall_confidence', 0.0):.2f}, {social.get('document_count', 0)} posts)
 
 Overall Assessment:
 - Composite Score: {analysis['composite_score']:.1f}/100
@@ -539,18 +1074,12 @@ Format the report in clear markdown with proper headers and bullet points."""
         ]
         
         # Generate report
-        response = await asyncio.get_event_loop().run_in_executor(
-            self.executor,
-            self._call_groq_api,
-            messages,
-            temperature,
-            max_tokens
-        )
+        response = await self._complete(messages, temperature, max_tokens)
         
         report = response.choices[0].message.content
         
         # Enhance citations
-        citations = self._extract_citations(recent_docs[:15])
+        citations = self._extract_citations(recent_docs)
         report_with_links = self._enhance_citations_with_links(report, citations)
         
         return {
@@ -558,7 +1087,7 @@ Format the report in clear markdown with proper headers and bullet points."""
             'report': report_with_links,
             'raw_report': report,
             'analysis': analysis,
-            'supporting_documents': recent_docs[:15],
+            'supporting_documents': recent_docs,
             'citations': citations,
             'generated_at': datetime.now().isoformat(),
             'model': self.model,
@@ -569,6 +1098,38 @@ Format the report in clear markdown with proper headers and bullet points."""
             }
         }
     
+    async def refresh_report_digest(self, symbol: str, force: bool = False):
+        """
+        Bring a symbol's report digest up to date. The report is only
+        regenerated when its inputs (document ids, recommended action)
+        differ from the stored digest's. Returns (digest, regenerated).
+        """
+        analysis, recent_docs = await self._report_inputs(symbol)
+        document_ids = [doc['id'] for doc in recent_docs if 'id' in doc]
+        input_key = digest_key(document_ids, analysis['recommendation']['action'])
+        
+        current = self.report_digests.get(symbol)
+        if current is not None and current.get('input_key') == input_key and not force:
+            self.report_digests.mark_fresh(symbol)
+            self.report_digests.record('unchanged')
+            return current, False
+        
+        report = await self._write_stock_report(symbol, analysis, recent_docs)
+        digest = {**report, 'input_key': input_key, 'document_ids': document_ids}
+        self.report_digests.put(symbol, digest)
+        self.report_digests.record('regenerated')
+        return digest, True
+    
+    async def get_report_digest(self, symbol: str) -> Dict:
+        """Stored report digest, refreshed first if new documents arrived for the symbol"""
+        digest = self.report_digests.get(symbol)
+        if digest is not None and not self.report_digests.is_stale(symbol):
+            self.report_digests.record('hits')
+            return digest
+        self.report_digests.record('misses')
+        digest, _ = await self.refresh_report_digest(symbol)
+        return digest
+    
     async def answer_quick_question(
         self,
         question: str,
@@ -579,9 +1140,9 @@ Format the report in clear markdown with proper headers and bullet points."""
         Useful for definitions, explanations, general advice
         """
         # For quick questions, use minimal context
+        context_docs = []
         if context_symbols:
             # Get just a few recent docs for context
-            context_docs = []
             for symbol in context_symbols[:2]:  # Limit to 2 symbols
                 docs = self.vector_store.get_recent_documents(
                     symbol=symbol,
@@ -594,6 +1155,10 @@ Format the report in clear markdown with proper headers and bullet points."""
         else:
             context = ""
         
+        cached, cache_key = await self._lookup_response('quick', question, context_docs, QUICK_MODEL)
+        if cached is not None:
+            return {**cached, 'timestamp': datetime.now().isoformat(), 'cached': True}
+        
         messages = [
             {
                 "role": "system",
@@ -607,26 +1172,21 @@ Provide a brief, clear answer (2-4 sentences)."""
             }
         ]
         
-        response = await asyncio.get_event_loop().run_in_executor(
-            self.executor,
-            lambda: self.client.chat.completions.create(
-                messages=messages,
-                model="llama-3.1-8b-instant",  # Use faster model for quick Q&A
-                temperature=0.3,
-                max_tokens=300
-            )
-        )
+        # Latency-critical: hedged when the gateway has hedging enabled
+        response = await self._complete(messages, 0.3, 300, model=QUICK_MODEL, hedge=True)
         
-        return {
+        answer = {
             'answer': response.choices[0].message.content,
-            'timestamp': datetime.now().isoformat(),
-            'model': 'llama-3.1-8b-instant'
+            'model': QUICK_MODEL
         }
+        if cache_key is not None:
+            self.response_cache.store(response=answer, documents=context_docs, kind='quick', **cache_key)
+        
+        return {**answer, 'timestamp': datetime.now().isoformat(), 'cached': False}
     
     def clear_conversation(self, conversation_id: str):
         """Clear conversation history"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.conversations.delete(conversation_id)
     
     def get_conversation_history(self, conversation_id: str) -> List[Dict]:
         """Get conversation history"""
@@ -0,0 +1,244 @@
+from typing import AsyncIterator, Dict, List, Optional
+from types import SimpleNamespace
+import asyncio
+import json
+import os
+import random
+import time
+import httpx
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+# Statuses worth retrying: rate limited, or the provider is having a moment
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_rate_limits(spec: Optional[str]) -> Dict[str, int]:
+    """'model=tokens_per_minute,...' -> {model: tokens_per_minute}"""
+    limits = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            model, tpm = item.split("=", 1)
+            limits[model.strip()] = int(tpm)
+    return limits
+
+
+class TokenBucket:
+    """Tokens-per-minute limiter; callers wait until their estimate fits."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: int) -> float:
+        """Take `tokens` (capped at capacity); returns seconds spent waiting."""
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                delay = (tokens - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= tokens
+        return waited
+
+    def refund(self, tokens: int):
+        """Return over-estimated tokens once actual usage is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+
+class LLMGateway:
+    """
+    Shared async client for OpenAI-compatible chat completions (Groq).
+
+    One pooled httpx.AsyncClient serves all agents. Requests are bounded by
+    a global `max_concurrency` semaphore and, per model, by a
+    tokens-per-minute bucket charged with the prompt estimate plus
+    `max_tokens` (the unused part is refunded from the reported usage).
+    429/5xx responses and transport errors are retried with jittered
+    exponential backoff, honouring Retry-After; a request gives up its
+    concurrency slot while it backs off. Calls made with `hedge=True`
+    start a second identical request, charged to the bucket like the
+    first, when the first hasn't answered after `hedge_after` seconds
+    and take whichever returns first.
+
+    Completions come back as attribute namespaces mirroring the Groq SDK
+    objects (`response.choices[0].message.content`, `response.usage`).
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = GROQ_BASE_URL,
+                 max_concurrency: int = 8, tokens_per_minute: Optional[Dict[str, int]] = None,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 hedge_after: Optional[float] = None, timeout: float = 60.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key or os.environ.get('GROQ_API_KEY', '')}"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency * 2, max_keepalive_connections=max_concurrency),
+            transport=transport
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._buckets = {model: TokenBucket(tpm) for model, tpm in (tokens_per_minute or {}).items()}
+        self._in_flight = 0
+        self._stats = {'requests': 0, 'attempts': 0, 'retries': 0, 'failures': 0,
+                       'hedges': 0, 'hedge_wins': 0, 'rate_limited_seconds': 0.0}
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+        return sum(len(m.get('content') or '') for m in messages) // 4 + max_tokens
+
+    async def chat(self, messages: List[Dict], model: str, temperature: float = 0.3,
+                   max_tokens: int = 1000, hedge: bool = False, **params):
+        """Non-streaming chat completion."""
+        payload = {'messages': messages, 'model': model, 'temperature': temperature,
+                   'max_tokens': max_tokens, 'stream': False, **params}
+        estimate = await self._charge(model, messages, max_tokens)
+        self._stats['requests'] += 1
+
+        if hedge and self.hedge_after is not None:
+            response = await self._hedged(payload)
+        else:
+            response = await self._post(payload)
+
+        bucket = self._buckets.get(model)
+        usage = getattr(response, 'usage', None)
+        if bucket is not None and usage is not None:
+            bucket.refund(max(estimate - usage.total_tokens, 0))
+        return response
+
+    async def stream(self, messages: List[Dict], model: str, temperature: float = 0.3,
+                     max_tokens: int = 1000, **params) -> AsyncIterator[str]:
+        """Streaming chat completion; yields content deltas. Retries only before the first byte."""
+        payload = {'messages': messages, 'model': model, 'temperature': temperature,
+                   'max_tokens': max_tokens, 'stream': True, **params}
+        await self._charge(model, messages, max_tokens)
+        self._stats['requests'] += 1
+
+        for attempt in range(self.max_retries + 1):
+            self._stats['attempts'] += 1
+            retry = None
+            try:
+                async with self._semaphore, self._client.stream("POST", "/chat/completions", json=payload) as response:
+                    if response.status_code in _RETRY_STATUSES and attempt < self.max_retries:
+                        retry = response
+                    else:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                return
+                            choices = json.loads(data).get('choices') or [{}]
+                            content = choices[0].get('delta', {}).get('content')
+                            if content:
+                                yield content
+                        return
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    self._stats['failures'] += 1
+                    raise
+            # Back off without holding a concurrency slot
+            await self._backoff(attempt, retry)
+
+    async def _charge(self, model: str, messages: List[Dict], max_tokens: int) -> int:
+        estimate = self.estimate_tokens(messages, max_tokens)
+        bucket = self._buckets.get(model)
+        if bucket is not None:
+            self._stats['rate_limited_seconds'] += await bucket.acquire(estimate)
+        return estimate
+
+    async def _attempt(self, payload: Dict) -> httpx.Response:
+        """One request, holding a concurrency slot only while it is on the wire"""
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                return await self._client.post("/chat/completions", json=payload)
+            finally:
+                self._in_flight -= 1
+
+    async def _post(self, payload: Dict):
+        for attempt in range(self.max_retries + 1):
+            self._stats['attempts'] += 1
+            try:
+                response = await self._attempt(payload)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    self._stats['failures'] += 1
+                    raise
+                await self._backoff(attempt)
+                continue
+            if response.status_code in _RETRY_STATUSES and attempt < self.max_retries:
+                await self._backoff(attempt, response)
+                continue
+            if response.is_error:
+                self._stats['failures'] += 1
+            response.raise_for_status()
+            return json.loads(response.content, object_hook=lambda d: SimpleNamespace(**d))
+
+    async def _charged_post(self, payload: Dict):
+        """A hedge is a second real request, so it takes its own share of the token bucket"""
+        await self._charge(payload['model'], payload['messages'], payload['max_tokens'])
+        return await self._post(payload)
+
+    async def _hedged(self, payload: Dict):
+        primary = asyncio.create_task(self._post(payload))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self._stats['hedges'] += 1
+        backup = asyncio.create_task(self._charged_post(payload))
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is backup:
+                        self._stats['hedge_wins'] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def _backoff(self, attempt: int, response: Optional[httpx.Response] = None):
+        self._stats['retries'] += 1
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                delay = min(max(delay, float(retry_after)), self.backoff_max)
+            except ValueError:
+                pass
+        await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            'rate_limited_seconds': round(self._stats['rate_limited_seconds'], 3),
+            'in_flight': self._in_flight,
+            'max_concurrency': self.max_concurrency,
+            'models_limited': sorted(self._buckets)
+        }
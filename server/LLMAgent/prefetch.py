@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, List, Optional
+from collections import OrderedDict
+import asyncio
+import threading
+import time
+import numpy as np
+
+_KINDS = ('analysis', 'retrieval', 'recent_documents', 'embeddings')
+
+
+class ContextPrefetcher:
+    """
+    Speculatively warms chat context for symbols of the ongoing conversation.
+
+    After a turn, a background task (capped at `budget` seconds and
+    `max_symbols` symbols) warms, per symbol:
+
+    - the portfolio manager's analysis cache (an analysis counts as warm
+      for as long as that cache keeps it, not for `ttl`),
+    - a retrieval pool: the symbol's `pool_size` best documents with their
+      stored embeddings (fetched from the index, not recomputed), so a
+      follow-up is ranked locally instead of querying the index,
+    - its recent documents (as used for stock reports).
+
+    Blocking fetches run on the shared `AnalysisExecutor` I/O pool. It also
+    memoizes query embeddings, so one turn embeds its message once.
+    Prefetched items live for `ttl` seconds and are dropped when new
+    documents for their symbol are upserted; `stats()` reports how many
+    were used (hits) against how often a lookup found nothing (misses).
+    """
+
+    def __init__(self, vector_store, portfolio_manager, executor, budget: float = 5.0,
+                 max_symbols: int = 5, pool_size: int = 30, ttl: float = 300.0,
+                 embedding_cache_size: int = 256):
+        self.vector_store = vector_store
+        self.portfolio_manager = portfolio_manager
+        self.executor = executor
+        self.budget = budget
+        self.max_symbols = max_symbols
+        self.pool_size = pool_size
+        self.ttl = ttl
+        self.embedding_cache_size = embedding_cache_size
+
+        self._pools: Dict[str, Dict] = {}  # symbol -> {'documents', 'vectors', 'expires_at'}
+        self._recent: Dict[str, Dict] = {}  # symbol -> {'documents', 'expires_at'}
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()  # embeddings are requested from executor threads
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {kind: {'prefetched': 0, 'hits': 0, 'misses': 0} for kind in _KINDS}
+        self._stats['runs'] = {'started': 0, 'over_budget': 0}
+
+    def embedding(self, text: str) -> np.ndarray:
+        """Query embedding, memoized (LRU)."""
+        with self._lock:
+            cached = self._embeddings.get(text)
+            if cached is not None:
+                self._embeddings.move_to_end(text)
+                self._stats['embeddings']['hits'] += 1
+                return cached
+            self._stats['embeddings']['misses'] += 1
+        vector = self.vector_store.generate_embedding(text)
+        with self._lock:
+            self._embeddings[text] = vector
+            while len(self._embeddings) > self.embedding_cache_size:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def schedule(self, symbols: Iterable[str]) -> Optional[asyncio.Task]:
+        """Start prefetching `symbols` in the background unless a run is in progress."""
+        symbols = [s for s in dict.fromkeys(symbols)][:self.max_symbols]
+        if not symbols or (self._task is not None and not self._task.done()):
+            return None
+        self._task = asyncio.create_task(self._run(symbols))
+        return self._task
+
+    async def _run(self, symbols: List[str]):
+        self._stats['runs']['started'] += 1
+        try:
+            await asyncio.wait_for(self.prefetch(symbols), timeout=self.budget)
+        except asyncio.TimeoutError:
+            self._stats['runs']['over_budget'] += 1
+            print(f"[prefetch][warning] prefetch of {symbols} exceeded the {self.budget}s budget")
+        except Exception as e:
+            print(f"[prefetch][error] prefetch of {symbols} failed: {e}")
+
+    async def prefetch(self, symbols: List[str]):
+        now = time.monotonic()
+        cold = [s for s in symbols if self._live(self._pools.get(s), now) is None]
+        if not cold:
+            return
+        # Analyses for all symbols at once (the portfolio manager bounds concurrency)
+        analyses, _ = await self.portfolio_manager.analyze_many(cold)
+        self._stats['analysis']['prefetched'] += len(analyses)
+
+        for symbol in cold:
+            recent = await self.executor.run_io(
+                self.vector_store.get_recent_documents, symbol=symbol, hours=72, data_types=['news', 'social_media']
+            )
+            self._recent[symbol] = {'documents': recent, 'expires_at': time.monotonic() + self.ttl}
+            self._stats['recent_documents']['prefetched'] += 1
+
+            pool = await self.executor.run_io(
+                self.vector_store.query, query_text=f"{symbol} stock news", symbol=symbol, top_k=self.pool_size
+            )
+            # The vectors the index scores with, so local scores match it
+            stored = await self.executor.run_io(self.vector_store.fetch_vectors, [doc['id'] for doc in pool])
+            pool = [doc for doc in pool if doc['id'] in stored]
+            vectors = [self._unit(stored[doc['id']]) for doc in pool]
+            self._pools[symbol] = {
+                'documents': pool,
+                'vectors': np.stack(vectors) if vectors else np.zeros((0, 0)),
+                'expires_at': time.monotonic() + self.ttl
+            }
+            self._stats['retrieval']['prefetched'] += 1
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @staticmethod
+    def _live(entry: Optional[Dict], now: float) -> Optional[Dict]:
+        return entry if entry is not None and entry['expires_at'] > now else None
+
+    def retrieve(self, symbol: str, query_embedding, top_k: int = 5) -> Optional[List[Dict]]:
+        """Top documents for `symbol` ranked locally from its prefetched pool, or None if cold."""
+        pool = self._live(self._pools.get(symbol), time.monotonic())
+        if pool is None:
+            self._stats['retrieval']['misses'] += 1
+            return None
+        self._stats['retrieval']['hits'] += 1
+        if not pool['documents']:
+            return []
+        scores = pool['vectors'] @ self._unit(query_embedding)
+        order = np.argsort(-scores)[:top_k]
+        return [{**pool['documents'][i], 'score': float(scores[i])} for i in order]
+
+    def recent_documents(self, symbol: str) -> Optional[List[Dict]]:
+        entry = self._live(self._recent.get(symbol), time.monotonic())
+        self._stats['recent_documents']['hits' if entry else 'misses'] += 1
+        return entry['documents'] if entry else None
+
+    def note_analysis(self, symbols: Iterable[str]):
+        """Account analyses about to be requested against what the analysis cache still holds."""
+        cache = self.portfolio_manager.analysis_cache
+        for symbol in symbols:
+            self._stats['analysis']['hits' if cache.is_warm(symbol) else 'misses'] += 1
+
+    def invalidate(self, symbols: Iterable[str]):
+        """Vector store upsert hook: prefetched documents for these symbols are outdated."""
+        for symbol in symbols:
+            self._pools.pop(symbol, None)
+            self._recent.pop(symbol, None)
+
+    def stats(self) -> Dict:
+        result = {'runs': dict(self._stats['runs'])}
+        for kind in _KINDS:
+            counts = self._stats[kind]
+            lookups = counts['hits'] + counts['misses']
+            result[kind] = {**counts, 'hit_rate': round(counts['hits'] / lookups, 3) if lookups else None}
+        return result
@@ -0,0 +1,140 @@
+from typing import Callable, Dict, List, Optional
+import re
+import numpy as np
+
+ROUTE_QUICK = 'quick'  # small model, minimal context (answer_quick_question)
+ROUTE_RAG = 'rag'      # large model, retrieval and portfolio analysis (chat)
+
+# Example intents for the embedding classifier
+DEFAULT_EXAMPLES = {
+    ROUTE_QUICK: [
+        "What is a P/E ratio?",
+        "What does market cap mean?",
+        "Explain what an ETF is",
+        "How does dollar cost averaging work?",
+        "What is the difference between a stock and a bond?",
+        "Define dividend yield",
+        "What is a stop loss order?",
+        "What does RSI measure?",
+        "How do options work?",
+        "What is diversification?",
+    ],
+    ROUTE_RAG: [
+        "Should I buy NVDA right now?",
+        "What is the latest news on Apple?",
+        "Is Tesla overvalued after earnings?",
+        "Compare Microsoft and Google as investments",
+        "Should I sell my AMD position?",
+        "How is my portfolio doing?",
+        "Why did the stock drop today?",
+        "What is the outlook for Amazon this quarter?",
+        "Which of my holdings should I trim?",
+        "What are analysts saying about Meta?",
+    ],
+}
+
+# Definitional forms only: "what is a P/E ratio", "what is EBITDA", "what does RSI
+# measure", "explain what an ETF is", "how do options work", "define ..."
+_TERM = r"[\w/\-&.]+(\s+[\w/\-&.]+){0,2}"
+_DEFINITIONAL = re.compile(
+    r"^\s*(what\s+(is|are)\s+(an?\s+" + _TERM + r"|[\w/\-&.]+)|"
+    r"what\s+does\s+(an?\s+|the\s+)?" + _TERM + r"\s+(mean|measure|stand\s+for)|"
+    r"explain\s+what\s+(an?\s+)?" + _TERM + r"\s+(is|are|means)|"
+    r"how\s+(does|do)\s+(an?\s+)?" + _TERM + r"\s+work|"
+    r"define\s+" + _TERM + r"|"
+    r"(what\s+is\s+the\s+)?(meaning\s+of|difference\s+between)\s+.+)\s*[?.!]?\s*$",
+    re.IGNORECASE
+)
+_ANALYSIS = re.compile(
+    r"\b(buy|sell|hold|trim|short|invest|outlook|forecast|price|trading|valuation|earnings|news|"
+    r"latest|today|this\s+(week|month|quarter|year)|compare|undervalued|overvalued|"
+    r"should\s+i|recommend)\b",
+    re.IGNORECASE
+)
+_PORTFOLIO = re.compile(r"\b(my|our)\s+(portfolio|positions?|holdings?|stocks?|shares)\b", re.IGNORECASE)
+_FOLLOW_UP = re.compile(r"\b(it|that|this|they|those|them)\b", re.IGNORECASE)
+_CASHTAG = re.compile(r"\$[A-Za-z]{1,5}\b")
+
+
+class QueryRouter:
+    """
+    Decides whether a chat message needs the full RAG pipeline.
+
+    Cheap rules go first: portfolio questions, messages naming a stock
+    (cashtag, or a ticker/company name known to `symbol_recognizer`),
+    analysis vocabulary and follow-ups in an ongoing conversation escalate
+    to RAG, and definitional questions go to the quick path. Anything else is
+    classified by cosine similarity between the message embedding and the
+    centroid of each intent's example questions; the quick path has to win
+    by `margin`, otherwise the message is escalated. Without an embedder
+    unmatched messages take the RAG path.
+    """
+
+    def __init__(self, embed: Optional[Callable[[str], np.ndarray]] = None,
+                 examples: Optional[Dict[str, List[str]]] = None, margin: float = 0.05,
+                 symbol_recognizer=None):  # SymbolRecognizer
+        self.embed = embed
+        self.symbol_recognizer = symbol_recognizer
+        self.examples = examples or DEFAULT_EXAMPLES
+        self.margin = margin
+        self._centroids: Optional[Dict[str, np.ndarray]] = None
+        self._counts = {ROUTE_QUICK: 0, ROUTE_RAG: 0}
+        self._latency = {ROUTE_QUICK: 0.0, ROUTE_RAG: 0.0}
+        self._reasons: Dict[str, int] = {}
+
+    def _unit(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed(text), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _classify(self, message: str) -> Dict:
+        if self._centroids is None:
+            self._centroids = {}
+            for route, texts in self.examples.items():
+                centroid = np.mean([self._unit(t) for t in texts], axis=0)
+                self._centroids[route] = centroid / (np.linalg.norm(centroid) or 1.0)
+        vector = self._unit(message)
+        similarity = {route: float(vector @ c) for route, c in self._centroids.items()}
+        quick, rag = similarity.get(ROUTE_QUICK, -1.0), similarity.get(ROUTE_RAG, -1.0)
+        route = ROUTE_QUICK if quick > rag + self.margin else ROUTE_RAG
+        return {'route': route, 'reason': 'classifier', 'confidence': round(abs(quick - rag), 4)}
+
+    def route(self, message: str, has_portfolio: bool = False, has_history: bool = False) -> Dict:
+        """{'route': 'quick' | 'rag', 'reason': ..., 'confidence': ...} for a chat message."""
+        if has_portfolio and _PORTFOLIO.search(message):
+            decision = {'route': ROUTE_RAG, 'reason': 'portfolio', 'confidence': 1.0}
+        elif _CASHTAG.search(message):
+            decision = {'route': ROUTE_RAG, 'reason': 'cashtag', 'confidence': 1.0}
+        elif self.symbol_recognizer is not None and self.symbol_recognizer.extract(message):
+            decision = {'route': ROUTE_RAG, 'reason': 'symbol', 'confidence': 1.0}
+        elif has_history and _FOLLOW_UP.search(message):
+            decision = {'route': ROUTE_RAG, 'reason': 'follow_up', 'confidence': 1.0}
+        elif _ANALYSIS.search(message):
+            decision = {'route': ROUTE_RAG, 'reason': 'analysis', 'confidence': 1.0}
+        elif _DEFINITIONAL.search(message):
+            decision = {'route': ROUTE_QUICK, 'reason': 'definitional', 'confidence': 1.0}
+        elif self.embed is not None:
+            decision = self._classify(message)
+        else:
+            decision = {'route': ROUTE_RAG, 'reason': 'default', 'confidence': 0.0}
+
+        self._reasons[decision['reason']] = self._reasons.get(decision['reason'], 0) + 1
+        return decision
+
+    def record(self, route: str, latency: float):
+        """Record the end-to-end latency of a routed request."""
+        self._counts[route] += 1
+        self._latency[route] += latency
+
+    def stats(self) -> Dict:
+        average = {r: (self._latency[r] / self._counts[r] if self._counts[r] else None) for r in self._counts}
+        savings = None
+        if average[ROUTE_QUICK] is not None and average[ROUTE_RAG] is not None:
+            # Estimated time saved by not sending quick-routed requests down the RAG path
+            savings = round(self._counts[ROUTE_QUICK] * (average[ROUTE_RAG] - average[ROUTE_QUICK]), 3)
+        return {
+            'routed': dict(self._counts),
+            'reasons': dict(self._reasons),
+            'average_latency': {r: (round(v, 4) if v is not None else None) for r, v in average.items()},
+            'estimated_seconds_saved': savings
+        }
@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, List, Optional, Set
+import hashlib
+import json
+import os
+
+
+def digest_key(document_ids: Iterable[str], action: str) -> str:
+    """Identity of a report's inputs: its documents and the recommended action."""
+    payload = json.dumps([sorted(set(document_ids)), action])
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class ReportDigestStore:
+    """
+    Precomputed per-symbol stock reports (analysis snapshot plus generated
+    report), keyed by `digest_key` of their inputs.
+
+    Digests are kept in memory and, when `directory` is set, written there
+    as one JSON file per symbol so they survive restarts and can be shared
+    by workers. Vector store upserts mark a symbol stale; a stale digest is
+    checked against its current inputs before being served again, and only
+    regenerated when they changed. Symbols are case-insensitive.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._digests: Dict[str, Dict] = {}
+        self._stale: Set[str] = set()
+        self._stats = {'hits': 0, 'misses': 0, 'regenerated': 0, 'unchanged': 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}.json")
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        symbol = symbol.upper()
+        digest = self._digests.get(symbol)
+        if digest is None and self.directory and os.path.exists(self._path(symbol)):
+            try:
+                with open(self._path(symbol)) as f:
+                    digest = self._digests[symbol] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[report_digests][warning] unreadable digest for {symbol}: {e}")
+        return digest
+
+    def put(self, symbol: str, digest: Dict):
+        symbol = symbol.upper()
+        self._digests[symbol] = digest
+        self._stale.discard(symbol)
+        if self.directory:
+            tmp = self._path(symbol) + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump(digest, f, default=str)
+            os.replace(tmp, self._path(symbol))
+
+    def is_stale(self, symbol: str) -> bool:
+        return symbol.upper() in self._stale
+
+    def mark_stale(self, symbols: Iterable[str]):
+        """Vector store upsert hook."""
+        self._stale.update(symbol.upper() for symbol in symbols)
+
+    def mark_fresh(self, symbol: str):
+        self._stale.discard(symbol.upper())
+
+    def record(self, event: str):
+        self._stats[event] += 1
+
+    def symbols(self) -> List[str]:
+        return sorted(self._digests)
+
+    def stats(self) -> Dict:
+        return {**self._stats, 'digests': len(self._digests), 'stale': len(self._stale)}
@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional
+from collections import OrderedDict
+import threading
+import time
+import numpy as np
+try:
+    from sentence_transformers import CrossEncoder
+    _HAVE_CROSS_ENCODER = True
+except Exception:
+    _HAVE_CROSS_ENCODER = False
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved documents against the question with a cross-encoder.
+
+    The `candidates` best documents by retrieval score are scored as
+    (question, title + content) pairs in one batch and the best `keep` are
+    returned, best first. A document's 'score' becomes the cross-encoder
+    relevance (sigmoid of the logit, so it stays positive for the context
+    packer) and its retrieval score moves to 'retrieval_score'.
+
+    The model is loaded on first use, once per process; if
+    sentence-transformers or the model is unavailable, documents pass
+    through in retrieval order. Scores are cached per (question, document
+    id), so follow-ups and repeated questions only score new documents.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, candidates: int = 30, keep: int = 8,
+                 batch_size: int = 32, cache_size: int = 4096, max_content_chars: int = 1000, model=None):
+        self.model_name = model_name
+        self.candidates = candidates
+        self.keep = keep
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.max_content_chars = max_content_chars
+
+        self._model = model
+        self._load_failed = False
+        self._lock = threading.Lock()  # reranking runs in executor threads
+        self._scores: "OrderedDict[tuple, float]" = OrderedDict()
+        self._stats = {'reranked': 0, 'scored': 0, 'cache_hits': 0, 'passthrough': 0, 'seconds': 0.0}
+
+    @property
+    def model(self):
+        """The cross-encoder, loaded on first use (None if it can't be)"""
+        if self._model is None and not self._load_failed:
+            with self._lock:
+                if self._model is None and not self._load_failed:
+                    if not _HAVE_CROSS_ENCODER:
+                        self._load_failed = True
+                        print("[reranker][warning] sentence-transformers unavailable, re-ranking disabled")
+                    else:
+                        try:
+                            self._model = CrossEncoder(self.model_name)
+                        except Exception as e:
+                            self._load_failed = True
+                            print(f"[reranker][error] failed to load {self.model_name}: {e}")
+        return self._model
+
+    def _text(self, doc: Dict) -> str:
+        return f"{doc.get('title', '')}\n{(doc.get('content') or '')[:self.max_content_chars]}"
+
+    def rerank(self, question: str, documents: List[Dict]) -> List[Dict]:
+        """The best `keep` of the top `candidates` documents for `question`"""
+        candidates = sorted(documents, key=lambda d: d.get('score', 0), reverse=True)[:self.candidates]
+        model = self.model
+        if model is None or not candidates:
+            self._stats['passthrough'] += 1
+            return candidates[:self.keep]
+
+        started = time.perf_counter()
+        with self._lock:
+            scores = {doc['id']: self._scores.get((question, doc['id'])) for doc in candidates}
+            for doc_id in scores:
+                if scores[doc_id] is not None:
+                    self._scores.move_to_end((question, doc_id))
+        missing = [doc for doc in candidates if scores[doc['id']] is None]
+        if missing:
+            logits = model.predict(
+                [(question, self._text(doc)) for doc in missing],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            with self._lock:
+                for doc, logit in zip(missing, np.asarray(logits, dtype=np.float64).ravel()):
+                    score = float(1.0 / (1.0 + np.exp(-logit)))
+                    scores[doc['id']] = self._scores[(question, doc['id'])] = score
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+
+        ranked = sorted(candidates, key=lambda d: scores[d['id']], reverse=True)[:self.keep]
+        self._stats['reranked'] += 1
+        self._stats['scored'] += len(missing)
+        self._stats['cache_hits'] += len(candidates) - len(missing)
+        self._stats['seconds'] += time.perf_counter() - started
+        return [{**doc, 'retrieval_score': doc.get('score', 0), 'score': scores[doc['id']]} for doc in ranked]
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            'seconds': round(self._stats['seconds'], 4),
+            'model': self.model_name,
+            'loaded': self._model is not None,
+            'candidates': self.candidates,
+            'keep': self.keep
+        }
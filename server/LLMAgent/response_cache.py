@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import json
+import time
+import numpy as np
+
+
+class SemanticResponseCache:
+    """
+    Cache of LLM answers for near-identical questions.
+
+    An entry only matches when the retrieved document ids and the context
+    fingerprint (portfolio summary, conversation history) are exactly the
+    same and the question embedding has cosine similarity >=
+    `similarity_threshold`, so new documents or a changed portfolio always
+    miss. Entries expire after a TTL proportional to the age of the newest
+    supporting document (fresh news -> short TTL), are dropped when new
+    documents for one of their symbols are upserted, and are evicted LRU
+    beyond `max_entries`.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, max_entries: int = 512,
+                 min_ttl: float = 60.0, max_ttl: float = 900.0, freshness_factor: float = 0.25):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.freshness_factor = freshness_factor
+        # (kind, document ids, fingerprint) -> OrderedDict[entry_id -> entry]
+        self._groups: Dict[Tuple, "OrderedDict[int, Dict]"] = {}
+        self._lru: "OrderedDict[int, Tuple]" = OrderedDict()  # entry_id -> group key
+        self._next_id = 0
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'expired': 0, 'evicted': 0, 'invalidated': 0}
+
+    @staticmethod
+    def fingerprint(*parts) -> str:
+        """Stable hash of the non-retrieval inputs to a prompt."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def ttl_for(self, documents: List[Dict]) -> float:
+        """TTL scaled by the age of the newest document, clamped to [min_ttl, max_ttl]."""
+        newest = None
+        for doc in documents:
+            try:
+                ts = datetime.fromisoformat(str(doc.get('timestamp', '')).replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            ts = ts.replace(tzinfo=None) if ts.tzinfo is None else ts.astimezone().replace(tzinfo=None)
+            newest = ts if newest is None or ts > newest else newest
+        if newest is None:
+            return self.max_ttl
+        age = max((datetime.now() - newest).total_seconds(), 0.0)
+        return min(max(age * self.freshness_factor, self.min_ttl), self.max_ttl)
+
+    @staticmethod
+    def _key(kind: str, document_ids: Iterable[str], fingerprint: str) -> Tuple:
+        return (kind, tuple(sorted(set(document_ids))), fingerprint)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, embedding, document_ids: Iterable[str], fingerprint: str,
+               kind: str = 'chat') -> Optional[Dict]:
+        """Cached response for a similar question over the same context, if any."""
+        group = self._groups.get(self._key(kind, document_ids, fingerprint))
+        if group:
+            now = time.monotonic()
+            for entry_id in [i for i, e in group.items() if e['expires_at'] <= now]:
+                self._remove(entry_id)
+                self._stats['expired'] += 1
+
+            if group:
+                ids = list(group)
+                vectors = np.stack([group[i]['embedding'] for i in ids])
+                similarity = vectors @ self._normalize(embedding)
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.similarity_threshold:
+                    self._lru.move_to_end(ids[best])
+                    self._stats['hits'] += 1
+                    return group[ids[best]]['response']
+
+        self._stats['misses'] += 1
+        return None
+
+    def store(self, embedding, document_ids: Iterable[str], fingerprint: str, response: Dict,
+              documents: List[Dict], kind: str = 'chat'):
+        key = self._key(kind, document_ids, fingerprint)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._groups.setdefault(key, OrderedDict())[entry_id] = {
+            'embedding': self._normalize(embedding),
+            'response': response,
+            'symbols': {d.get('symbol') for d in documents if d.get('symbol')},
+            'expires_at': time.monotonic() + self.ttl_for(documents)
+        }
+        self._lru[entry_id] = key
+        self._stats['stores'] += 1
+
+        while len(self._lru) > self.max_entries:
+            oldest = next(iter(self._lru))
+            self._remove(oldest)
+            self._stats['evicted'] += 1
+
+    def invalidate_symbols(self, symbols: Iterable[str]):
+        """Vector store upsert hook: drop answers built on documents for these symbols."""
+        symbols = set(symbols)
+        if not symbols:
+            return
+        stale = [
+            entry_id for entry_id, key in self._lru.items()
+            if self._groups[key][entry_id]['symbols'] & symbols
+        ]
+        for entry_id in stale:
+            self._remove(entry_id)
+        self._stats['invalidated'] += len(stale)
+
+    def clear(self):
+        self._groups.clear()
+        self._lru.clear()
+
+    def _remove(self, entry_id: int):
+        key = self._lru.pop(entry_id, None)
+        if key is None:
+            return
+        group = self._groups[key]
+        group.pop(entry_id, None)
+        if not group:
+            del self._groups[key]
+
+    def stats(self) -> Dict:
+        return {**self._stats, 'entries': len(self._lru), 'similarity_threshold': self.similarity_threshold}
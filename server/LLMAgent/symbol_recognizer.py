@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import csv
+import os
+
+# Ticker/company universe shipped with the agent: symbol,name,aliases ("|"-separated)
+DEFAULT_UNIVERSE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'symbol_universe.csv')
+
+# Tickers and names that are also everyday words. Such tickers only count
+# as a cashtag ($NOW) and such names only when capitalized (Target).
+COMMON_WORDS = frozenset({
+    'a', 'all', 'are', 'arm', 'block', 'c', 'cat', 'coin', 'cost', 'de', 'dis', 'f', 'gild', 'hon',
+    'hood', 'it', 'low', 'lucid', 'ma', 'now', 'on', 'oracle', 'pep', 'shell', 'shop', 'snow',
+    'so', 'spot', 'spy', 'square', 't', 'target', 'ups', 'v', 'visa'
+})
+
+_TICKER, _NAME = 0, 1
+
+
+def load_universe(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """{symbol: [company name, aliases...]} from a universe CSV (DEFAULT_UNIVERSE if None)"""
+    universe = {}
+    with open(path or DEFAULT_UNIVERSE, newline='') as f:
+        for row in csv.DictReader(f):
+            symbol = row['symbol'].strip().upper()
+            names = [row.get('name') or ''] + (row.get('aliases') or '').split('|')
+            universe[symbol] = [n.strip() for n in names if n.strip()]
+    return universe
+
+
+class SymbolRecognizer:
+    """
+    Finds the stock symbols a message refers to, by ticker or company name.
+
+    Tickers and names of the universe are compiled into one Aho–Corasick
+    automaton over lowercased text, so a message is scanned in a single
+    pass whatever the universe size. Matches must sit on word boundaries;
+    overlapping matches resolve to the leftmost longest ("Bank of America"
+    rather than "America"). Tickers match as cashtags ($AAPL), in capitals
+    (AAPL), or in any case from three letters up (aapl); tickers that are
+    also words need the cashtag. Symbols outside the universe are never
+    returned, so retrieval only fans out to real symbols.
+    """
+
+    def __init__(self, universe: Dict[str, Iterable[str]]):
+        self.universe = {symbol.upper(): list(names) for symbol, names in universe.items()}
+        self._build()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SymbolRecognizer":
+        return cls(load_universe(path))
+
+    def add_symbols(self, symbols: Iterable[str]):
+        """Recognize additional tickers (e.g. vector store upsert hook); rebuilds only when new"""
+        new = {s.upper() for s in symbols if s} - set(self.universe)
+        if new:
+            for symbol in new:
+                self.universe[symbol] = []
+            self._build()
+
+    def _build(self):
+        # Trie over lowercased patterns: goto transitions and matches per state
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, str, int]]] = [[]]  # (length, symbol, kind)
+        for symbol, names in self.universe.items():
+            patterns = [(symbol, _TICKER)] + [(name, _NAME) for name in names]
+            for pattern, kind in patterns:
+                state = 0
+                for ch in pattern.lower():
+                    if ch not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][ch] = len(goto) - 1
+                    state = goto[state][ch]
+                outputs[state].append((len(pattern), symbol, kind))
+
+        # Failure links breadth-first; each state inherits its fallback's matches
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, child in goto[state].items():
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(ch, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+
+        self._goto, self._fail, self._outputs = goto, fail, outputs
+
+    def _accept(self, text: str, start: int, end: int, symbol: str, kind: int) -> bool:
+        span = text[start:end]
+        if kind == _NAME:
+            return span.lower() not in COMMON_WORDS or span[0].isupper()
+        if start > 0 and text[start - 1] == '$':
+            return True
+        if symbol.lower() in COMMON_WORDS:
+            return False
+        return span.isupper() or len(symbol) >= 3
+
+    def extract(self, text: str) -> List[str]:
+        """Symbols mentioned in `text`, in order of first mention"""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Keep offsets aligned when lowercasing changes a character's length
+            lowered = ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        candidates = []
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, symbol, kind in outputs[state]:
+                start, end = i + 1 - length, i + 1
+                if start > 0 and lowered[start - 1].isalnum():
+                    continue
+                if end < len(text) and lowered[end].isalnum():
+                    continue
+                if self._accept(text, start, end, symbol, kind):
+                    candidates.append((start, -length, symbol))
+
+        symbols = []
+        covered = 0
+        for start, negative_length, symbol in sorted(candidates):
+            if start < covered:
+                continue
+            covered = start - negative_length
+            if symbol not in symbols:
+                symbols.append(symbol)
+        return symbols
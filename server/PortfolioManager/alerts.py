@@ -0,0 +1,156 @@
+from typing import Dict, Iterable, List, Optional, Set
+import asyncio
+import time
+from PortfolioManager.subscriptions import Close, Send, SubscriptionHub
+
+
+class AlertEngine:
+    """
+    Event-driven portfolio alerts for websocket clients.
+
+    Vector store upserts and new price bars mark symbols dirty. After a short
+    debounce, only dirty symbols that some client holds are re-scored (once,
+    however many clients hold them), and the SubscriptionHub delivers the
+    changed analyses to the clients holding those symbols.
+    """
+
+    def __init__(self, portfolio_manager, vector_store=None, price_store=None,
+                 debounce: float = 1.0, price_poll_interval: Optional[float] = 60.0,
+                 hub: Optional[SubscriptionHub] = None):
+        self.portfolio_manager = portfolio_manager
+        self.price_store = price_store
+        self.debounce = debounce
+        self.price_poll_interval = price_poll_interval
+        self.hub = hub or SubscriptionHub()
+
+        self._dirty: Set[str] = set()
+        self._dirty_event: Optional[asyncio.Event] = None
+        self._last: Dict[str, Dict] = {}  # symbol -> last pushed summary
+        self._tasks: List[asyncio.Task] = []
+        self._stats = {'events': 0, 'rescored': 0}
+
+        if vector_store is not None:
+            vector_store.add_upsert_listener(self.mark_dirty)
+        if price_store is not None:
+            price_store.add_listener(self.mark_dirty)
+
+    def subscribed_symbols(self) -> Set[str]:
+        return self.hub.symbols()
+
+    def subscribe(self, client_id: str, symbols: Iterable[str], send: Send, close: Optional[Close] = None):
+        """Register (or replace) a client's symbols, push callback and disconnect callback."""
+        self.hub.subscribe(client_id, symbols, send, close)
+        self._start()
+
+    def unsubscribe(self, client_id: str):
+        self.hub.unsubscribe(client_id)
+        held = self.hub.symbols()
+        self._last = {s: v for s, v in self._last.items() if s in held}
+        if not len(self.hub):
+            self._stop()
+
+    def mark_dirty(self, symbols: Iterable[str]):
+        """
+        Event hook for upsert/price listeners. Cached analyses are dropped for
+        every symbol; only symbols someone holds are queued for re-scoring.
+        """
+        symbols = set(symbols)
+        if not symbols:
+            return
+        self._stats['events'] += 1
+        for symbol in symbols:
+            self.portfolio_manager.analysis_cache.invalidate(symbol)
+
+        held = symbols & self.subscribed_symbols()
+        if held:
+            self._dirty |= held
+            if self._dirty_event is not None:
+                self._dirty_event.set()
+
+    async def process(self, symbols: Iterable[str]) -> Dict[str, Dict]:
+        """
+        One cycle: re-score `symbols` once each and publish the changed
+        analyses to the hub. Returns the changed summaries by symbol.
+        """
+        symbols = sorted(set(symbols))
+        if not symbols:
+            return {}
+        analyses, failures = await self.portfolio_manager.analyze_many(symbols)
+        self._stats['rescored'] += len(analyses)
+        for failure in failures:
+            print(f"[alerts][error] re-scoring {failure['symbol']} failed: {failure['error']}")
+
+        changed = {}
+        for analysis in analyses:
+            summary = analysis.summary()
+            previous = self._last.get(analysis.symbol)
+            if previous is None or self._differs(previous, summary):
+                changed[analysis.symbol] = summary
+            self._last[analysis.symbol] = summary
+
+        if changed:
+            self.hub.publish(changed)
+        return changed
+
+    @staticmethod
+    def _differs(previous: Dict, current: Dict) -> bool:
+        return (
+            previous['composite_score'] != current['composite_score'] or
+            previous['recommendation']['action'] != current['recommendation']['action'] or
+            previous['document_ids'] != current['document_ids']
+        )
+
+    async def _run(self):
+        while True:
+            await self._dirty_event.wait()
+            # Let a burst of upserts/bars collapse into one re-scoring pass
+            await asyncio.sleep(self.debounce)
+            self._dirty_event.clear()
+            dirty, self._dirty = self._dirty & self.subscribed_symbols(), set()
+            try:
+                started = time.perf_counter()
+                changed = await self.process(dirty)
+                print(f"[alerts] re-scored {len(dirty)} symbols, {len(changed)} changed in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                print(f"[alerts][error] processing failed: {e}")
+
+    async def _poll_prices(self):
+        # One batched bar request for all held symbols; changes come back via mark_dirty
+        while True:
+            await asyncio.sleep(self.price_poll_interval)
+            try:
+                await self.price_store.refresh(sorted(self.subscribed_symbols()))
+            except Exception as e:
+                print(f"[alerts][error] price refresh failed: {e}")
+
+    def _start(self):
+        if self._tasks:
+            return
+        self._dirty_event = asyncio.Event()
+        if self._dirty:
+            self._dirty_event.set()
+        self._tasks.append(asyncio.create_task(self._run()))
+        if self.price_store is not None and self.price_poll_interval:
+            self._tasks.append(asyncio.create_task(self._poll_prices()))
+
+    def _stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._dirty_event = None
+        self._dirty = set()
+
+    async def aclose(self):
+        """Stop the re-scoring and price polling tasks and the hub's writers (server shutdown)."""
+        tasks = self._tasks
+        self._stop()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.hub.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            'clients': len(self.hub),
+            'symbols': len(self.hub.symbols()),
+            'dirty': len(self._dirty)
+        }
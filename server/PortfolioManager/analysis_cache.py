@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import time
+
+
+class AnalysisCache:
+    """
+    Per-symbol cache of analysis results with a short TTL and single-flight
+    coalescing.
+
+    Concurrent requests for the same key share one in-flight computation, and
+    repeated requests within `ttl_seconds` are served from memory. The
+    computation runs as its own task, so a caller that is cancelled (e.g. by a
+    per-symbol timeout) doesn't cancel it for the others.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for `key`, joining or starting its computation if needed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._stats['hits'] += 1
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._stats['coalesced'] += 1
+        else:
+            self._stats['misses'] += 1
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_done(key, t))
+
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            # Failures are not cached; the next request retries
+            return
+        if self.ttl_seconds > 0:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, task.result())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_warm(self, key: str) -> bool:
+        """Whether a request for `key` now would be served without a new computation."""
+        entry = self._entries.get(key)
+        return (entry is not None and entry[0] > time.monotonic()) or key in self._in_flight
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one cached entry, or all of them when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            'entries': len(self._entries),
+            'in_flight': len(self._in_flight),
+            'ttl_seconds': self.ttl_seconds,
+        }
@@ -0,0 +1,221 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import json
+import numpy as np
+import pandas as pd
+from AnalysisAgent.technical_analysis import calculate_indicator_frames, calculate_technical_scores
+from PortfolioManager.scoring import ScoringConfig
+
+
+@dataclass
+class BacktestData:
+    """
+    Score arrays (dates x symbols) shared by every backtest run over the same
+    history. Only the cheap weighting/threshold step depends on ScoringConfig,
+    so these are computed once and reused across parameter sweeps.
+    """
+    dates: pd.DatetimeIndex
+    symbols: List[str]
+    technical: np.ndarray        # 0-100, NaN during indicator warm-up
+    news: np.ndarray             # 0-100
+    social: np.ndarray           # 0-100
+    forward_returns: np.ndarray  # close-to-close return from each date to the next
+
+
+def sentiment_score_frame(documents: pd.DataFrame, data_type: str, dates: pd.DatetimeIndex,
+                          symbols: List[str], window: int = 2) -> pd.DataFrame:
+    """
+    Daily 0-100 sentiment score per symbol from stored scored documents.
+
+    Mirrors the live path: positive/negative ratios of the documents in a
+    trailing window (default two days, like the 48h lookback) mapped through
+    50 + 50 * (positive_ratio - negative_ratio). Days without documents are
+    neutral (50). A document first counts on the bar after its timestamp:
+    news published during a session can't drive that session's close.
+    """
+    neutral = pd.DataFrame(50.0, index=dates, columns=symbols)
+    if len(documents) == 0 or len(dates) == 0:
+        return neutral
+
+    docs = documents[(documents['data_type'] == data_type) & documents['symbol'].isin(symbols)]
+    timestamps = pd.to_datetime(docs['timestamp'], errors='coerce', utc=True).dt.tz_localize(None)
+    # First bar strictly after publication (bars are dated at midnight)
+    bar = dates.searchsorted(timestamps, side='right')
+    keep = timestamps.notna().to_numpy() & (bar < len(dates))
+    if not keep.any():
+        return neutral
+
+    sentiment = docs['sentiment'].astype(str).str.lower().to_numpy()[keep]
+    frame = pd.DataFrame({
+        'date': dates[bar[keep]],
+        'symbol': docs['symbol'].to_numpy()[keep],
+        'positive': (sentiment == 'positive').astype(float),
+        'negative': (sentiment == 'negative').astype(float),
+        'total': 1.0
+    })
+    counts = frame.groupby(['date', 'symbol']).sum()
+
+    def _rolling(column: str) -> pd.DataFrame:
+        daily = counts[column].unstack('symbol').reindex(index=dates, columns=symbols).fillna(0.0)
+        return daily.rolling(window=window, min_periods=1).sum()
+
+    total = _rolling('total')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        net = (_rolling('positive') - _rolling('negative')) / total
+    return (50 + 50 * net).where(total > 0, 50.0)
+
+
+def prepare_backtest_data(close: pd.DataFrame, volume: pd.DataFrame, documents: pd.DataFrame,
+                          start: Optional[str] = None, end: Optional[str] = None,
+                          sentiment_window: int = 2) -> BacktestData:
+    """
+    Compute technical, news and social score arrays for every date and
+    symbol. Indicators use the full history so `start` doesn't cut into the
+    warm-up period. The ML contribution is neutral (no historical model signal).
+    """
+    close = close.sort_index()
+    volume = volume.reindex_like(close).fillna(0)
+    symbols = list(close.columns)
+
+    frames = calculate_indicator_frames(close, volume)
+    indicators = {key: frame.to_numpy(dtype=float) for key, frame in frames.items()}
+    neutral_ml = {'buy': np.zeros(close.shape, dtype=bool), 'confidence': np.zeros(close.shape)}
+    technical = calculate_technical_scores(indicators, neutral_ml)
+    warming_up = np.isnan(indicators['ma_50']) | np.isnan(indicators['rsi'])
+    technical[warming_up] = np.nan
+
+    forward_returns = close.pct_change().shift(-1).fillna(0.0).to_numpy()
+
+    window = slice(start, end)
+    dates = close.loc[window].index
+    rows = close.index.get_indexer(dates)
+
+    return BacktestData(
+        dates=dates,
+        symbols=symbols,
+        technical=technical[rows],
+        news=sentiment_score_frame(documents, 'news', dates, symbols, sentiment_window).to_numpy(),
+        social=sentiment_score_frame(documents, 'social_media', dates, symbols, sentiment_window).to_numpy(),
+        forward_returns=forward_returns[rows]
+    )
+
+
+def composite_scores(technical: np.ndarray, news: np.ndarray, social: np.ndarray,
+                     config: ScoringConfig) -> np.ndarray:
+    """Array form of PortfolioManager._calculate_composite_score."""
+    return np.round(
+        config.news_weight * news +
+        config.social_weight * social +
+        config.technical_weight * technical,
+        2
+    )
+
+
+def recommendation_actions(composite: np.ndarray, config: ScoringConfig) -> np.ndarray:
+    """Array form of the action part of PortfolioManager._generate_recommendation."""
+    return np.select(
+        [composite >= config.buy_threshold, composite >= config.sell_threshold, composite < config.sell_threshold],
+        ['BUY', 'HOLD', 'SELL'],
+        default=''  # no score yet (indicator warm-up)
+    )
+
+
+def simulate(technical: np.ndarray, news: np.ndarray, social: np.ndarray,
+             forward_returns: np.ndarray, config: ScoringConfig,
+             trading_days: int = 252) -> Dict:
+    """
+    Simulate positions driven by the composite score.
+
+    A symbol is entered when its composite score reaches
+    `config.entry_threshold` and exited on a SELL (score below
+    `config.sell_threshold`); otherwise the previous position is held. Held
+    symbols are equally weighted each day, with cash when nothing is held.
+    """
+    composite = composite_scores(technical, news, social, config)
+
+    signal = np.full(composite.shape, np.nan)
+    signal[composite < config.sell_threshold] = 0.0
+    signal[composite >= config.entry_threshold] = 1.0
+
+    # Forward-fill the last entry/exit signal down each column
+    rows = np.arange(len(signal))[:, None]
+    last = np.where(np.isnan(signal), 0, rows)
+    np.maximum.accumulate(last, axis=0, out=last)
+    position = np.nan_to_num(signal[last, np.arange(signal.shape[1])])
+
+    held = position.sum(axis=1)
+    daily_returns = np.where(held > 0, (position * forward_returns).sum(axis=1) / np.maximum(held, 1), 0.0)
+
+    equity = np.cumprod(1 + daily_returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if len(equity) else np.zeros(0)
+    volatility = daily_returns.std(ddof=1) * np.sqrt(trading_days) if len(daily_returns) > 1 else 0.0
+    annual_return = equity[-1] ** (trading_days / len(equity)) - 1 if len(equity) else 0.0
+
+    actions = recommendation_actions(composite, config)
+    entries = np.diff(position, axis=0, prepend=0) > 0
+
+    return {
+        'total_return': float(equity[-1] - 1) if len(equity) else 0.0,
+        'annualized_return': float(annual_return),
+        'annualized_volatility': float(volatility),
+        'sharpe': float(annual_return / volatility) if volatility > 0 else 0.0,
+        'max_drawdown': float(drawdown.min()) if len(drawdown) else 0.0,
+        'trades': int(entries.sum()),
+        'exposure': float((held > 0).mean()) if len(held) else 0.0,
+        'action_counts': {a: int((actions == a).sum()) for a in ('BUY', 'HOLD', 'SELL')},
+        '_daily_returns': daily_returns,
+        '_positions': position
+    }
+
+
+class BacktestEngine:
+    """
+    Replays stored price bars and scored documents over a date range for a
+    whole universe, scoring every day with array operations and simulating
+    BUY/HOLD/SELL positions.
+
+    Score arrays are prepared once; each `run` only re-weights them, so
+    sweeping ScoringConfig settings over years of data is cheap.
+    """
+
+    def __init__(self, close: pd.DataFrame, volume: pd.DataFrame, documents: List[Dict] | pd.DataFrame,
+                 start: Optional[str] = None, end: Optional[str] = None, sentiment_window: int = 2):
+        documents = pd.DataFrame(documents)
+        if len(documents) == 0:
+            documents = pd.DataFrame(columns=['symbol', 'data_type', 'timestamp', 'sentiment'])
+        self.data = prepare_backtest_data(close, volume, documents, start, end, sentiment_window)
+
+    @classmethod
+    def from_files(cls, prices_path: str, documents_path: Optional[str] = None, **kwargs) -> "BacktestEngine":
+        """
+        Load stored bars from a CSV with date, symbol, close and volume
+        columns, and scored documents from a JSON-lines file of vector store
+        metadata records.
+        """
+        bars = pd.read_csv(prices_path, parse_dates=['date'])
+        close = bars.pivot(index='date', columns='symbol', values='close')
+        volume = bars.pivot(index='date', columns='symbol', values='volume')
+
+        documents = []
+        if documents_path:
+            with open(documents_path) as f:
+                documents = [json.loads(line) for line in f if line.strip()]
+
+        return cls(close, volume, documents, **kwargs)
+
+    def run(self, config: Optional[ScoringConfig] = None, include_series: bool = False) -> Dict:
+        """Backtest one ScoringConfig over the prepared history."""
+        config = config or ScoringConfig()
+        d = self.data
+        result = simulate(d.technical, d.news, d.social, d.forward_returns, config)
+
+        daily_returns = result.pop('_daily_returns')
+        positions = result.pop('_positions')
+        result['start'] = str(d.dates[0].date()) if len(d.dates) else None
+        result['end'] = str(d.dates[-1].date()) if len(d.dates) else None
+        result['symbols'] = len(d.symbols)
+
+        if include_series:
+            result['daily_returns'] = pd.Series(daily_returns, index=d.dates)
+            result['positions'] = pd.DataFrame(positions, index=d.dates, columns=d.symbols)
+        return result
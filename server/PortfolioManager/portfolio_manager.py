@@ -1,38 +1,85 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from ResearchAgent.rag.vector_store import VectorStoreManager 
 from ResearchAgent.agents.sentiment_agent import SentimentAnalysisAgent
 from AnalysisAgent.technical_analysis import TechnicalAnalyzer
+from AnalysisAgent.executor import AnalysisExecutor
+from PortfolioManager.analysis_cache import AnalysisCache
+from PortfolioManager.scoring import ScoringConfig
+from PortfolioManager.risk_analytics import PortfolioRiskAnalyzer
+from PortfolioManager.records import StockAnalysis, Recommendation, SentimentSummary, TechnicalSummary
 class PortfolioManager:
     """
     Manages portfolio data and provides methods to analyze and update the portfolio.
     """
 
     
-    def __init__(self, vector_store: VectorStoreManager, sentiment_agent: SentimentAnalysisAgent):
+    def __init__(self, vector_store: VectorStoreManager, sentiment_agent: SentimentAnalysisAgent,
+                 executor: Optional[AnalysisExecutor] = None,
+                 max_concurrency: int = 8, symbol_timeout: float = 30.0,
+                 analysis_ttl: float = 30.0,
+                 screening_technical_cutoff: float = 20.0, screening_top_n: int = 10,
+                 scoring: Optional[ScoringConfig] = None):
         self.vector_store = vector_store
         self.sentiment_agent = sentiment_agent
-        self.technical_analyzer = TechnicalAnalyzer()  # Initialize TechnicalAnalyzer
+        # Composite score weights and recommendation bands
+        self.scoring = scoring or ScoringConfig()
+        # Default stage cut-offs for screen_candidates
+        self.screening_technical_cutoff = screening_technical_cutoff
+        self.screening_top_n = screening_top_n
+        # Shares per-symbol results across endpoints, websocket clients and chat
+        self.analysis_cache = AnalysisCache(ttl_seconds=analysis_ttl)
+        # Fan-out limits for analyze_many (max_concurrency=1 analyzes sequentially)
+        self.max_concurrency = max_concurrency
+        self.symbol_timeout = symbol_timeout
+        # Blocking lookups and model inference run here instead of on the event loop;
+        # an executor created here (none passed in) is shut down by close()
+        self._owns_executor = executor is None
+        self.executor = executor or AnalysisExecutor()
+        self.technical_analyzer = TechnicalAnalyzer(executor=self.executor)  # Initialize TechnicalAnalyzer
+        # Portfolio-level risk metrics share the technical analyzer's price data
+        self.risk_analyzer = PortfolioRiskAnalyzer(self.technical_analyzer.price_store, executor=self.executor)
+
+    def close(self):
+        """Shut down the executor if this manager created it."""
+        self.technical_analyzer.close()
+        if self._owns_executor:
+            self.executor.shutdown()
+
     async def analyze_stock_for_entry(self, symbol: str) -> Dict:
         """
         comprehensive analysis of a stock for potential entry points
+
+        Returns the detail projection of `analyze_stock`.
         """
-        # Retrieve recent documents from vector store
-        recent_news = self.vector_store.get_recent_documents(
-            symbol=symbol,
-            hours=48,
-            data_types=['news', 'social_media']
-        )
+        analysis = await self.analyze_stock(symbol)
+        return analysis.detail()
 
-        news_texts = []
- 
-        news_texts = [doc['content'] for doc in recent_news if doc['data_type'] == 'news']
-        social_texts = [doc['content'] for doc in recent_news if doc['data_type'] == 'social_media']
+    async def analyze_stock(self, symbol: str,
+                            sentiment: Optional[Tuple[List[Dict], Dict, Dict]] = None) -> StockAnalysis:
+        """
+        Analyze a stock and return a compact StockAnalysis record.
 
-        news_sentiment = self.sentiment_agent.aggregate_sentiment(news_texts, source='financial')
-        social_sentiment = self.sentiment_agent.aggregate_sentiment(social_texts, source='social')
+        Results are cached for `analysis_ttl` seconds and concurrent requests
+        for the same symbol share one computation. `sentiment` is an
+        `_analyze_sentiment` result the caller already has, reused instead
+        of fetching and scoring the documents again.
+        """
+        return await self.analysis_cache.get_or_compute(
+            symbol,
+            lambda: self._analyze_stock(symbol, sentiment)
+        )
+
+    async def _analyze_stock(self, symbol: str,
+                             sentiment: Optional[Tuple[List[Dict], Dict, Dict]] = None) -> StockAnalysis:
+        """
+        Uncached analysis behind analyze_stock.
+        """
+        recent_news, news_sentiment, social_sentiment = sentiment or await self._analyze_sentiment(symbol)
 
         # If a technical analyzer is available, try to use it. Otherwise fall back
         # to a neutral/default technical_signals value.
@@ -52,36 +99,62 @@ class PortfolioManager:
 
         recommendation = self._generate_recommendation(composite_score)
 
-        return {
-            'symbol': symbol,
-            'composite_score': composite_score,
-            'recommendation': recommendation,
-            'sentiment_analysis': {
-                'news': news_sentiment,
-                'social': social_sentiment
-            },
-            'technical_analysis': technical_signals,
-            'supporting_documents': recent_news[:5],
-            'analyzed_at': datetime.now().isoformat()
-        }
+        news_count = sum(1 for doc in recent_news if doc['data_type'] == 'news')
+        return StockAnalysis(
+            symbol=symbol,
+            composite_score=composite_score,
+            recommendation=Recommendation(**recommendation),
+            news=SentimentSummary.from_aggregate(
+                news_sentiment, self._sentiment_to_score(news_sentiment), news_count
+            ),
+            social=SentimentSummary.from_aggregate(
+                social_sentiment, self._sentiment_to_score(social_sentiment), len(recent_news) - news_count
+            ),
+            technical=TechnicalSummary.from_signals(technical_signals),
+            document_ids=tuple(doc['id'] for doc in recent_news if 'id' in doc),
+            analyzed_at=datetime.now().isoformat(),
+            supporting_documents=recent_news[:5]
+        )
+
+    async def _analyze_sentiment(self, symbol: str) -> Tuple[List[Dict], Dict, Dict]:
+        """
+        Fetch the last 48h of news/social documents for a symbol and aggregate
+        their sentiment. Returns (documents, news_sentiment, social_sentiment).
+        """
+        # Retrieve recent documents from vector store
+        recent_news = await self.executor.run_io(
+            self.vector_store.get_recent_documents,
+            symbol=symbol,
+            hours=48,
+            data_types=['news', 'social_media']
+        )
+
+        news_texts = [doc['content'] for doc in recent_news if doc['data_type'] == 'news']
+        social_texts = [doc['content'] for doc in recent_news if doc['data_type'] == 'social_media']
+
+        # Sentiment models live in this process, so inference uses the thread pool
+        news_sentiment, social_sentiment = await asyncio.gather(
+            self.executor.run_io(self.sentiment_agent.aggregate_sentiment, news_texts, source='financial'),
+            self.executor.run_io(self.sentiment_agent.aggregate_sentiment, social_texts, source='social')
+        )
+        return recent_news, news_sentiment, social_sentiment
 
     def _calculate_composite_score(self, news_sentiment: Dict,
                                    social_sentiment: Dict,
                                    technical_signals: Dict) -> float:
         """
         Calculate a composite score based on sentiment and technical analysis.
-        Weights: News 40% Social 20% Technical 40%
+        Weights come from `self.scoring` (default: News 40% Social 20% Technical 40%)
         """
         news_score = self._sentiment_to_score(news_sentiment)
         social_score = self._sentiment_to_score(social_sentiment)
 
         technical_score = technical_signals.get('composite_score', 0)
 
-        # Compute numeric composite score (weights: news 40%, social 20%, technical 40%)
         composite = (
-            0.4 * news_score +
-            0.2 * social_score +
-            0.4 * technical_score
+            self.scoring.news_weight * news_score +
+            self.scoring.social_weight * social_score +
+            self.scoring.technical_weight * technical_score
         )
 
         return round(composite, 2)
@@ -101,21 +174,22 @@ class PortfolioManager:
         """
         Generate buy/hold/sell recommendation based on composite score.
         """
-        if composite_score >= 70:
+        bands = self.scoring
+        if composite_score >= bands.strong_buy_threshold:
             action = 'BUY'
             confidence = 'HIGH'
-        elif composite_score >= 60:
+        elif composite_score >= bands.buy_threshold:
             action = 'BUY'
             confidence = 'MEDIUM'
-        elif composite_score >= 50:
+        elif composite_score >= bands.hold_threshold:
             action = 'HOLD'
             confidence = 'MEDIUM'
-        elif composite_score >= 40:
+        elif composite_score >= bands.sell_threshold:
             action = 'HOLD'
             confidence = 'LOW'
         else:
             action = 'SELL'
-            confidence = 'MEDIUM' if composite_score < 30 else 'LOW'
+            confidence = 'MEDIUM' if composite_score < bands.strong_sell_threshold else 'LOW'
 
         return {
             'action': action,
@@ -123,47 +197,193 @@ class PortfolioManager:
             'score': composite_score
         }
     
-    async def monitor_existing_positions(self, portfolio: List[Dict]) -> List[Dict]:
+    async def analyze_many(self, symbols: List[str],
+                           max_concurrency: Optional[int] = None,
+                           timeout: Optional[float] = None) -> Tuple[List[StockAnalysis], List[Dict]]:
+        """
+        Analyze several symbols concurrently, returning StockAnalysis records.
+
+        At most `max_concurrency` analyses run at once and each one is given
+        `timeout` seconds once it starts. A symbol that fails or times out is
+        reported in the second list instead of aborting the batch.
+
+        Returns (analyses, failures), both in input order.
+        """
+        results, failures = await self._run_bounded(
+            symbols, self.analyze_stock, max_concurrency, timeout
+        )
+        return [result for _, result in results], failures
+
+    async def _run_bounded(self, symbols: List[str], analyze,
+                           max_concurrency: Optional[int] = None,
+                           timeout: Optional[float] = None) -> Tuple[List[Tuple[str, object]], List[Dict]]:
+        """
+        Run `analyze(symbol)` for each symbol under a semaphore and per-symbol
+        timeout. Returns ([(symbol, result)], failures) in input order.
+        """
+        max_concurrency = max_concurrency or self.max_concurrency
+        timeout = timeout or self.symbol_timeout
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _analyze(symbol: str):
+            async with semaphore:
+                return await asyncio.wait_for(analyze(symbol), timeout)
+
+        gathered = await asyncio.gather(
+            *[_analyze(symbol) for symbol in symbols],
+            return_exceptions=True
+        )
+
+        results = []
+        failures = []
+        for symbol, result in zip(symbols, gathered):
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"[portfolio_manager] analysis timed out for {symbol} after {timeout}s")
+                failures.append({'symbol': symbol, 'error': f'timed out after {timeout}s'})
+            elif isinstance(result, Exception):
+                print(f"[portfolio_manager] analysis failed for {symbol}: {result}")
+                failures.append({'symbol': symbol, 'error': str(result)})
+            else:
+                results.append((symbol, result))
+
+        return results, failures
+
+    async def screen_candidates(self, symbols: List[str], min_score: Optional[float] = None,
+                                technical_cutoff: Optional[float] = None,
+                                sentiment_cutoff: Optional[float] = None,
+                                top_n: Optional[int] = None) -> Dict:
+        """
+        Staged screening pipeline.
+
+        1. technical_prefilter: vectorized technical scores for the whole
+           universe from one batched price download; keep scores >= technical_cutoff.
+        2. sentiment: document fetch + sentiment for survivors only, combined
+           with the technical pre-score into an estimated composite; keep
+           estimates >= sentiment_cutoff (defaults to min_score - 5).
+        3. full_analysis: analyze_stock for the best `top_n` estimates, reusing
+           their stage-2 sentiment; keep composite scores >= min_score
+           (defaults to scoring.entry_threshold).
+
+        Returns the recommendations (summary projections) plus per-stage
+        counts and timings.
+        """
+        min_score = self.scoring.entry_threshold if min_score is None else min_score
+        technical_cutoff = self.screening_technical_cutoff if technical_cutoff is None else technical_cutoff
+        sentiment_cutoff = min_score - 5 if sentiment_cutoff is None else sentiment_cutoff
+        top_n = top_n or self.screening_top_n
+        stages = []
+
+        started = time.perf_counter()
+        technical_scores = await self.technical_analyzer.analyze_universe(symbols)
+        survivors = [s for s in symbols if technical_scores.get(s, -1) >= technical_cutoff]
+        stages.append(self._stage_report('technical_prefilter', len(symbols), len(survivors), started))
+
+        started = time.perf_counter()
+        sentiments = {}
+
+        async def _estimate(symbol: str) -> float:
+            sentiments[symbol] = await self._analyze_sentiment(symbol)
+            _, news_sentiment, social_sentiment = sentiments[symbol]
+            return self._calculate_composite_score(
+                news_sentiment,
+                social_sentiment,
+                {'composite_score': float(technical_scores[symbol])}
+            )
+
+        estimates, failures = await self._run_bounded(survivors, _estimate)
+        shortlisted = sorted(
+            [(symbol, estimate) for symbol, estimate in estimates if estimate >= sentiment_cutoff],
+            key=lambda x: x[1],
+            reverse=True
+        )[:top_n]
+        stages.append(self._stage_report('sentiment', len(survivors), len(shortlisted), started))
+
+        started = time.perf_counter()
+        analyzed, analysis_failures = await self._run_bounded(
+            [symbol for symbol, _ in shortlisted],
+            lambda symbol: self.analyze_stock(symbol, sentiment=sentiments[symbol])
+        )
+        recommendations = [a.summary() for _, a in analyzed if a.composite_score >= min_score]
+        recommendations.sort(key=lambda x: x['composite_score'], reverse=True)
+        stages.append(self._stage_report('full_analysis', len(shortlisted), len(recommendations), started))
+
+        return {
+            'recommendations': recommendations,
+            'stages': stages,
+            'failed_symbols': failures + analysis_failures
+        }
+
+    @staticmethod
+    def _stage_report(name: str, candidates_in: int, candidates_out: int, started: float) -> Dict:
+        return {
+            'stage': name,
+            'candidates_in': candidates_in,
+            'candidates_out': candidates_out,
+            'seconds': round(time.perf_counter() - started, 4)
+        }
+
+    async def monitor_existing_positions(self, portfolio: List[Dict], include_details: bool = False) -> List[Dict]:
         """
         Monitor existing positions and provide updated analysis.
+
+        Analyses are returned as summary projections unless `include_details`
+        is set, in which case the full detail projection is used.
         """
-        analyses = []
+        analyses, failures = await self.analyze_many(portfolio)
+        project = (lambda a: a.detail()) if include_details else (lambda a: a.summary())
 
-        for symbol in portfolio:
-            analysis = await self.analyze_stock_for_entry(symbol)
-            analyses.append(analysis)
+        risk_analytics = None
+        if self.risk_analyzer is not None and portfolio:
+            try:
+                risk_analytics = await asyncio.wait_for(
+                    self.risk_analyzer.analyze(list(portfolio)),
+                    self.symbol_timeout
+                )
+            except Exception as e:
+                # Risk metrics are supplementary; report the failure and carry on
+                print(f"[portfolio_manager] risk analytics failed: {e!r}")
+                risk_analytics = {'error': str(e) or type(e).__name__}
 
         exit_candidates = [
-            a for a in analyses
-            if a['recommendation']['action'] == 'SELL'
+            project(a) for a in analyses
+            if a.recommendation.action == 'SELL'
         ]
 
         buy_candidates = [
-            a for a in analyses
-            if a['recommendation']['action'] == 'BUY' and
-                a['recommendation']['confidence'] == 'HIGH'
+            project(a) for a in analyses
+            if a.recommendation.action == 'BUY' and
+                a.recommendation.confidence == 'HIGH'
         ]
 
         return {
             'portfolio_health': self._calculate_portfolio_health(analyses),
             'exit_recommendations': exit_candidates,
             'add_recommendations': buy_candidates,
-            'detailed_analyses': analyses,
+            'detailed_analyses': [project(a) for a in analyses],
+            'risk_analytics': risk_analytics,
+            'failed_symbols': failures,
             'timestamp': datetime.now().isoformat()
         }
     
-    def _calculate_portfolio_health(self, analyses: List[Dict]) -> str:
+    def _calculate_portfolio_health(self, analyses: List[StockAnalysis]) -> str:
         """
         Calculate overall portfolio health based on individual analyses.
         """
-        avg_score = np.mean([a['composite_score'] for a in analyses])
+        if not analyses:
+            return {
+                'average_composite_score': None,
+                'health_rating': 'UNKNOWN',
+                'position_breakdown': {'buy': 0, 'hold': 0, 'sell': 0}
+            }
+
+        avg_score = np.mean([a.composite_score for a in analyses])
         
-        buy_count = sum(1 for a in analyses if a['recommendation']['action'] == 'BUY')
-        sell_count = sum(1 for a in analyses if a['recommendation']['action'] == 'SELL')
-        hold_count = sum(1 for a in analyses if a['recommendation']['action'] == 'HOLD')
+        buy_count = sum(1 for a in analyses if a.recommendation.action == 'BUY')
+        sell_count = sum(1 for a in analyses if a.recommendation.action == 'SELL')
+        hold_count = sum(1 for a in analyses if a.recommendation.action == 'HOLD')
 
         return {
-            'average_composite_score': round(avg_score, 2),
+            'average_composite_score': round(float(avg_score), 2),
             'health_rating': 'GOOD' if avg_score >= 60 else 'FAIR' if avg_score >= 50 else 'POOR',
             'position_breakdown': {
                 'buy': buy_count,
@@ -0,0 +1,109 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class Recommendation:
+    """BUY/HOLD/SELL action derived from a composite score."""
+    action: str
+    confidence: str
+    score: float
+
+    def to_dict(self) -> Dict:
+        return {'action': self.action, 'confidence': self.confidence, 'score': self.score}
+
+
+@dataclass(slots=True)
+class SentimentSummary:
+    """
+    Aggregated sentiment for one source type. Per-text sentiments are not
+    kept; only the aggregate and how many texts went into it.
+    """
+    overall_sentiment: str
+    confidence: float
+    score: float  # 0-100, see PortfolioManager._sentiment_to_score
+    document_count: int
+    aggregate: Dict = field(repr=False)
+
+    @classmethod
+    def from_aggregate(cls, aggregate: Dict, score: float, document_count: int) -> "SentimentSummary":
+        compact = {k: v for k, v in aggregate.items() if k != 'individual_sentiments'}
+        return cls(
+            overall_sentiment=compact.get('overall_sentiment', 'neutral'),
+            confidence=float(compact.get('overall_confidence', 0.0)),
+            score=round(float(score), 2),
+            document_count=document_count,
+            aggregate=compact
+        )
+
+
+@dataclass(slots=True)
+class TechnicalSummary:
+    composite_score: float
+    ml_signal: Optional[Dict] = None
+    indicators: Optional[Dict] = None
+
+    @classmethod
+    def from_signals(cls, signals: Dict) -> "TechnicalSummary":
+        return cls(
+            composite_score=float(signals.get('composite_score', 0)),
+            ml_signal=signals.get('ml_signal'),
+            indicators=signals.get('indicators')
+        )
+
+    def to_dict(self) -> Dict:
+        result = {'composite_score': self.composite_score}
+        if self.ml_signal is not None:
+            result['ml_signal'] = self.ml_signal
+        if self.indicators is not None:
+            result['indicators'] = self.indicators
+        return result
+
+
+@dataclass(slots=True)
+class StockAnalysis:
+    """
+    Result of PortfolioManager.analyze_stock.
+
+    `summary()` is the compact projection used for portfolio responses and
+    websocket pushes; `detail()` keeps the shape returned by
+    analyze_stock_for_entry (sentiment aggregates, technicals and supporting
+    documents).
+    """
+    symbol: str
+    composite_score: float
+    recommendation: Recommendation
+    news: SentimentSummary
+    social: SentimentSummary
+    technical: TechnicalSummary
+    document_ids: Tuple[str, ...]
+    analyzed_at: str
+    supporting_documents: List[Dict] = field(default_factory=list, repr=False)
+
+    def summary(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'composite_score': self.composite_score,
+            'recommendation': self.recommendation.to_dict(),
+            'sentiment_scores': {
+                'news': self.news.score,
+                'social': self.social.score
+            },
+            'technical_score': self.technical.composite_score,
+            'document_ids': list(self.document_ids),
+            'analyzed_at': self.analyzed_at
+        }
+
+    def detail(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'composite_score': self.composite_score,
+            'recommendation': self.recommendation.to_dict(),
+            'sentiment_analysis': {
+                'news': {**self.news.aggregate, 'document_count': self.news.document_count},
+                'social': {**self.social.aggregate, 'document_count': self.social.document_count}
+            },
+            'technical_analysis': self.technical.to_dict(),
+            'supporting_documents': self.supporting_documents,
+            'analyzed_at': self.analyzed_at
+        }
@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+import numpy as np
+import pandas as pd
+from AnalysisAgent.executor import AnalysisExecutor
+from AnalysisAgent.price_data import PriceDataStore
+
+
+def compute_risk_metrics(close: pd.DataFrame, symbols: List[str], benchmark: Optional[str] = None,
+                         weights: Optional[np.ndarray] = None, trading_days: int = 252,
+                         correlation_threshold: float = 0.7) -> Dict:
+    """
+    Covariance-based risk metrics for a set of positions.
+
+    All pairwise quantities come from matrix operations on the daily returns
+    matrix, so cost grows with NumPy matmuls rather than Python loops over
+    pairs. Volatilities and covariances are annualized with `trading_days`.
+    """
+    keep = [i for i, s in enumerate(symbols) if s in close.columns]
+    symbols = [symbols[i] for i in keep]
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)[keep]
+    if len(symbols) == 0:
+        return {'symbols': [], 'positions': {}, 'correlation_clusters': []}
+
+    columns = symbols + ([benchmark] if benchmark in close.columns and benchmark not in symbols else [])
+    returns = close[columns].pct_change().iloc[1:].dropna()
+    if len(returns) < 2:
+        return {'symbols': symbols, 'positions': {}, 'correlation_clusters': [],
+                'error': 'not enough price history'}
+
+    R = returns[symbols].to_numpy()
+    centered = R - R.mean(axis=0)
+    cov = centered.T @ centered / (len(R) - 1) * trading_days
+    volatility = np.sqrt(np.diag(cov))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(volatility, volatility)
+    corr = np.nan_to_num(corr)
+
+    beta = np.full(len(symbols), np.nan)
+    if benchmark in returns.columns:
+        b = returns[benchmark].to_numpy()
+        b_centered = b - b.mean()
+        b_var = b_centered @ b_centered
+        if b_var > 0:
+            beta = centered.T @ b_centered / b_var
+
+    if weights is None:
+        w = np.full(len(symbols), 1.0 / len(symbols))
+    else:
+        w = weights / weights.sum()
+
+    portfolio_volatility = float(np.sqrt(w @ cov @ w))
+    if portfolio_volatility > 0:
+        marginal_risk = cov @ w / portfolio_volatility
+    else:
+        marginal_risk = np.zeros(len(symbols))
+    risk_contribution = w * marginal_risk
+    risk_contribution_pct = risk_contribution / portfolio_volatility if portfolio_volatility > 0 else risk_contribution
+
+    upper = corr[np.triu_indices(len(symbols), k=1)]
+
+    return {
+        'symbols': symbols,
+        'portfolio_volatility': round(portfolio_volatility, 6),
+        'portfolio_beta': None if np.isnan(beta).any() else round(float(w @ beta), 6),
+        'average_correlation': round(float(upper.mean()), 6) if len(upper) else None,
+        'correlation_clusters': correlation_clusters(corr, symbols, correlation_threshold),
+        'positions': {
+            symbol: {
+                'weight': round(float(w[i]), 6),
+                'volatility': round(float(volatility[i]), 6),
+                'beta': None if np.isnan(beta[i]) else round(float(beta[i]), 6),
+                'marginal_risk': round(float(marginal_risk[i]), 6),
+                'risk_contribution_pct': round(float(risk_contribution_pct[i]), 6)
+            }
+            for i, symbol in enumerate(symbols)
+        },
+        'observations': len(R)
+    }
+
+
+def correlation_clusters(corr: np.ndarray, symbols: List[str], threshold: float) -> List[List[str]]:
+    """
+    Group symbols whose returns are linked by correlation >= threshold
+    (connected components of the thresholded correlation graph).
+
+    Reachability is found by repeatedly squaring the boolean adjacency
+    matrix, which takes O(log n) matrix products.
+    """
+    n = len(symbols)
+    reach = (corr >= threshold) | np.eye(n, dtype=bool)
+    while True:
+        expanded = (reach.astype(np.int32) @ reach.astype(np.int32)) > 0
+        if np.array_equal(expanded, reach):
+            break
+        reach = expanded
+
+    # Each component is identified by its lowest member index
+    labels = reach.argmax(axis=1)
+    clusters = []
+    for label in np.unique(labels):
+        members = [symbols[i] for i in np.flatnonzero(labels == label)]
+        if len(members) > 1:
+            clusters.append(members)
+    return clusters
+
+
+class PortfolioRiskAnalyzer:
+    """
+    Portfolio-level risk analytics (covariance, volatility, beta,
+    correlation clusters, marginal risk contributions) built on the shared
+    PriceDataStore. Results are cached per trading day.
+    """
+
+    def __init__(self, price_store: PriceDataStore, executor: Optional[AnalysisExecutor] = None,
+                 benchmark: str = "SPY", correlation_threshold: float = 0.7, trading_days: int = 252):
+        self.price_store = price_store
+        self.executor = executor or price_store.executor
+        self.benchmark = benchmark
+        self.correlation_threshold = correlation_threshold
+        self.trading_days = trading_days
+        self._day: Optional[date] = None
+        self._cache: Dict[Tuple, Dict] = {}
+
+    async def analyze(self, symbols: List[str], weights: Optional[List[float]] = None) -> Dict:
+        """Risk metrics for the given positions (equal-weighted by default)."""
+        today = date.today()
+        if self._day != today:
+            self._day = today
+            self._cache = {}
+
+        key = (tuple(symbols), tuple(weights) if weights is not None else None)
+        if key in self._cache:
+            return self._cache[key]
+
+        close, _ = await self.price_store.get_history(list(symbols) + [self.benchmark])
+        result = await self.executor.run_cpu(
+            compute_risk_metrics,
+            close,
+            list(symbols),
+            self.benchmark,
+            np.asarray(weights, dtype=float) if weights is not None else None,
+            self.trading_days,
+            self.correlation_threshold
+        )
+        result['benchmark'] = self.benchmark
+        result['as_of'] = str(close.index[-1].date()) if len(close.index) else None
+        self._cache[key] = result
+        return result
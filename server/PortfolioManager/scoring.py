@@ -0,0 +1,39 @@
+from dataclasses import dataclass, fields
+from typing import Optional
+import json
+
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """
+    Weights and thresholds that turn sentiment and technical scores into a
+    composite score and a BUY/HOLD/SELL recommendation. The defaults are the
+    original 40/20/40 split and recommendation bands.
+    """
+    news_weight: float = 0.4
+    social_weight: float = 0.2
+    technical_weight: float = 0.4
+
+    # Minimum composite score for a new position (screen_new_stocks)
+    entry_threshold: float = 65.0
+
+    # Recommendation bands (score >= threshold)
+    strong_buy_threshold: float = 70.0   # BUY / HIGH
+    buy_threshold: float = 60.0          # BUY / MEDIUM
+    hold_threshold: float = 50.0         # HOLD / MEDIUM
+    sell_threshold: float = 40.0         # HOLD / LOW; below this is SELL
+    strong_sell_threshold: float = 30.0  # below this is SELL / MEDIUM
+
+
+def load_scoring_config(path: Optional[str]) -> ScoringConfig:
+    """
+    Load a ScoringConfig from a JSON object of field values (for example a
+    row picked from a PortfolioManager.sweep results table). Unknown keys
+    are ignored; missing fields keep their defaults.
+    """
+    if not path:
+        return ScoringConfig()
+    with open(path) as f:
+        data = json.load(f)
+    known = {f.name for f in fields(ScoringConfig)}
+    return ScoringConfig(**{k: float(v) for k, v in data.items() if k in known})
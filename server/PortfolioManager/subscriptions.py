@@ -0,0 +1,201 @@
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+from collections import Counter
+from datetime import datetime
+import asyncio
+from PortfolioManager.ws_protocol import diff_summary
+
+Send = Callable[[Dict], Awaitable[None]]
+Close = Callable[[], Awaitable[None]]
+
+
+class _Client:
+    __slots__ = ('client_id', 'symbols', 'send', 'close', 'pending', 'snapshot', 'known', 'seq',
+                 'wakeup', 'busy', 'writer', 'stats')
+
+    def __init__(self, client_id: str, symbols: Set[str], send: Send, close: Optional[Close] = None):
+        self.client_id = client_id
+        self.symbols = symbols
+        self.send = send
+        self.close = close
+        self.pending: Dict[str, Dict] = {}  # symbol -> latest unsent update
+        self.snapshot: Optional[Dict] = None  # queued snapshot, sent before any delta
+        self.known: Dict[str, Dict] = {}  # symbol -> summary the client currently has
+        self.seq = 0
+        self.wakeup = asyncio.Event()
+        self.busy = False
+        self.writer: Optional[asyncio.Task] = None
+        self.stats = {'messages_sent': 0, 'snapshots_sent': 0, 'updates_sent': 0,
+                      'updates_coalesced': 0, 'updates_dropped': 0}
+
+
+class SubscriptionHub:
+    """
+    Shared symbol subscriptions for websocket clients.
+
+    Symbols are reference-counted across clients so each one is computed
+    once per cycle no matter how many clients hold it; `publish` then fans
+    the results out as per-client views. Every client has its own writer
+    task, so a slow socket never blocks the others.
+
+    Messages carry a per-client `seq`. A `snapshot` (queued with
+    `send_snapshot`) resets what the client is known to have; after that
+    each `delta` only holds the fields that changed relative to what this
+    client last received, so coalesced or dropped updates never leave it
+    with a stale view. Slow clients are handled by `slow_client_policy`:
+
+    - 'coalesce' (default): while a send is in flight, newer updates for a
+      symbol replace older unsent ones, so the client only ever gets the
+      latest value and the buffer is bounded by its symbol count.
+    - 'drop': updates arriving while a send is in flight are discarded.
+
+    Clients whose send fails or exceeds `send_timeout` are unsubscribed and
+    disconnected through the `close` callback they subscribed with (e.g.
+    closing the websocket with code 1011), so they can reconnect and get a
+    fresh snapshot instead of silently missing updates.
+    """
+
+    def __init__(self, slow_client_policy: str = 'coalesce', send_timeout: float = 10.0):
+        if slow_client_policy not in ('coalesce', 'drop'):
+            raise ValueError(f"Unknown slow_client_policy: {slow_client_policy}")
+        self.slow_client_policy = slow_client_policy
+        self.send_timeout = send_timeout
+        self._clients: Dict[str, _Client] = {}
+        self._subscribers: Counter = Counter()  # symbol -> number of clients holding it
+        self._stats = {'cycles': 0, 'updates_published': 0, 'clients_dropped': 0}
+        self._departed = Counter()  # per-client counters of clients that already left
+
+    def subscribe(self, client_id: str, symbols: Iterable[str], send: Send, close: Optional[Close] = None):
+        """Register a client, or replace the symbols of an existing one."""
+        symbols = set(symbols)
+        client = self._clients.get(client_id)
+        if client is None:
+            client = _Client(client_id, set(), send, close)
+            client.writer = asyncio.create_task(self._write(client))
+            self._clients[client_id] = client
+        self._subscribers.subtract(client.symbols)
+        self._subscribers.update(symbols)
+        self._subscribers += Counter()  # drop symbols nobody holds
+        client.symbols = symbols
+        client.send = send
+        client.close = close or client.close
+        client.pending = {s: u for s, u in client.pending.items() if s in symbols}
+
+    def unsubscribe(self, client_id: str):
+        client = self._clients.pop(client_id, None)
+        if client is None:
+            return
+        self._subscribers.subtract(client.symbols)
+        self._subscribers += Counter()
+        self._departed.update(client.stats)
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    async def aclose(self):
+        """Unregister every client and wait for their writers to stop (server shutdown)."""
+        writers = [c.writer for c in self._clients.values() if c.writer is not None]
+        for client_id in list(self._clients):
+            self.unsubscribe(client_id)
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    def send_snapshot(self, client_id: str, snapshot: Dict):
+        """Queue a full snapshot (a monitor_existing_positions result) for a client."""
+        client = self._clients.get(client_id)
+        if client is None:
+            return
+        client.snapshot = snapshot
+        client.wakeup.set()
+
+    def symbols(self) -> Set[str]:
+        """Union of all subscribed symbols (each computed once per cycle)."""
+        return set(self._subscribers)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def publish(self, updates: Dict[str, Dict]):
+        """Queue one cycle's updates (symbol -> payload) for the clients holding them."""
+        self._stats['cycles'] += 1
+        self._stats['updates_published'] += len(updates)
+        for client in self._clients.values():
+            relevant = client.symbols.intersection(updates)
+            if not relevant:
+                continue
+            if client.busy and self.slow_client_policy == 'drop':
+                client.stats['updates_dropped'] += len(relevant)
+                continue
+            for symbol in relevant:
+                if symbol in client.pending:
+                    client.stats['updates_coalesced'] += 1
+                client.pending[symbol] = updates[symbol]
+            client.wakeup.set()
+
+    async def _write(self, client: _Client):
+        while True:
+            await client.wakeup.wait()
+            client.wakeup.clear()
+            try:
+                if client.snapshot is not None:
+                    snapshot, client.snapshot = client.snapshot, None
+                    client.known = {a['symbol']: a for a in snapshot.get('detailed_analyses', []) if 'symbol' in a}
+                    await self._deliver(client, {'type': 'snapshot', **snapshot})
+                    client.stats['snapshots_sent'] += 1
+
+                if not client.pending:
+                    continue
+                pending, client.pending = client.pending, {}
+                changes = {}
+                for symbol in sorted(pending):
+                    known = client.known.get(symbol)
+                    # skip updates that are older than a snapshot sent meanwhile
+                    if known is not None and pending[symbol].get('analyzed_at', '') < known.get('analyzed_at', ''):
+                        continue
+                    delta = diff_summary(known, pending[symbol])
+                    client.known[symbol] = pending[symbol]
+                    if delta:
+                        changes[symbol] = delta
+                if changes:
+                    await self._deliver(client, {
+                        'type': 'delta',
+                        'changes': changes,
+                        'timestamp': datetime.now().isoformat()
+                    })
+                    client.stats['updates_sent'] += len(changes)
+            except Exception as e:
+                reason = 'timed out' if isinstance(e, asyncio.TimeoutError) else f"failed: {e}"
+                print(f"[subscriptions][error] send to {client.client_id} {reason}; dropping client")
+                self._stats['clients_dropped'] += 1
+                self.unsubscribe(client.client_id)
+                await self._close(client)
+                return
+
+    async def _close(self, client: _Client):
+        if client.close is None:
+            return
+        try:
+            await asyncio.wait_for(client.close(), timeout=self.send_timeout)
+        except Exception as e:
+            print(f"[subscriptions][warning] closing {client.client_id} failed: {e}")
+
+    async def _deliver(self, client: _Client, message: Dict):
+        client.seq += 1
+        client.busy = True
+        try:
+            await asyncio.wait_for(client.send({'seq': client.seq, **message}), timeout=self.send_timeout)
+            client.stats['messages_sent'] += 1
+        finally:
+            client.busy = False
+
+    def stats(self) -> Dict:
+        totals = Counter(self._departed)
+        for client in self._clients.values():
+            totals.update(client.stats)
+        return {
+            **self._stats,
+            **{key: totals[key] for key in ('messages_sent', 'snapshots_sent', 'updates_sent',
+                                            'updates_coalesced', 'updates_dropped')},
+            'clients': len(self._clients),
+            'symbols': len(self._subscribers),
+            'slow_client_policy': self.slow_client_policy,
+            'max_pending': max((len(c.pending) for c in self._clients.values()), default=0),
+            'subscribers_per_symbol': dict(self._subscribers.most_common())
+        }
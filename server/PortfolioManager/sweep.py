@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence
+import itertools
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+from PortfolioManager.backtest import BacktestData, BacktestEngine, simulate
+from PortfolioManager.scoring import ScoringConfig
+
+SHARED_ARRAYS = ('technical', 'news', 'social', 'forward_returns')
+
+# Read-only views onto the parent's shared memory, set up once per worker
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+
+def parameter_grid(normalize_weights: bool = True, **axes: Sequence) -> List[ScoringConfig]:
+    """
+    Cartesian product of ScoringConfig fields, e.g.
+    parameter_grid(news_weight=[0.3, 0.4], entry_threshold=[60, 65, 70]).
+
+    With `normalize_weights` the three weights are rescaled to sum to 1, and
+    combinations that collapse to the same config are dropped. Combinations
+    with inconsistent recommendation bands are skipped.
+    """
+    known = {f.name for f in fields(ScoringConfig)}
+    unknown = set(axes) - known
+    if unknown:
+        raise ValueError(f"Unknown scoring parameters: {sorted(unknown)}")
+
+    names = list(axes)
+    configs = []
+    seen = set()
+    for values in itertools.product(*(axes[name] for name in names)):
+        params = asdict(ScoringConfig())
+        params.update(zip(names, values))
+
+        if normalize_weights:
+            total = params['news_weight'] + params['social_weight'] + params['technical_weight']
+            if total <= 0:
+                continue
+            for key in ('news_weight', 'social_weight', 'technical_weight'):
+                params[key] = round(params[key] / total, 6)
+
+        bands = [params['strong_buy_threshold'], params['buy_threshold'], params['hold_threshold'],
+                 params['sell_threshold'], params['strong_sell_threshold']]
+        if bands != sorted(bands, reverse=True):
+            continue
+
+        config = ScoringConfig(**params)
+        if config not in seen:
+            seen.add(config)
+            configs.append(config)
+    return configs
+
+
+def _attach_worker(layout: Dict[str, Dict]):
+    """Process pool initializer: map the shared score arrays without copying."""
+    for name, spec in layout.items():
+        block = shared_memory.SharedMemory(name=spec['shm_name'])
+        _worker_blocks.append(block)
+        array = np.ndarray(spec['shape'], dtype=spec['dtype'], buffer=block.buf)
+        array.flags.writeable = False
+        _worker_arrays[name] = array
+
+
+def _evaluate(configs: List[ScoringConfig], arrays: Optional[Dict[str, np.ndarray]] = None) -> List[Dict]:
+    """Backtest a chunk of configs against the shared (or given) arrays."""
+    arrays = arrays if arrays is not None else _worker_arrays
+    rows = []
+    for config in configs:
+        result = simulate(arrays['technical'], arrays['news'], arrays['social'],
+                          arrays['forward_returns'], config)
+        result.pop('_daily_returns')
+        result.pop('_positions')
+        counts = result.pop('action_counts')
+        rows.append({
+            **asdict(config),
+            **result,
+            **{f"{action.lower()}_count": count for action, count in counts.items()}
+        })
+    return rows
+
+
+class SweepRunner:
+    """
+    Evaluates grids of ScoringConfig parameters against prepared backtest
+    data in a process pool.
+
+    The score arrays are copied once into shared memory blocks; workers map
+    them read-only in their initializer, so each task only pickles a chunk
+    of configs and returns a few metrics per config.
+    """
+
+    def __init__(self, data: BacktestData, workers: Optional[int] = None, chunk_size: int = 16):
+        self.data = data
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_engine(cls, engine: BacktestEngine, **kwargs) -> "SweepRunner":
+        return cls(engine.data, **kwargs)
+
+    def run(self, configs: Iterable[ScoringConfig], rank_by: str = 'sharpe',
+            ascending: bool = False) -> pd.DataFrame:
+        """
+        Backtest every config and return one row per config (parameters plus
+        metrics), ranked by `rank_by`. With `workers=0` everything runs in
+        this process.
+        """
+        configs = list(configs)
+        arrays = {name: getattr(self.data, name) for name in SHARED_ARRAYS}
+        chunks = [configs[i:i + self.chunk_size] for i in range(0, len(configs), self.chunk_size)]
+
+        if self.workers == 0 or len(chunks) <= 1:
+            rows = _evaluate(configs, arrays)
+        else:
+            rows = self._run_pool(chunks, arrays)
+
+        print(f"[sweep] evaluated {len(rows)} configs over {len(self.data.dates)} days x {len(self.data.symbols)} symbols")
+        table = pd.DataFrame(rows)
+        if len(table) == 0:
+            return table
+        table = table.sort_values(rank_by, ascending=ascending, kind='stable').reset_index(drop=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table
+
+    def _run_pool(self, chunks: List[List[ScoringConfig]], arrays: Dict[str, np.ndarray]) -> List[Dict]:
+        blocks = []
+        layout = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array, dtype=np.float64)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                layout[name] = {'shm_name': block.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+            # spawn, like AnalysisExecutor, so workers don't inherit server threads
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(chunks)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_attach_worker,
+                initargs=(layout,)
+            ) as pool:
+                rows = []
+                for chunk_rows in pool.map(_evaluate, chunks):
+                    rows.extend(chunk_rows)
+                return rows
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Sweep scoring weights and thresholds over stored history")
+    parser.add_argument("prices", help="CSV with date, symbol, close, volume columns")
+    parser.add_argument("--documents", help="JSON-lines export of scored document metadata")
+    parser.add_argument("--grid", required=True, help='JSON object of parameter lists, e.g. {"entry_threshold": [60, 65]}')
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--rank-by", default="sharpe")
+    parser.add_argument("--out", help="Write the ranked table to this CSV")
+    args = parser.parse_args()
+
+    engine = BacktestEngine.from_files(args.prices, args.documents, start=args.start, end=args.end)
+    table = SweepRunner.from_engine(engine, workers=args.workers).run(
+        parameter_grid(**json.loads(args.grid)), rank_by=args.rank_by
+    )
+    if args.out:
+        table.to_csv(args.out, index=False)
+    print(table.head(20).to_string(index=False))
@@ -0,0 +1,82 @@
+from typing import Dict, Optional, Tuple, Union
+import json
+from starlette.websockets import WebSocketDisconnect
+try:
+    import msgpack
+    _HAVE_MSGPACK = True
+except Exception:
+    _HAVE_MSGPACK = False
+
+# Summary fields sent in a delta when their value changes
+DELTA_FIELDS = ('composite_score', 'recommendation', 'sentiment_scores', 'technical_score')
+
+
+def diff_summary(previous: Optional[Dict], current: Dict) -> Dict:
+    """
+    Compact change set between two StockAnalysis summaries: only the fields
+    that changed, plus `new_document_ids` for documents the client hasn't
+    seen. A symbol the client doesn't know yet gets its full summary.
+    """
+    if previous is None:
+        return dict(current)
+    changes = {key: current[key] for key in DELTA_FIELDS if current.get(key) != previous.get(key)}
+    seen = set(previous.get('document_ids', []))
+    new_ids = [doc_id for doc_id in current.get('document_ids', []) if doc_id not in seen]
+    if new_ids:
+        changes['new_document_ids'] = new_ids
+    if changes:
+        changes['analyzed_at'] = current.get('analyzed_at')
+    return changes
+
+
+def apply_delta(summary: Optional[Dict], changes: Dict) -> Dict:
+    """Client-side counterpart of diff_summary (used by tests and Python clients)."""
+    if summary is None:
+        return dict(changes)
+    updated = {**summary, **{k: v for k, v in changes.items() if k != 'new_document_ids'}}
+    if 'new_document_ids' in changes:
+        updated['document_ids'] = list(summary.get('document_ids', [])) + changes['new_document_ids']
+    return updated
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """'msgpack' when requested and installed, otherwise 'json'."""
+    if requested == 'msgpack' and _HAVE_MSGPACK:
+        return 'msgpack'
+    return 'json'
+
+
+def encode(message: Dict, encoding: str) -> Tuple[str, Union[bytes, str]]:
+    """Serialize a message; returns ('bytes', payload) or ('text', payload)."""
+    if encoding == 'msgpack':
+        return 'bytes', msgpack.packb(message, use_bin_type=True, default=str)
+    return 'text', json.dumps(message, separators=(',', ':'), default=str)
+
+
+def decode(payload: Union[bytes, str]) -> Dict:
+    if isinstance(payload, (bytes, bytearray)):
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def make_sender(websocket, encoding: str):
+    """Send callable for SubscriptionHub that writes `encoding` frames to a websocket."""
+    async def send(message: Dict):
+        kind, payload = encode(message, encoding)
+        if kind == 'bytes':
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_text(payload)
+    return send
+
+
+async def receive(websocket) -> Dict:
+    """Next client message, accepting JSON text or MessagePack binary frames."""
+    message = await websocket.receive()
+    if message['type'] == 'websocket.disconnect':
+        raise WebSocketDisconnect(message.get('code', 1000))
+    if message.get('bytes') is not None:
+        if not _HAVE_MSGPACK:
+            raise ValueError("binary frames require msgpack")
+        return decode(message['bytes'])
+    return decode(message['text'])
@@ -0,0 +1,84 @@
+"""
+Top-k query latency of the vector, lexical and hybrid retrieval paths over
+an in-memory VectorStoreManager.
+
+    python -m ResearchAgent.rag.benchmark --documents docs.jsonl --queries 200 --top-k 5
+"""
+from typing import Dict, List
+import asyncio
+import json
+import random
+import time
+import numpy as np
+
+from ResearchAgent.rag.vector_store import VectorStoreManager, RETRIEVAL_MODES
+
+_SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "GOOGL", "META", "AMD"]
+_EVENTS = ["beats earnings estimates", "cuts guidance", "announces buyback", "faces antitrust probe",
+           "launches new product", "raises dividend", "misses revenue forecast", "signs supply deal"]
+
+
+def synthetic_documents(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    documents = []
+    for i in range(n):
+        symbol, event = rng.choice(_SYMBOLS), rng.choice(_EVENTS)
+        figure = f"{rng.uniform(1, 40):.1f}%"
+        documents.append({
+            'symbol': symbol,
+            'source': 'benchmark',
+            'data_type': rng.choice(['news', 'social_media']),
+            'title': f"{symbol} {event}",
+            'content': f"{symbol} {event}; shares moved {figure} (item {i}).",
+            'timestamp': f"2025-01-{1 + i % 28:02d}T10:00:00",
+            'sentiment_score': rng.uniform(-1, 1)
+        })
+    return documents
+
+
+def benchmark(store: VectorStoreManager, queries: List[Dict], top_k: int) -> Dict[str, Dict]:
+    """Latency percentiles (ms) per retrieval mode over the same queries"""
+    results = {}
+    for mode in RETRIEVAL_MODES:
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            store.query(query['text'], symbol=query.get('symbol'), top_k=top_k, mode=mode)
+            latencies.append((time.perf_counter() - started) * 1000)
+        results[mode] = {
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+            'mean_ms': round(float(np.mean(latencies)), 3)
+        }
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark top-k latency of vector vs hybrid retrieval")
+    parser.add_argument("--documents", help="JSON-lines documents in upsert_document format (default: synthetic)")
+    parser.add_argument("--synthetic", type=int, default=2000, help="Number of synthetic documents")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.documents:
+        with open(args.documents) as f:
+            documents = [json.loads(line) for line in f if line.strip()]
+    else:
+        documents = synthetic_documents(args.synthetic, seed=args.seed)
+
+    store = VectorStoreManager(api_key=None)
+    asyncio.run(store.upsert_document(documents))
+
+    rng = random.Random(args.seed)
+    queries = []
+    for doc in rng.choices(documents, k=args.queries):
+        # Half scoped to the document's symbol, as chat retrieval is
+        queries.append({'text': doc['title'], 'symbol': doc['symbol'] if rng.random() < 0.5 else None})
+
+    print(f"{len(documents)} documents, {len(queries)} queries, top_k={args.top_k}")
+    for mode, stats in benchmark(store, queries, args.top_k).items():
+        print(f"{mode:8s} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms  mean {stats['mean_ms']:8.3f} ms")
@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, List, Optional
+from collections import Counter
+import heapq
+import math
+import re
+
+# Words plus dotted/hyphenated tokens and figures: "brk.b", "p&g", "3.5", "q3"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.&\-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def matches_filters(
+        metadata: Dict,
+        symbol: Optional[str] = None,
+        data_types: Optional[List[str]] = None,
+        min_sentiment_score: Optional[float] = None
+    ) -> bool:
+    """Metadata filters shared by the dense and lexical retrieval paths"""
+    if symbol and metadata.get('symbol') != symbol:
+        return False
+    if data_types and metadata.get('data_type') not in data_types:
+        return False
+    if min_sentiment_score is not None and metadata.get('sentiment_score', 0) < min_sentiment_score:
+        return False
+    return True
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[Dict]], top_k: int = 10, k: int = 60) -> List[Dict]:
+    """
+    Merge ranked result lists by reciprocal rank fusion: each document
+    scores sum(1 / (k + rank)) over the lists it appears in, so agreement
+    between retrievers counts and raw scores on different scales don't.
+    The fused score goes to 'fused_score'; other fields come from the first
+    list a document appears in.
+    """
+    fused: Dict[str, float] = {}
+    docs: Dict[str, Dict] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            fused[doc['id']] = fused.get(doc['id'], 0.0) + 1.0 / (k + rank)
+            docs[doc['id']] = {**doc, **docs.get(doc['id'], {})}
+    best = heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])
+    return [{**docs[doc_id], 'fused_score': score} for doc_id, score in best]
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring.
+
+    Postings map each term to {document id: term frequency}; metadata is
+    kept per document so results carry the same fields as vector matches
+    and the same filters apply. Re-adding an id replaces the document.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}  # document id -> distinct terms, for removal
+        self._metadata: Dict[str, Dict] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: str, text: str, metadata: Dict):
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._terms[doc_id] = list(terms)
+        self._metadata[doc_id] = metadata
+        self._total_length += length
+
+    def remove(self, doc_id: str):
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._metadata.pop(doc_id, None)
+        self._total_length -= length
+        for term in self._terms.pop(doc_id):
+            del self._postings[term][doc_id]
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def search(
+            self,
+            query_text: str,
+            symbol: Optional[str] = None,
+            data_types: Optional[List[str]] = None,
+            top_k: int = 10,
+            min_sentiment_score: Optional[float] = None
+        ) -> List[Dict]:
+        """Top documents by BM25 score, in the same shape as VectorStoreManager.query"""
+        if not self._lengths:
+            return []
+        n = len(self._lengths)
+        average_length = self._total_length / n
+
+        scores: Dict[str, float] = {}
+        allowed: Dict[str, bool] = {}
+        for term in set(tokenize(query_text)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if doc_id not in allowed:
+                    allowed[doc_id] = matches_filters(self._metadata[doc_id], symbol, data_types, min_sentiment_score)
+                if not allowed[doc_id]:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [{'id': doc_id, 'score': score, **self._metadata[doc_id]} for doc_id, score in best]
@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import numpy as np
 from sentence_transformers import SentenceTransformer
 try:
@@ -8,14 +8,27 @@ except Exception:
     _HAVE_PINECONE = False
 from datetime import datetime, timedelta
 import hashlib
+from ResearchAgent.rag.lexical_index import BM25Index, matches_filters, reciprocal_rank_fusion
+
+RETRIEVAL_MODES = ('vector', 'lexical', 'hybrid')
+
+
+def _cosine(a, b) -> float:
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
+        return 0.0
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
 
 class VectorStoreManager:
     """
     Manage vector embeddings and retrieval
     """
 
-    def __init__ (self, api_key: Optional[str], index_name: str = "stock-intelligence"):
+    def __init__ (self, api_key: Optional[str], index_name: str = "stock-intelligence", retrieval_mode: str = 'vector'):
 
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"retrieval_mode must be one of {RETRIEVAL_MODES}, got {retrieval_mode!r}")
         self.index_name = index_name
         self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
 
@@ -54,6 +67,16 @@ class VectorStoreManager:
         if self._use_in_memory:
             self._store = {}  # id -> {'vector': [...], 'metadata': {...}}
 
+        # BM25 over title + content of documents upserted by this process, for
+        # exact tickers, product names and figures that dense retrieval misses.
+        # `retrieval_mode` is the default for query(): 'vector', 'lexical', or
+        # 'hybrid' (both, merged by reciprocal rank fusion)
+        self.lexical_index = BM25Index()
+        self.retrieval_mode = retrieval_mode
+
+        # Called with the symbols of each upserted batch (e.g. AlertEngine.mark_dirty)
+        self._upsert_listeners: List[Callable[[List[str]], None]] = []
+
         # structure Metadata
         self.metadata_schema = {
             'symbol': str,
@@ -68,11 +91,28 @@ class VectorStoreManager:
             'relevance_score': float
         }
 
+    def add_upsert_listener(self, callback: Callable[[List[str]], None]):
+        """Register a callback invoked with the affected symbols after each upsert."""
+        self._upsert_listeners.append(callback)
+
     def generate_embedding(self, text: str) -> np.ndarray:
         """Generate embedding for text"""
         # SentenceTransformer provides an `encode` method which can return numpy arrays
         return self.embedding_model.encode(text, convert_to_numpy=True)
 
+    def fetch_vectors(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """Stored embeddings by document id (unknown ids are left out)"""
+        if not ids:
+            return {}
+        if self._use_in_memory:
+            return {i: np.asarray(self._store[i]['vector'], dtype=np.float32) for i in ids if i in self._store}
+        response = self.index.fetch(ids=list(ids))
+        vectors = response['vectors'] if isinstance(response, dict) else response.vectors
+        return {
+            i: np.asarray(v['values'] if isinstance(v, dict) else v.values, dtype=np.float32)
+            for i, v in vectors.items()
+        }
+
     def create_document_id(self, content: str, symbol: str, timestamp: str) -> str:
         unique_string = f"{symbol}_{content[:100]}_{timestamp}"
         return hashlib.md5(unique_string.encode()).hexdigest()
@@ -126,6 +166,9 @@ class VectorStoreManager:
                 'metadata': metadata
             })
 
+        for vec, doc in zip(vectors, documents):
+            self.lexical_index.add(vec['id'], f"{doc.get('title', '')} {doc.get('content', '')}", vec['metadata'])
+
         #batch upsert
         if self._use_in_memory:
             for vec in vectors:
@@ -136,6 +179,13 @@ class VectorStoreManager:
                 batch = vectors[i:i+batch_size]
                 self.index.upsert(vectors=batch)
 
+        symbols = list(dict.fromkeys(v['metadata']['symbol'] for v in vectors if v['metadata']['symbol']))
+        for listener in self._upsert_listeners:
+            try:
+                listener(symbols)
+            except Exception as e:
+                print(f"[vector_store][error] upsert listener failed: {e}")
+
         return {
             'upserted' : len(vectors),
             'timestamp': datetime.now().isoformat()
@@ -147,13 +197,46 @@ class VectorStoreManager:
             symbol: Optional[str] = None,
             data_types: Optional[List[str]] = None,
             top_k: int = 10,
-            min_sentiment_score: Optional[float] = None
+            min_sentiment_score: Optional[float] = None,
+            mode: Optional[str] = None
         ) -> List[Dict]:
 
         """
-        Query vector store with filters"""
+        Query vector store with filters.
 
+        `mode` overrides the store's retrieval_mode. Hybrid mode takes up to
+        3 * top_k candidates from each path under the same filters and
+        orders them by reciprocal rank fusion ('fused_score'); 'score' stays
+        the cosine similarity to the query, as in vector mode, so results of
+        both modes can be ranked together. Lexical mode scores are BM25."""
+
+        mode = mode or self.retrieval_mode
+        if mode == 'lexical':
+            return self.lexical_index.search(query_text, symbol, data_types, top_k, min_sentiment_score)
         query_embedding = self.generate_embedding(query_text)
+        if mode == 'hybrid':
+            candidates = max(top_k * 3, 20)
+            dense = self._vector_query(query_embedding, symbol, data_types, candidates, min_sentiment_score)
+            lexical = self.lexical_index.search(query_text, symbol, data_types, candidates, min_sentiment_score)
+            fused = reciprocal_rank_fusion([dense, lexical], top_k=top_k)
+
+            # Lexical-only hits get their cosine score from the stored vectors
+            scores = {d['id']: d['score'] for d in dense}
+            missing = [d['id'] for d in fused if d['id'] not in scores]
+            for doc_id, vector in self.fetch_vectors(missing).items():
+                scores[doc_id] = _cosine(query_embedding, vector)
+            return [{**d, 'score': scores.get(d['id'], 0.0)} for d in fused]
+        return self._vector_query(query_embedding, symbol, data_types, top_k, min_sentiment_score)
+
+    def _vector_query(
+            self,
+            query_embedding: np.ndarray,
+            symbol: Optional[str],
+            data_types: Optional[List[str]],
+            top_k: int,
+            min_sentiment_score: Optional[float]
+        ) -> List[Dict]:
+        """Dense retrieval: cosine similarity to the query embedding"""
 
         filter_dict = {}
         if symbol:
@@ -165,25 +248,14 @@ class VectorStoreManager:
 
         if self._use_in_memory:
             # naive similarity: cosine on stored vectors
-            def cosine(a, b):
-                a = np.array(a)
-                b = np.array(b)
-                if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
-                    return 0.0
-                return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
-
             matches = []
             for _id, item in self._store.items():
                 md = item['metadata']
                 # apply filters
-                if symbol and md.get('symbol') != symbol:
-                    continue
-                if data_types and md.get('data_type') not in data_types:
-                    continue
-                if min_sentiment_score is not None and md.get('sentiment_score', 0) < min_sentiment_score:
+                if not matches_filters(md, symbol, data_types, min_sentiment_score):
                     continue
 
-                score = cosine(query_embedding.tolist(), item['vector'])
+                score = _cosine(query_embedding, item['vector'])
                 matches.append({'id': _id, 'score': score, 'metadata': md})
 
             matches = sorted(matches, key=lambda x: x['score'], reverse=True)[:top_k]
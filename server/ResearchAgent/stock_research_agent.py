@@ -1,4 +1,3 @@
-from groq import Groq
 import os
 from dotenv import load_dotenv
 from typing import List, Dict, Optional, Tuple
@@ -13,6 +12,7 @@ from chromadb.config import Settings
 import yfinance as yf
 import requests
 from collections import defaultdict
+from LLMAgent.llm_gateway import LLMGateway
 
 load_dotenv()
 
@@ -41,15 +41,24 @@ class StockResearchNode:
 class LLMOrchestrator:
     """LLM decision making engine for autonomous stock research."""
 
-    def __init__(self, groq_api_key: str):
+    def __init__(self, groq_api_key: str, gateway: Optional[LLMGateway] = None):
         api_key = groq_api_key or os.environ.get("GROQ_API_KEY")
-        if not api_key:
+        if gateway is None and not api_key:
             raise ValueError("GROQ_API_KEY environment variable not set")
-        self.client = Groq(api_key=api_key)
+        # Shared async client: pooled connections, rate limits and retries.
+        # A passed-in gateway belongs to the caller; one created here is
+        # closed by aclose().
+        self._owns_gateway = gateway is None
+        self.gateway = gateway or LLMGateway(api_key=api_key)
         self.model = "llama-3.3-70b-versatile"
 
+    async def aclose(self):
+        """Close the gateway if this orchestrator created it"""
+        if self._owns_gateway:
+            await self.gateway.aclose()
+
     
-    def analyze_user_query(self, query: str) -> Dict:
+    async def analyze_user_query(self, query: str) -> Dict:
         """Analyze user query to determine research direction."""
         prompt = f"""You are a financial research assistant. Analyze this user query and create a research plan.
 
@@ -65,10 +74,10 @@ Create a JSON response with:
 
 Format as valid JSON only, no other text."""
 
-        response = self._call_llm(prompt)
+        response = await self._call_llm(prompt)
         return json.loads(response)
     
-    def decide_next_action(self, current_state: Dict) -> Dict:
+    async def decide_next_action(self, current_state: Dict) -> Dict:
         """Decide what to research next based on current findings"""
         
         prompt = f"""You are conducting autonomous financial research. Based on what we've found so far, decide the next action.
@@ -88,10 +97,10 @@ Decide:
 
 Format as JSON only."""
 
-        response = self._call_llm(prompt)
+        response = await self._call_llm(prompt)
         return json.loads(response)
     
-    def synthesize_answer(self, query: str, evidence: List[Dict]) -> Dict:
+    async def synthesize_answer(self, query: str, evidence: List[Dict]) -> Dict:
         """Synthesize evidence into a comprehensive answer"""
         
         evidence_text = "\n\n".join([
@@ -121,10 +130,10 @@ Provide a comprehensive answer with:
 
 Be specific and cite source numbers. Format as JSON."""
 
-        response = self._call_llm(prompt, max_tokens=2000)
+        response = await self._call_llm(prompt, max_tokens=2000)
         return json.loads(response)
     
-    def extract_structured_data(self, article_html: str, extraction_goal: str) -> Dict:
+    async def extract_structured_data(self, article_html: str, extraction_goal: str) -> Dict:
         """Extract specific structured data from article"""
         
         prompt = f"""Extract the following information from this article:
@@ -145,13 +154,13 @@ Extract as JSON with these fields:
 
 Format as valid JSON only."""
 
-        response = self._call_llm(prompt, max_tokens=500)
+        response = await self._call_llm(prompt, max_tokens=500)
         return json.loads(response)
     
-    def _call_llm(self, prompt: str, max_tokens: int = 1000) -> str:
-        """Call Groq LLM with error handling"""
+    async def _call_llm(self, prompt: str, max_tokens: int = 1000) -> str:
+        """Call Groq LLM with error handling (retries happen in the gateway)"""
         try:
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = await self.gateway.chat(
                 messages=[
                     {
                         "role": "system",
@@ -165,8 +174,7 @@ Format as valid JSON only."""
                 model=self.model,
                 temperature=0.3,
                 max_tokens=max_tokens,
-                top_p=1,
-                stream=False
+                top_p=1
             )
             
             response_text = chat_completion.choices[0].message.content
@@ -1,13 +1,17 @@
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.concurrency import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import asyncio
+import json
 import os
+import uuid
 from dotenv import load_dotenv
 from models.models import ChatRequest, ChatResponse, StockAnalysisRequest, PortfolioRequest
 from scheduler import TradingSystemOrchestrator, screen_new_stocks
+from PortfolioManager import ws_protocol
 
 load_dotenv()
 
@@ -28,11 +32,54 @@ async def startup_event(app):
         'alpha_vantage_api_key': os.getenv('ALPHA_VANTAGE_API_KEY'),
         'pinecone_api_key': os.getenv('PINECONE_API_KEY'),
         'llama_api_key': os.getenv('LLAMA_API_KEY'),
+        'executor_io_workers': int(os.getenv('EXECUTOR_IO_WORKERS', 8)),
+        'executor_cpu_workers': int(os.getenv('EXECUTOR_CPU_WORKERS', 2)),
+        'analysis_max_concurrency': int(os.getenv('ANALYSIS_MAX_CONCURRENCY', 8)),
+        'analysis_symbol_timeout': float(os.getenv('ANALYSIS_SYMBOL_TIMEOUT', 30)),
+        'analysis_cache_ttl': float(os.getenv('ANALYSIS_CACHE_TTL', 30)),
+        'screening_technical_cutoff': float(os.getenv('SCREENING_TECHNICAL_CUTOFF', 20)),
+        'screening_top_n': int(os.getenv('SCREENING_TOP_N', 10)),
+        'scoring_config_path': os.getenv('SCORING_CONFIG'),
+        'alert_debounce': float(os.getenv('ALERT_DEBOUNCE', 1)),
+        'alert_price_poll_interval': float(os.getenv('ALERT_PRICE_POLL_INTERVAL', 60)),
+        'ws_slow_client_policy': os.getenv('WS_SLOW_CLIENT_POLICY', 'coalesce'),
+        'ws_send_timeout': float(os.getenv('WS_SEND_TIMEOUT', 10)),
+        'chat_retrieval_timeout': float(os.getenv('CHAT_RETRIEVAL_TIMEOUT', 2)),
+        'chat_portfolio_timeout': float(os.getenv('CHAT_PORTFOLIO_TIMEOUT', 5)),
+        'chat_context_budget': float(os.getenv('CHAT_CONTEXT_BUDGET', 6)),
+        'chat_cache_similarity': float(os.getenv('CHAT_CACHE_SIMILARITY', 0.95)),
+        'chat_cache_max_entries': int(os.getenv('CHAT_CACHE_MAX_ENTRIES', 512)),
+        'chat_cache_max_ttl': float(os.getenv('CHAT_CACHE_MAX_TTL', 900)),
+        'chat_context_tokens': int(os.getenv('CHAT_CONTEXT_TOKENS', 3000)),
+        'conversation_store_url': os.getenv('CONVERSATION_STORE_URL'),
+        'conversation_max': int(os.getenv('CONVERSATION_MAX', 1000)),
+        'conversation_ttl': float(os.getenv('CONVERSATION_TTL', 3600)),
+        'chat_summary_trigger': int(os.getenv('CHAT_SUMMARY_TRIGGER', 0)),
+        'llm_max_concurrency': int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+        'llm_tokens_per_minute': os.getenv('LLM_TOKENS_PER_MINUTE'),  # e.g. "llama-3.3-70b-versatile=6000,llama-3.1-8b-instant=20000"
+        'llm_max_retries': int(os.getenv('LLM_MAX_RETRIES', 3)),
+        'llm_hedge_after': float(os.getenv('LLM_HEDGE_AFTER')) if os.getenv('LLM_HEDGE_AFTER') else None,
+        'chat_routing': int(os.getenv('CHAT_ROUTING', 1)),
+        'report_digest_dir': os.getenv('REPORT_DIGEST_DIR'),
+        'report_digest_concurrency': int(os.getenv('REPORT_DIGEST_CONCURRENCY', 4)),
+        'chat_prefetch': int(os.getenv('CHAT_PREFETCH', 1)),
+        'chat_prefetch_budget': float(os.getenv('CHAT_PREFETCH_BUDGET', 5)),
+        'chat_prefetch_max_symbols': int(os.getenv('CHAT_PREFETCH_MAX_SYMBOLS', 5)),
+        'chat_prefetch_ttl': float(os.getenv('CHAT_PREFETCH_TTL', 300)),
+        'symbol_universe_path': os.getenv('SYMBOL_UNIVERSE'),  # CSV: symbol,name,aliases
+        'retrieval_mode': os.getenv('RETRIEVAL_MODE', 'hybrid'),  # vector | lexical | hybrid
+        'chat_rerank_model': os.getenv('CHAT_RERANK_MODEL'),  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+        'chat_rerank_candidates': int(os.getenv('CHAT_RERANK_CANDIDATES', 30)),
+        'chat_rerank_keep': int(os.getenv('CHAT_RERANK_KEEP', 8)),
     }
 
     orchestrator = TradingSystemOrchestrator(config)
     yield
     # clean up events
+    await orchestrator.alert_engine.aclose()
+    orchestrator.llm_agent.conversations.close()
+    orchestrator.executor.shutdown()
+    await orchestrator.llm_gateway.aclose()
 
 
 app = FastAPI(title = "Trading API Server", lifespan=startup_event)
@@ -99,6 +146,37 @@ async def chat_endpoint(request: ChatRequest):
         print(f"[api][error] /api/chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Streaming chat as server-sent events.
+
+    Emits `data: {"chunk": ...}` events as the answer is generated, then a
+    final `data: {"done": true, "citations": [...], ...}` event. Failures
+    after the stream started are sent as an `event: error`.
+    """
+    print(f"[api] /api/chat/stream received. conversation_id={request.conversation_id}")
+
+    async def events():
+        chunks = 0
+        try:
+            async for item in orchestrator.llm_agent.chat_stream(
+                user_message=request.message,
+                user_portfolio=request.portfolio,
+                conversation_id=request.conversation_id
+            ):
+                chunks += 1
+                yield f"data: {json.dumps(item, default=str)}\n\n"
+            print(f"[api] /api/chat/stream completed with {chunks} events. conversation_id={request.conversation_id}")
+        except Exception as e:
+            print(f"[api][error] /api/chat/stream error: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.post("/api/analyze/stock")
 async def analyze_stock(request: StockAnalysisRequest):
     """Get comprehensive stock analysis"""
@@ -140,6 +218,23 @@ async def get_stock_report(symbol: str):
         print(f"[api][error] /api/stocks/{symbol}/report: {e}")
         raise HTTPException(status_code=500, detail=f"failed to get report for {symbol}: {e}")
 
+@app.get("/api/stocks/{symbol}/digest")
+async def get_stock_digest(symbol: str):
+    """Precomputed stock report (analysis snapshot plus LLM report).
+
+    Digests are refreshed by the daily flow; when new documents arrived for
+    the symbol since, the report is regenerated first, but only if its
+    inputs actually changed.
+    """
+    print(f"[api] /api/stocks/{symbol}/digest requested")
+    try:
+        digest = await orchestrator.llm_agent.get_report_digest(symbol)
+        print(f"[api] /api/stocks/{symbol}/digest completed")
+        return digest
+    except Exception as e:
+        print(f"[api][error] /api/stocks/{symbol}/digest: {e}")
+        raise HTTPException(status_code=500, detail=f"failed to get digest for {symbol}: {e}")
+
 @app.get("/api/news/{symbol}")
 async def get_recent_news(symbol: str, hours: int = 24):
     """Get recent news for symbol"""
@@ -157,12 +252,30 @@ async def get_recent_news(symbol: str, hours: int = 24):
         raise HTTPException(status_code=500, detail=f"failed to get recent news for {symbol}: {e}")
     
 @app.post("/api/screen")
-async def screen_stocks(symbols: List[str], min_score: float = 65):
-    """Screen stocks based for entry"""
-    print(f"[api] /api/screen screening {len(symbols)} symbols min_score={min_score}")
+async def screen_stocks(symbols: List[str], min_score: Optional[float] = None, mode: str = 'full',
+                        technical_cutoff: Optional[float] = None,
+                        sentiment_cutoff: Optional[float] = None,
+                        top_n: Optional[int] = None):
+    """Screen stocks based for entry
+
+    mode=pipeline runs the staged screening pipeline and reports per-stage
+    candidate counts and timings under `stages`.
+    """
+    print(f"[api] /api/screen screening {len(symbols)} symbols min_score={min_score} mode={mode}")
     try: 
+        if mode == 'pipeline':
+            result = await orchestrator.portfolio_manager.screen_candidates(
+                symbols,
+                min_score=min_score,
+                technical_cutoff=technical_cutoff,
+                sentiment_cutoff=sentiment_cutoff,
+                top_n=top_n
+            )
+            print(f"[api] /api/screen found {len(result['recommendations'])} recommendations")
+            return result
+
         recommendations = await screen_new_stocks(
-            symbols=symbols,
+            candidate_symbols=symbols,
             portfolio_manager=orchestrator.portfolio_manager,
             min_score=min_score
         )
@@ -172,30 +285,73 @@ async def screen_stocks(symbols: List[str], min_score: float = 65):
         print(f"[api][error] /api/screen: {e}")
         raise HTTPException(status_code=500, detail=f"failed to screen stocks: {e}")
     
+@app.get("/api/metrics")
+async def get_metrics():
+    """Executor pool sizes, throughput and queue depth, plus cache, alert, subscription and LLM stats"""
+    return {
+        'executor': orchestrator.executor.metrics(),
+        'analysis_cache': orchestrator.portfolio_manager.analysis_cache.stats(),
+        'alerts': orchestrator.alert_engine.stats(),
+        'subscriptions': orchestrator.alert_engine.hub.stats(),
+        'response_cache': orchestrator.response_cache.stats(),
+        'conversations': orchestrator.llm_agent.conversations.stats(),
+        'llm_gateway': orchestrator.llm_gateway.stats(),
+        'query_router': orchestrator.llm_agent.router.stats() if orchestrator.llm_agent.router else None,
+        'report_digests': orchestrator.report_digests.stats(),
+        'prefetch': orchestrator.prefetcher.stats() if orchestrator.prefetcher else None,
+        'reranker': orchestrator.llm_agent.reranker.stats() if orchestrator.llm_agent.reranker else None
+    }
+
 ##Web socket for real-time updates
 @app.websocket("/ws/updates")
 async def websocket_endpoint(websocket: WebSocket):
-    """Websocket endpoint for real-time updates."""
+    """Websocket endpoint for real-time updates.
+
+    Client messages (JSON text, or MessagePack binary):
+      {"portfolio": [...], "encoding": "json" | "msgpack"}  subscribe / replace symbols
+      {"type": "resync"}                                     request a fresh snapshot
+
+    Server messages carry a per-connection `seq`. Each subscribe or resync
+    gets a `snapshot` (the monitor_existing_positions result plus the
+    negotiated `encoding`); after that the alert engine sends `delta`
+    messages with only the changed fields per symbol, when new documents or
+    price bars change a held symbol. A client that sees a gap in `seq`
+    should send a resync. A client that can't keep up with `WS_SEND_TIMEOUT`
+    is closed with code 1011. msgpack falls back to JSON when not installed.
+    """
     await websocket.accept()
+    client_id = str(uuid.uuid4())
+    portfolio = []
+    encoding = 'json'
 
     try:
         while True:
-            data = await websocket.receive_json()
-            portfolio = data.get("portfolio", [])  
-            print(f"[api] /ws/updates - subscribe portfolio len={len(portfolio)}")
-
-            # Send updates every 60 seconds
-            while True:
-                try:
-                    analysis = await orchestrator.portfolio_manager.monitor_existing_positions(portfolio)
-                    await websocket.send_json(analysis)
-                    print(f"[api] /ws/updates - sent update for portfolio len={len(portfolio)}")
-                except Exception as e:
-                    print(f"[api][error] /ws/updates - error sending update: {e}")
-                await asyncio.sleep(60)
+            data = await ws_protocol.receive(websocket)
+            if data.get("type") == "resync":
+                print(f"[api] /ws/updates - resync requested")
+            else:
+                portfolio = data.get("portfolio", [])
+                encoding = ws_protocol.negotiate_encoding(data.get("encoding"))
+                print(f"[api] /ws/updates - subscribe portfolio len={len(portfolio)} encoding={encoding}")
+            orchestrator.alert_engine.subscribe(
+                client_id,
+                portfolio,
+                ws_protocol.make_sender(websocket, encoding),
+                # Dropped as too slow or broken: close so the client reconnects and resyncs
+                close=lambda: websocket.close(code=1011)
+            )
+
+            try:
+                analysis = await orchestrator.portfolio_manager.monitor_existing_positions(portfolio)
+                orchestrator.alert_engine.hub.send_snapshot(client_id, {**analysis, 'encoding': encoding})
+                print(f"[api] /ws/updates - queued snapshot for portfolio len={len(portfolio)}")
+            except Exception as e:
+                print(f"[api][error] /ws/updates - error building snapshot: {e}")
 
     except WebSocketDisconnect:
         print("Client disconnected")
+    finally:
+        orchestrator.alert_engine.unsubscribe(client_id)
 
 if __name__ == "__main__":
     import uvicorn
@@ -11,6 +11,11 @@ class ChatResponse(BaseModel):
     citations: List[Dict]
     conversation_id: str
     timestamp: str
+    cached: Optional[bool] = None
+    packed_tokens: Optional[int] = None
+    route: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
+    degraded: Optional[List[str]] = None
 
 class StockAnalysisRequest(BaseModel):
     symbol:str
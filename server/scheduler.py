@@ -2,13 +2,26 @@ from prefect import flow, task
 from prefect.task_runners import ConcurrentTaskRunner
 from datetime import datetime, timedelta
 import asyncio
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from ResearchAgent.agents.data_ingestion_agent import AlphaVantageAgent, DataSource, TwitterAgent, YFinanceAgent
 from ResearchAgent.agents.sentiment_agent import SentimentAnalysisAgent
 from ResearchAgent.rag.vector_store import VectorStoreManager
 from PortfolioManager.portfolio_manager import PortfolioManager
+from PortfolioManager.scoring import load_scoring_config
+from PortfolioManager.alerts import AlertEngine
+from PortfolioManager.subscriptions import SubscriptionHub
 from LLMAgent.investment_advisor_agent import InvestmentAdvisorAgent
+from LLMAgent.response_cache import SemanticResponseCache
+from LLMAgent.context_packer import ContextPacker
+from LLMAgent.conversation_store import create_conversation_store
+from LLMAgent.llm_gateway import LLMGateway, parse_rate_limits
+from LLMAgent.query_router import QueryRouter
+from LLMAgent.report_digests import ReportDigestStore
+from LLMAgent.prefetch import ContextPrefetcher
+from LLMAgent.symbol_recognizer import SymbolRecognizer
+from LLMAgent.reranker import CrossEncoderReranker
+from AnalysisAgent.executor import AnalysisExecutor
 
 class TradingSystemOrchestrator:
     """Orchestrates all agents and data flows within the trading system"""
@@ -44,20 +57,116 @@ class TradingSystemOrchestrator:
             )
         )
 
+        # Shared executor for blocking analysis work (yfinance, vector store, model inference)
+        self.executor = AnalysisExecutor(
+            io_workers=config.get('executor_io_workers', 8),
+            cpu_workers=config.get('executor_cpu_workers', 2)
+        )
+
         self.sentiment_agent = SentimentAnalysisAgent()
         self.vector_store = VectorStoreManager(
-            api_key=config.get('pinecone_api_key')
+            api_key=config.get('pinecone_api_key'),
+            retrieval_mode=config.get('retrieval_mode', 'vector')
         )
 
         # create portfolio manager before LLM agent so it can be passed in
         from PortfolioManager.portfolio_manager import PortfolioManager
-        self.portfolio_manager = PortfolioManager(self.vector_store, self.sentiment_agent)
+        self.portfolio_manager = PortfolioManager(
+            self.vector_store,
+            self.sentiment_agent,
+            executor=self.executor,
+            max_concurrency=config.get('analysis_max_concurrency', 8),
+            symbol_timeout=config.get('analysis_symbol_timeout', 30.0),
+            analysis_ttl=config.get('analysis_cache_ttl', 30.0),
+            screening_technical_cutoff=config.get('screening_technical_cutoff', 20.0),
+            screening_top_n=config.get('screening_top_n', 10),
+            scoring=load_scoring_config(config.get('scoring_config_path'))
+        )
+
+        # Websocket alerts: upserts and new price bars trigger re-scoring of held
+        # symbols; the hub shares symbols across clients and handles slow sockets
+        self.subscription_hub = SubscriptionHub(
+            slow_client_policy=config.get('ws_slow_client_policy', 'coalesce'),
+            send_timeout=config.get('ws_send_timeout', 10.0)
+        )
+        self.alert_engine = AlertEngine(
+            self.portfolio_manager,
+            vector_store=self.vector_store,
+            price_store=self.portfolio_manager.technical_analyzer.price_store,
+            debounce=config.get('alert_debounce', 1.0),
+            price_poll_interval=config.get('alert_price_poll_interval', 60.0),
+            hub=self.subscription_hub
+        )
+
+        # Chat answers are reused for near-identical questions until new
+        # documents for one of their symbols are upserted
+        self.response_cache = SemanticResponseCache(
+            similarity_threshold=config.get('chat_cache_similarity', 0.95),
+            max_entries=config.get('chat_cache_max_entries', 512),
+            max_ttl=config.get('chat_cache_max_ttl', 900.0)
+        )
+        self.vector_store.add_upsert_listener(self.response_cache.invalidate_symbols)
+
+        # One pooled, rate-limited LLM client shared by the agents
+        self.llm_gateway = LLMGateway(
+            api_key=config.get('groq_api_key'),
+            max_concurrency=config.get('llm_max_concurrency', 8),
+            tokens_per_minute=parse_rate_limits(config.get('llm_tokens_per_minute')),
+            max_retries=config.get('llm_max_retries', 3),
+            hedge_after=config.get('llm_hedge_after')
+        )
+
+        # Stock report digests; new documents for a symbol mark its digest stale
+        self.report_digests = ReportDigestStore(directory=config.get('report_digest_dir'))
+        self.vector_store.add_upsert_listener(self.report_digests.mark_stale)
+
+        # Context for the symbols of a chat turn is warmed for follow-ups
+        self.prefetcher = None
+        if config.get('chat_prefetch', 1):
+            self.prefetcher = ContextPrefetcher(
+                self.vector_store,
+                self.portfolio_manager,
+                self.executor,
+                budget=config.get('chat_prefetch_budget', 5.0),
+                max_symbols=config.get('chat_prefetch_max_symbols', 5),
+                ttl=config.get('chat_prefetch_ttl', 300.0)
+            )
+            self.vector_store.add_upsert_listener(self.prefetcher.invalidate)
+
+        # Symbols chat messages can refer to; symbols with ingested documents join the universe
+        self.symbol_recognizer = SymbolRecognizer.load(config.get('symbol_universe_path'))
+        self.vector_store.add_upsert_listener(self.symbol_recognizer.add_symbols)
 
         # InvestmentAdvisorAgent expects (vector_store, portfolio_manager, groq_api_key)
         self.llm_agent = InvestmentAdvisorAgent(
             self.vector_store,
             self.portfolio_manager,
-            groq_api_key=config.get('groq_api_key')
+            groq_api_key=config.get('groq_api_key'),
+            retrieval_timeout=config.get('chat_retrieval_timeout', 2.0),
+            portfolio_timeout=config.get('chat_portfolio_timeout', 5.0),
+            context_budget=config.get('chat_context_budget', 6.0),
+            response_cache=self.response_cache,
+            context_packer=ContextPacker(budget=config.get('chat_context_tokens', 3000)),
+            conversation_store=create_conversation_store(
+                redis_url=config.get('conversation_store_url'),
+                max_conversations=config.get('conversation_max', 1000),
+                ttl=config.get('conversation_ttl', 3600.0)
+            ),
+            summary_trigger=config.get('chat_summary_trigger', 0),
+            gateway=self.llm_gateway,
+            router=QueryRouter(
+                embed=self.vector_store.generate_embedding,
+                symbol_recognizer=self.symbol_recognizer
+            ) if config.get('chat_routing', 1) else None,
+            report_digests=self.report_digests,
+            prefetcher=self.prefetcher,
+            symbol_recognizer=self.symbol_recognizer,
+            reranker=CrossEncoderReranker(
+                model_name=config['chat_rerank_model'],
+                candidates=config.get('chat_rerank_candidates', 30),
+                keep=config.get('chat_rerank_keep', 8)
+            ) if config.get('chat_rerank_model') else None,
+            executor=self.executor
         )
         
 @task(name="Fetch Market Data", retries = 3, retry_delay_seconds=60)
@@ -156,23 +265,60 @@ async def analyze_portfolio(
 async def screen_new_stocks(
     candidate_symbols: List[str],
     portfolio_manager: PortfolioManager,
-    min_score: float = 65) -> List [Dict]:
-    """Screen new stocks for potential investment"""
-    print(f"[scheduler] screen_new_stocks starting for {len(candidate_symbols)} candidates min_score={min_score}")
-    recommendations = []
+    min_score: Optional[float] = None,
+    mode: str = 'full') -> List [Dict]:
+    """Screen new stocks for potential investment
+
+    mode='full' runs the full analysis for every candidate; mode='pipeline'
+    uses the staged screening pipeline (technical pre-filter, sentiment,
+    full analysis for the top N). min_score defaults to the portfolio
+    manager's scoring.entry_threshold.
+    """
+    if min_score is None:
+        min_score = portfolio_manager.scoring.entry_threshold
+    print(f"[scheduler] screen_new_stocks starting for {len(candidate_symbols)} candidates min_score={min_score} mode={mode}")
+    if mode == 'pipeline':
+        result = await portfolio_manager.screen_candidates(candidate_symbols, min_score=min_score)
+        for stage in result['stages']:
+            print(f"[scheduler] screen_new_stocks stage={stage['stage']} {stage['candidates_in']}->{stage['candidates_out']} in {stage['seconds']}s")
+        return result['recommendations']
 
-    for symbol in candidate_symbols:
-        try:
-            analysis = await portfolio_manager.analyze_stock_for_entry(symbol)  
-            if analysis['composite_score'] >= min_score:
-                recommendations.append(analysis)
-        except Exception as e:
-            print(f"[scheduler][error] Error analyzing {symbol}: {e}")
+    analyses, failures = await portfolio_manager.analyze_many(candidate_symbols)
+    for failure in failures:
+        print(f"[scheduler][error] Error analyzing {failure['symbol']}: {failure['error']}")
+
+    recommendations = [a.summary() for a in analyses if a.composite_score >= min_score]
 
     #Sort by composite score
     recommendations.sort(key = lambda x: x['composite_score'], reverse = True)
     return recommendations
 
+@task(name="Refresh Report Digests")
+async def refresh_report_digests(
+    symbols: List[str],
+    llm_agent: InvestmentAdvisorAgent,
+    max_concurrency: int = 4
+) -> Dict:
+    """Regenerate stock report digests whose inputs changed since the last run"""
+    print(f"[scheduler] refresh_report_digests starting for {len(symbols)} symbols")
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def refresh(symbol: str) -> bool:
+        async with semaphore:
+            _, regenerated = await llm_agent.refresh_report_digest(symbol)
+            return regenerated
+
+    results = await asyncio.gather(*[refresh(symbol) for symbol in symbols], return_exceptions=True)
+    counts = {'regenerated': 0, 'unchanged': 0, 'failed': 0}
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, Exception):
+            print(f"[scheduler][error] report digest for {symbol} failed: {result}")
+            counts['failed'] += 1
+        else:
+            counts['regenerated' if result else 'unchanged'] += 1
+    print(f"[scheduler] refresh_report_digests completed: {counts}")
+    return counts
+
 #Research Agents automatically updates periodically
 def _make_concurrent_task_runner(max_concurrent_tasks: int = 10):
     """Try common constructor argument names across Prefect versions.
@@ -229,11 +375,18 @@ async def daily_trading_system_update(
     new_recommendations = await screen_new_stocks(
         watchlist,
         orchestrator.portfolio_manager,
-        min_score=orchestrator.config.get('entry_score_threshold', 65)
+        min_score=orchestrator.config.get('entry_score_threshold'),
+        mode=orchestrator.config.get('screening_mode', 'full')
     )
         
     print(f"Found {len(new_recommendations)} new stock recommendations")
 
+    report_digests = await refresh_report_digests(
+        list(dict.fromkeys(portfolio + watchlist)),
+        orchestrator.llm_agent,
+        max_concurrency=orchestrator.config.get('report_digest_concurrency', 4)
+    )
+
     summary = {
         'date': datetime.now().isoformat(),
         'data_processed': {
@@ -243,6 +396,7 @@ async def daily_trading_system_update(
         },
         'portfolio_analysis': portfolio_analysis,
         'new_opportunities': new_recommendations[:10],  # Top 10
+        'report_digests': report_digests,
         'alerts': []
     }
 
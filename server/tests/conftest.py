@@ -19,3 +19,60 @@ def event_loop():
     loop = asyncio.new_event_loop()
     yield loop
     loop.close()
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    """Builds an InvestmentAdvisorAgent around test doubles, without Groq or model loading"""
+    from AnalysisAgent.executor import AnalysisExecutor
+    from LLMAgent.conversation_store import InMemoryConversationStore
+    from LLMAgent.investment_advisor_agent import InvestmentAdvisorAgent
+    from LLMAgent.symbol_recognizer import SymbolRecognizer
+
+    def make(vector_store, portfolio_manager=None, **limits):
+        monkeypatch.setattr(InvestmentAdvisorAgent, '__init__', lambda self, vector_store, portfolio_manager, groq_api_key=None: None)
+        agent = InvestmentAdvisorAgent(None, None)
+        agent.vector_store = vector_store
+        agent.portfolio_manager = portfolio_manager
+        agent.conversations = InMemoryConversationStore()
+        agent.system_prompt = "system"
+        agent.model = 'dummy'
+        agent.executor = AnalysisExecutor(io_workers=4, cpu_workers=0)
+        agent.retrieval_timeout = limits.get('retrieval_timeout', 2.0)
+        agent.portfolio_timeout = limits.get('portfolio_timeout', 5.0)
+        agent.context_budget = limits.get('context_budget', 6.0)
+        agent.response_cache = limits.get('response_cache')
+        agent.context_packer = limits.get('context_packer')
+        agent.summary_trigger = limits.get('summary_trigger', 0)
+        agent.summary_keep_recent = limits.get('summary_keep_recent', 4)
+        agent._summarizing = {}
+        agent.gateway = limits.get('gateway')
+        agent.router = limits.get('router')
+        agent.report_digests = limits.get('report_digests')
+        agent.prefetcher = limits.get('prefetcher')
+        agent.symbol_recognizer = limits.get('symbol_recognizer') or SymbolRecognizer.load()
+        agent.reranker = limits.get('reranker')
+        return agent
+
+    return make
+
+
+@pytest.fixture
+def analysis_record():
+    """Builds a StockAnalysis with the given score and recommendation"""
+    from PortfolioManager.records import StockAnalysis, Recommendation, SentimentSummary, TechnicalSummary
+
+    def record(symbol, score, action='BUY', confidence='HIGH'):
+        sentiment = SentimentSummary.from_aggregate({'overall_sentiment': 'positive'}, 75.0, 1)
+        return StockAnalysis(
+            symbol=symbol,
+            composite_score=score,
+            recommendation=Recommendation(action, confidence, score),
+            news=sentiment,
+            social=sentiment,
+            technical=TechnicalSummary(composite_score=50),
+            document_ids=('1',),
+            analyzed_at='now'
+        )
+
+    return record
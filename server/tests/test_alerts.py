@@ -0,0 +1,191 @@
+import asyncio
+
+from PortfolioManager.alerts import AlertEngine
+from PortfolioManager.analysis_cache import AnalysisCache
+
+
+class FakePM:
+    def __init__(self, record):
+        self.record = record
+        self.analysis_cache = AnalysisCache(ttl_seconds=60)
+        self.scores = {'AAPL': 70.0, 'MSFT': 55.0, 'XOM': 40.0}
+        self.calls = []
+
+    async def analyze_many(self, symbols):
+        self.calls.append(list(symbols))
+        return [self.record(s, self.scores[s]) for s in symbols], []
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.listeners = []
+
+    def add_upsert_listener(self, callback):
+        self.listeners.append(callback)
+
+    def upsert(self, symbols):
+        for listener in self.listeners:
+            listener(symbols)
+
+
+def test_upserts_rescore_only_held_symbols_and_notify_holders(analysis_record):
+    pm = FakePM(analysis_record)
+    vs = FakeVectorStore()
+    engine = AlertEngine(pm, vector_store=vs, debounce=0.01)
+    inbox = {'a': [], 'b': []}
+
+    async def run():
+        async def send_a(msg):
+            inbox['a'].append(msg)
+
+        async def send_b(msg):
+            inbox['b'].append(msg)
+
+        engine.subscribe('a', ['AAPL', 'MSFT'], send_a)
+        engine.subscribe('b', ['MSFT'], send_b)
+
+        vs.upsert(['AAPL', 'TSLA'])  # TSLA isn't held by anyone
+        vs.upsert(['AAPL'])          # same burst, re-scored once
+        await asyncio.sleep(0.05)
+
+        pm.scores['MSFT'] = 62.0
+        vs.upsert(['MSFT'])
+        await asyncio.sleep(0.05)
+
+        vs.upsert(['MSFT'])  # nothing changed this time
+        await asyncio.sleep(0.05)
+
+        engine.unsubscribe('a')
+        engine.unsubscribe('b')
+
+    asyncio.run(run())
+
+    assert pm.calls == [['AAPL'], ['MSFT'], ['MSFT']]
+    assert [sorted(m['changes']) for m in inbox['a']] == [['AAPL'], ['MSFT']]
+    assert [sorted(m['changes']) for m in inbox['b']] == [['MSFT']]
+    assert inbox['b'][0]['changes']['MSFT']['composite_score'] == 62.0
+    assert engine.stats()['clients'] == 0
+
+
+def test_mark_dirty_invalidates_cached_analyses(analysis_record):
+    pm = FakePM(analysis_record)
+    engine = AlertEngine(pm)
+
+    async def run():
+        await pm.analysis_cache.get_or_compute('AAPL', lambda: asyncio.sleep(0, result='cached'))
+        engine.mark_dirty(['AAPL'])
+        return pm.analysis_cache.stats()['entries']
+
+    assert asyncio.run(run()) == 0
+
+
+def test_failed_push_drops_the_client(analysis_record):
+    pm = FakePM(analysis_record)
+    engine = AlertEngine(pm, debounce=0)
+
+    async def run():
+        async def broken(msg):
+            raise RuntimeError('socket closed')
+
+        engine.subscribe('gone', ['AAPL'], broken)
+        await engine.process(['AAPL'])
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert engine.stats()['clients'] == 0
+    assert engine.hub.stats()['clients_dropped'] == 1
+
+
+def test_price_refresh_reports_symbols_with_new_bars():
+    import pandas as pd
+    from AnalysisAgent.executor import AnalysisExecutor
+    from AnalysisAgent.price_data import PriceDataStore
+
+    days = pd.date_range('2025-03-03', periods=3, freq='B')
+    bars = {
+        'AAPL': pd.DataFrame({'Close': [1.0, 2.0, 3.0], 'Volume': [10, 10, 10]}, index=days),
+        'MSFT': pd.DataFrame({'Close': [5.0, 5.0, 5.0], 'Volume': [10, 10, 10]}, index=days),
+    }
+    executor = AnalysisExecutor(io_workers=1, cpu_workers=0)
+    store = PriceDataStore(executor=executor)
+    store._download = lambda symbols, period=None: {s: bars[s].copy() for s in symbols}
+    seen = []
+    store.add_listener(seen.append)
+
+    async def run():
+        await store.get_history(['AAPL', 'MSFT'])
+        unchanged = await store.refresh(['AAPL', 'MSFT'])
+        bars['AAPL'].loc[pd.Timestamp('2025-03-06')] = [4.0, 12]
+        bars['MSFT'].iloc[-1, 0] = 5.5  # intraday update of the latest bar
+        changed = await store.refresh(['AAPL', 'MSFT'])
+        close, _ = await store.get_history(['AAPL'])
+        return unchanged, changed, close
+
+    try:
+        unchanged, changed, close = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert unchanged == []
+    assert changed == ['AAPL', 'MSFT']
+    assert seen == [['AAPL', 'MSFT']]
+    assert close['AAPL'].iloc[-1] == 4.0
+
+
+def test_price_refresh_loads_full_history_for_uncached_symbols():
+    import pandas as pd
+    from AnalysisAgent.executor import AnalysisExecutor
+    from AnalysisAgent.price_data import PriceDataStore
+
+    days = pd.date_range('2025-01-01', periods=60, freq='B')
+    full = pd.DataFrame({'Close': range(60), 'Volume': [10] * 60}, index=days, dtype=float)
+    available = {}
+    periods = []
+
+    def download(symbols, period=None):
+        periods.append(period)
+        frame = available.get('AAPL')
+        if frame is None:
+            return {}
+        return {s: (frame.tail(5) if period == '5d' else frame).copy() for s in symbols}
+
+    executor = AnalysisExecutor(io_workers=1, cpu_workers=0)
+    store = PriceDataStore(executor=executor)
+    store._download = download
+
+    async def run():
+        await store.get_history(['AAPL'])  # first download comes back empty
+        available['AAPL'] = full
+        changed = await store.refresh(['AAPL'])
+        close, _ = await store.get_history(['AAPL'])
+        return changed, close
+
+    try:
+        changed, close = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert changed == ['AAPL']
+    assert close.shape == (60, 1)
+    assert '5d' not in periods
+
+
+def test_aclose_stops_engine_tasks_and_client_writers(analysis_record):
+    class IdlePriceStore:
+        def add_listener(self, callback):
+            pass
+
+    engine = AlertEngine(FakePM(analysis_record), price_store=IdlePriceStore(), price_poll_interval=60)
+
+    async def run():
+        async def send(msg):
+            pass
+
+        engine.subscribe('a', ['AAPL'], send)
+        tasks = list(engine._tasks) + [engine.hub._clients['a'].writer]
+        await engine.aclose()
+        return tasks
+
+    tasks = asyncio.run(run())
+    assert len(tasks) == 3 and all(t.done() for t in tasks)
+    assert engine._tasks == [] and len(engine.hub) == 0
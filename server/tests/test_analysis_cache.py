@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from PortfolioManager.analysis_cache import AnalysisCache
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = AnalysisCache(ttl_seconds=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {'symbol': 'AAPL', 'composite_score': 70}
+
+    async def run():
+        results = await asyncio.gather(*[cache.get_or_compute('AAPL', compute) for _ in range(10)])
+        again = await cache.get_or_compute('AAPL', compute)
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    assert again is results[0]
+
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['coalesced'] == 9
+    assert stats['hits'] == 1
+
+
+def test_expired_and_failed_entries_are_recomputed():
+    cache = AnalysisCache(ttl_seconds=0.05)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError('upstream down')
+        return calls
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute('MSFT', compute)
+        first = await cache.get_or_compute('MSFT', compute)
+        await asyncio.sleep(0.1)
+        second = await cache.get_or_compute('MSFT', compute)
+        return first, second
+
+    assert asyncio.run(run()) == (2, 3)
+
+
+def test_cancelled_caller_does_not_cancel_shared_computation():
+    cache = AnalysisCache(ttl_seconds=60)
+
+    async def compute():
+        await asyncio.sleep(0.1)
+        return 'done'
+
+    async def run():
+        impatient = asyncio.ensure_future(
+            asyncio.wait_for(cache.get_or_compute('NVDA', compute), timeout=0.01)
+        )
+        patient = asyncio.ensure_future(cache.get_or_compute('NVDA', compute))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(run()) == 'done'
+
+
+def test_is_warm_follows_expiry_and_invalidation():
+    cache = AnalysisCache(ttl_seconds=60)
+
+    async def compute():
+        return 1
+
+    asyncio.run(cache.get_or_compute('AAPL', compute))
+    assert cache.is_warm('AAPL') and not cache.is_warm('MSFT')
+    cache.invalidate('AAPL')
+    assert not cache.is_warm('AAPL')
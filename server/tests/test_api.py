@@ -2,6 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 import server.main as server_app
+from PortfolioManager.alerts import AlertEngine
 
 
 @pytest.fixture
@@ -42,6 +43,7 @@ def client(monkeypatch):
     fake.llm_agent = FakeOrchestrator.LLMAgent()
     fake.portfolio_manager = FakeOrchestrator.PortfolioManager()
     fake.vector_store = type('VS', (), {'get_recent_documents': lambda self, symbol, hours, data_types: []})()
+    fake.alert_engine = AlertEngine(fake.portfolio_manager)
 
     monkeypatch.setattr(server_app, 'orchestrator', fake)
     client = TestClient(server_app.app)
@@ -57,6 +59,27 @@ def test_chat_endpoint(client):
     assert body['conversation_id'] == 'test'
 
 
+def test_chat_stream_endpoint(client, monkeypatch):
+    import json
+    import server.main as server_app
+
+    async def chat_stream(user_message, user_portfolio=None, conversation_id=None):
+        for word in ('Buy', ' more'):
+            yield {'chunk': word, 'conversation_id': conversation_id}
+        yield {'done': True, 'citations': [], 'conversation_id': conversation_id}
+
+    monkeypatch.setattr(server_app.orchestrator.llm_agent, 'chat_stream', chat_stream, raising=False)
+
+    with client.stream('POST', '/api/chat/stream', json={'message': 'hello', 'conversation_id': 'sse'}) as r:
+        assert r.status_code == 200
+        assert r.headers['content-type'].startswith('text/event-stream')
+        events = [json.loads(line[len('data: '):]) for line in r.iter_lines() if line.startswith('data: ')]
+
+    assert ''.join(e.get('chunk', '') for e in events) == 'Buy more'
+    assert events[-1]['done'] is True
+    assert events[-1]['conversation_id'] == 'sse'
+
+
 def test_analyze_stock(client):
     payload = {'symbol': 'AAPL'}
     r = client.post('/api/analyze/stock', json=payload)
@@ -87,7 +110,7 @@ def test_stock_report_endpoint(client):
     assert body.get('symbol') == 'AAPL'
 
 
-def test_screen_stocks_endpoint(client):
+def test_screen_stocks_endpoint(client, monkeypatch):
     # set up two symbols where only one meets threshold
     payload = ['AAPL', 'MSFT']
     # Prefect-wrapped function in code may expect different param names; monkeypatch a tolerant stub
@@ -101,10 +124,7 @@ def test_screen_stocks_endpoint(client):
         return [ {'symbol': s, 'composite_score': 80} for s in syms if 80 >= min_score ]
 
     # Patch the function used by the endpoint
-    monkeypatch = client.__class__
-    import importlib
-    server_app = importlib.import_module('app')
-    server_app.screen_new_stocks = _fake_screen
+    monkeypatch.setattr(server_app, 'screen_new_stocks', _fake_screen)
 
     r = client.post('/api/screen?min_score=70', json=payload)
     assert r.status_code == 200
@@ -113,6 +133,25 @@ def test_screen_stocks_endpoint(client):
     assert isinstance(body['recommendations'], list)
 
 
+def test_screen_stocks_pipeline_mode(client):
+    import server.main as server_app
+
+    class PM:
+        async def screen_candidates(self, symbols, min_score=65, technical_cutoff=None, sentiment_cutoff=None, top_n=None):
+            return {
+                'recommendations': [{'symbol': symbols[0], 'composite_score': 80}],
+                'stages': [{'stage': 'technical_prefilter', 'candidates_in': len(symbols), 'candidates_out': 1, 'seconds': 0.01}],
+                'failed_symbols': []
+            }
+
+    server_app.orchestrator.portfolio_manager = PM()
+    r = client.post('/api/screen?mode=pipeline&top_n=5', json=['AAPL', 'MSFT'])
+    assert r.status_code == 200
+    body = r.json()
+    assert body['recommendations'][0]['symbol'] == 'AAPL'
+    assert body['stages'][0]['stage'] == 'technical_prefilter'
+
+
 def test_chat_error_returns_500(client, monkeypatch):
     # Use the client fixture's orchestrator via monkeypatch
     import server.main as server_app
@@ -142,12 +181,6 @@ def test_get_recent_news_error(client, monkeypatch):
 def test_websocket_updates(client, monkeypatch):
     import server.main as server_app
 
-    # make sleep a no-op so the inner loop won't delay
-    async def _nosleep(_):
-        return None
-
-    monkeypatch.setattr(server_app.asyncio, 'sleep', _nosleep)
-
     # ensure portfolio_manager returns expected shape
     class PM:
         async def monitor_existing_positions(self, portfolio):
@@ -165,3 +198,27 @@ def test_websocket_updates(client, monkeypatch):
         ws.send_json({'portfolio': ['AAPL']})
         msg = ws.receive_json()
         assert 'portfolio_health' in msg
+        assert (msg['type'], msg['seq'], msg['encoding']) == ('snapshot', 1, 'json')
+
+        # a second subscribe gets a fresh snapshot; the client stays registered once
+        ws.send_json({'portfolio': ['AAPL', 'MSFT']})
+        assert 'portfolio_health' in ws.receive_json()
+        assert server_app.orchestrator.alert_engine.stats()['clients'] == 1
+
+        ws.send_json({'type': 'resync'})
+        msg = ws.receive_json()
+        assert (msg['type'], msg['seq']) == ('snapshot', 3)
+
+    assert server_app.orchestrator.alert_engine.stats()['clients'] == 0
+
+
+def test_stock_digest_endpoint(client, monkeypatch):
+    import server.main as server_app
+
+    async def get_report_digest(symbol):
+        return {'symbol': symbol, 'report': '# NVDA', 'input_key': 'k'}
+
+    monkeypatch.setattr(server_app.orchestrator.llm_agent, 'get_report_digest', get_report_digest, raising=False)
+    r = client.get('/api/stocks/NVDA/digest')
+    assert r.status_code == 200
+    assert r.json()['report'] == '# NVDA'
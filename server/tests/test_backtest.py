@@ -0,0 +1,122 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from PortfolioManager.backtest import BacktestEngine, composite_scores, recommendation_actions, sentiment_score_frame, simulate
+from PortfolioManager.portfolio_manager import PortfolioManager
+from PortfolioManager.scoring import ScoringConfig
+
+
+def _bars(n=160, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=n, freq='B')
+    close = pd.DataFrame({
+        'UP': 100 * np.cumprod(1 + 0.004 + rng.normal(0, 0.005, n)),
+        'DOWN': 100 * np.cumprod(1 - 0.004 + rng.normal(0, 0.005, n)),
+    }, index=dates)
+    volume = pd.DataFrame(1_000_000.0, index=dates, columns=close.columns)
+    return close, volume
+
+
+def test_vectorized_scoring_matches_portfolio_manager():
+    config = ScoringConfig(news_weight=0.5, social_weight=0.1, technical_weight=0.4, buy_threshold=58)
+    pm = PortfolioManager(vector_store=object(), sentiment_agent=object(), scoring=config)
+
+    rng = np.random.default_rng(0)
+    news_ratios = rng.dirichlet([1, 1, 1], size=50)
+    social_ratios = rng.dirichlet([1, 1, 1], size=50)
+    technical = rng.uniform(0, 100, size=50)
+
+    def as_sentiment(r):
+        return {'positive_ratio': r[0], 'negative_ratio': r[1], 'neutral_ratio': r[2]}
+
+    expected = np.array([
+        pm._calculate_composite_score(as_sentiment(n), as_sentiment(s), {'composite_score': t})
+        for n, s, t in zip(news_ratios, social_ratios, technical)
+    ])
+    news = 50 + 50 * (news_ratios[:, 0] - news_ratios[:, 1])
+    social = 50 + 50 * (social_ratios[:, 0] - social_ratios[:, 1])
+
+    composite = composite_scores(technical, news, social, config)
+    np.testing.assert_allclose(composite, expected, atol=0.011)
+
+    actions = recommendation_actions(expected, config)
+    assert list(actions) == [pm._generate_recommendation(score)['action'] for score in expected]
+
+
+def test_positions_enter_on_threshold_and_exit_on_sell():
+    config = ScoringConfig(news_weight=0.0, social_weight=0.0, technical_weight=1.0)
+    technical = np.array([[50.0], [66.0], [55.0], [45.0], [35.0], [50.0], [70.0]])
+    returns = np.full_like(technical, 0.01)
+    zeros = np.zeros_like(technical)
+
+    result = simulate(technical, zeros, zeros, returns, config)
+
+    assert result['_positions'][:, 0].tolist() == [0, 1, 1, 1, 0, 0, 1]
+    assert result['trades'] == 2
+    assert result['exposure'] == pytest.approx(4 / 7)
+    assert result['total_return'] == pytest.approx(1.01 ** 4 - 1)
+
+
+def test_sentiment_frame_uses_trailing_window_and_next_bar():
+    dates = pd.date_range('2024-01-01', periods=5, freq='B')  # Mon..Fri
+    documents = pd.DataFrame([
+        {'symbol': 'UP', 'data_type': 'news', 'timestamp': '2024-01-01T10:00:00', 'sentiment': 'positive'},
+        {'symbol': 'UP', 'data_type': 'news', 'timestamp': '2024-01-02T10:00:00', 'sentiment': 'negative'},
+        {'symbol': 'UP', 'data_type': 'news', 'timestamp': '2023-12-31T10:00:00', 'sentiment': 'positive'},
+        {'symbol': 'UP', 'data_type': 'social_media', 'timestamp': '2024-01-03T10:00:00', 'sentiment': 'negative'},
+    ])
+
+    scores = sentiment_score_frame(documents, 'news', dates, ['UP', 'DOWN'], window=2)
+
+    # Sunday's document lands on Monday's bar, weekday documents on the next day's
+    assert scores['UP'].tolist() == [100.0, 100.0, 50.0, 0.0, 50.0]
+    assert (scores['DOWN'] == 50.0).all()
+
+
+def test_document_on_a_bar_only_moves_the_position_from_the_next_bar():
+    dates = pd.date_range('2024-01-01', periods=5, freq='B')
+    documents = pd.DataFrame([
+        {'symbol': 'UP', 'data_type': 'news', 'timestamp': '2024-01-03T14:00:00', 'sentiment': 'positive'},
+    ])
+    news = sentiment_score_frame(documents, 'news', dates, ['UP'], window=1).to_numpy()
+    neutral = np.full_like(news, 50.0)
+    returns = np.full_like(news, 0.01)
+    config = ScoringConfig(news_weight=1.0, social_weight=0.0, technical_weight=0.0)
+
+    positions = simulate(neutral, news, neutral, returns, config)['_positions'][:, 0]
+
+    # published during Wednesday's session: the position opens at Thursday's close
+    assert positions.tolist() == [0, 0, 0, 1, 1]
+
+
+def test_engine_runs_over_stored_history(tmp_path):
+    close, volume = _bars()
+    bars = close.stack().rename('close').to_frame().join(volume.stack().rename('volume'))
+    bars.index.names = ['date', 'symbol']
+    prices_path = tmp_path / 'prices.csv'
+    bars.reset_index().to_csv(prices_path, index=False)
+
+    documents_path = tmp_path / 'documents.jsonl'
+    documents_path.write_text('\n'.join(
+        json.dumps({'symbol': 'UP', 'data_type': 'news', 'sentiment': 'positive', 'timestamp': str(day)})
+        for day in close.index
+    ))
+
+    engine = BacktestEngine.from_files(str(prices_path), str(documents_path), start='2024-04-01')
+    # neutral sentiment caps the composite below the default entry threshold
+    result = engine.run(ScoringConfig(entry_threshold=50), include_series=True)
+
+    assert result['start'] == '2024-04-01'
+    assert result['symbols'] == 2
+    positions = result['positions']
+    # Only the rising symbol with positive news coverage is ever held
+    assert positions['UP'].sum() > 0
+    assert positions['DOWN'].sum() == 0
+    assert result['max_drawdown'] <= 0
+
+    strict = engine.run(ScoringConfig(entry_threshold=99))
+    assert strict['trades'] == 0
+    assert strict['total_return'] == 0
@@ -0,0 +1,67 @@
+from LLMAgent.context_packer import ContextPacker
+
+
+def _render(doc):
+    return f"Title: {doc['title']}\nContent: {doc.get('content', '')}"
+
+
+def _doc(i, score, words=200):
+    return {'id': str(i), 'title': f"Doc {i}", 'score': score,
+            'content': f"Lead sentence {i}. " + "filler " * words}
+
+
+def test_everything_fits_untouched():
+    packer = ContextPacker(budget=2000)
+    docs = [_doc(1, 0.9, words=10), _doc(2, 0.5, words=10)]
+    history = [{'role': 'user', 'content': 'hi'}, {'role': 'assistant', 'content': 'hello'}]
+    packed = packer.pack(docs, history, "Portfolio OK", render=_render)
+
+    assert packed['documents'] == docs
+    assert packed['history'] == history
+    assert packed['portfolio_summary'] == "Portfolio OK"
+    assert (packed['summarized'], packed['dropped']) == (0, 0)
+
+
+def test_budget_is_split_by_relevance():
+    packer = ContextPacker(budget=400, history_share=0.25, portfolio_share=0.1, min_excerpt_tokens=20)
+    docs = [_doc(1, 0.9), _doc(2, 0.6), _doc(3, 0.1), _doc(4, 0.05)]
+    history = [{'role': 'user', 'content': 'old ' * 400}, {'role': 'assistant', 'content': 'old answer'},
+               {'role': 'user', 'content': 'recent'}, {'role': 'assistant', 'content': 'recent answer'}]
+    packed = packer.pack(docs, history, "Health: GOOD\n" * 50, render=_render)
+
+    tokens = packed['tokens']
+    assert sum(tokens.values()) <= 400
+    assert tokens['portfolio'] <= 40
+    assert [m['content'] for m in packed['history']] == ['recent', 'recent answer']
+
+    kept = {d['id']: d for d in packed['documents']}
+    assert '1' in kept
+    lengths = [len(kept[i]['content']) for i in ('1', '2') if i in kept]
+    assert lengths == sorted(lengths, reverse=True)
+    # low-ranked sources are reduced to their lead sentence or dropped
+    for i in ('3', '4'):
+        assert i not in kept or kept[i]['content'] == f"Lead sentence {i}."
+    assert packed['summarized'] + packed['dropped'] >= 1
+
+
+def test_truncate_respects_token_limit():
+    packer = ContextPacker()
+    text = "word " * 500
+    cut = packer.truncate(text, 50)
+    assert packer.count(cut) <= 50
+    assert cut.endswith("…")
+    assert packer.truncate("short", 50) == "short"
+
+
+def test_conversation_summary_counts_against_the_history_budget():
+    packer = ContextPacker(budget=400, history_share=0.25)
+    history = [{'role': 'user', 'content': 'recent ' * 20}, {'role': 'assistant', 'content': 'recent answer'}]
+
+    without = packer.pack([], history, "", render=_render)
+    packed = packer.pack([], history, "", render=_render, summary="earlier " * 500)
+
+    assert without['history'] == history and without['summary'] is None
+    assert packed['tokens']['history'] <= 100
+    assert packer.count(packed['summary']) < 100
+    # the summary takes the room the older exchange used
+    assert packed['history'] == []
@@ -0,0 +1,208 @@
+import time
+
+import pytest
+
+from LLMAgent.conversation_store import (
+    InMemoryConversationStore, RedisConversationStore, decode_message, encode_message
+)
+
+
+class FakeRedis:
+    """In-process stand-in for the redis-py calls RedisConversationStore makes"""
+
+    def __init__(self):
+        self.lists = {}
+        self.strings = {}
+        self.expiry = {}
+
+    def _alive(self, key):
+        if key in self.expiry and self.expiry[key] <= time.monotonic():
+            self.lists.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.lists
+
+    def exists(self, key):
+        return int(self._alive(key))
+
+    def lrange(self, key, start, end):
+        if not self._alive(key):
+            return []
+        values = self.lists[key]
+        return values[start:] if end == -1 else values[start:end + 1]
+
+    def rpush(self, key, *values):
+        self._alive(key)
+        self.lists.setdefault(key, []).extend(values)
+
+    def llen(self, key):
+        return len(self.lists[key]) if self._alive(key) else 0
+
+    def ltrim(self, key, start, end):
+        if self._alive(key):
+            values = self.lists[key]
+            self.lists[key] = values[start:] if end == -1 else values[start:end + 1]
+
+    def expire(self, key, seconds):
+        self.expiry[key] = time.monotonic() + seconds
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value, ex=None):
+        self.strings[key] = value.encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.lists.pop(key, None)
+            self.strings.pop(key, None)
+            self.expiry.pop(key, None)
+
+    def pipeline(self):
+        client = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+                self.immediate = False
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.calls = []
+
+            def watch(self, *keys):
+                self.immediate = True  # commands run right away until multi()
+
+            def multi(self):
+                self.immediate = False
+
+            def __getattr__(self, name):
+                if self.immediate:
+                    return getattr(client, name)
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+            def execute(self):
+                return [getattr(client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+        return Pipeline()
+
+
+def _exchange(i):
+    return [{'role': 'user', 'content': f"q{i}"}, {'role': 'assistant', 'content': f"a{i}"}]
+
+
+def test_encoding_round_trip_is_compact():
+    message = {'role': 'assistant', 'content': 'Hold NVDA — see [Source 1]'}
+    assert decode_message(encode_message(message)) == message
+    assert encode_message({'role': 'user', 'content': 'hi'}) == b'["u","hi"]'
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda: InMemoryConversationStore(max_messages=4),
+    lambda: RedisConversationStore(FakeRedis(), max_messages=4),
+])
+def test_store_caps_messages_per_conversation(make_store):
+    store = make_store()
+    assert [store.append('c1', _exchange(i)) for i in range(3)] == [2, 4, 4]
+
+    assert 'c1' in store and 'c2' not in store
+    assert [m['content'] for m in store['c1']] == ['q1', 'a1', 'q2', 'a2']
+    assert store.get('c2', []) == []
+
+    assert store.compact('c1', 'asked q0 and q1', _exchange(1))
+    assert store.summary('c1') == 'asked q0 and q1'
+    assert [m['content'] for m in store['c1']] == ['q2', 'a2']
+    assert store.snapshot('c1') == (store['c1'], 'asked q0 and q1')
+    assert store.snapshot('c2') == ([], None)
+
+    store.delete('c1')
+    assert 'c1' not in store
+    assert store.summary('c1') is None
+    with pytest.raises(KeyError):
+        store['c1']
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda: InMemoryConversationStore(max_messages=4),
+    lambda: RedisConversationStore(FakeRedis(), max_messages=4),
+])
+def test_compact_is_skipped_when_appends_trimmed_the_head(make_store):
+    store = make_store()
+    store.append('c1', _exchange(0))
+    store.append('c1', _exchange(1))
+    older = store['c1'][:2]
+
+    # a turn stored while the summary was being written pushes q0/a0 out
+    store.append('c1', _exchange(2))
+    assert not store.compact('c1', 'asked q0', older)
+    assert [m['content'] for m in store['c1']] == ['q1', 'a1', 'q2', 'a2']
+    assert store.summary('c1') is None
+
+
+def test_memory_store_evicts_lru_and_expires_idle_conversations():
+    store = InMemoryConversationStore(max_conversations=2, ttl=0.05)
+    store.append('a', _exchange(0))
+    store.append('b', _exchange(0))
+    store.append('a', _exchange(1))  # 'b' is now least recently used
+    store.append('c', _exchange(0))
+
+    assert 'b' not in store
+    assert len(store) == 2
+    time.sleep(0.06)
+    assert 'a' not in store
+    stats = store.stats()
+    assert (stats['evicted'], stats['expired']) == (1, 1)
+
+
+def test_redis_store_is_shared_between_workers():
+    client = FakeRedis()
+    worker_a = RedisConversationStore(client, ttl=60)
+    worker_b = RedisConversationStore(client, ttl=60)
+
+    worker_a.append('cid', _exchange(0))
+    worker_b.append('cid', _exchange(1))
+
+    assert [m['content'] for m in worker_a['cid']] == ['q0', 'a0', 'q1', 'a1']
+    assert client.expiry['conversation:cid'] > time.monotonic()
+
+
+def test_agent_keeps_redis_calls_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+    from AnalysisAgent.executor import AnalysisExecutor
+    from LLMAgent.investment_advisor_agent import InvestmentAdvisorAgent
+
+    class ThreadCheckingRedis(FakeRedis):
+        def pipeline(self):
+            threads.add(threading.get_ident())
+            return super().pipeline()
+
+    threads = set()
+    monkeypatch.setattr(InvestmentAdvisorAgent, '__init__', lambda self: None)
+    agent = InvestmentAdvisorAgent()
+    agent.conversations = RedisConversationStore(ThreadCheckingRedis(), max_messages=4)
+    agent.executor = AnalysisExecutor(io_workers=1, cpu_workers=0)
+
+    async def run():
+        stored = await agent._store_conversation('cid', 'q', 'a')
+        history, summary = await agent._conversation_call(agent.conversations.snapshot, 'cid')
+        return threading.get_ident(), stored, history, summary
+
+    loop_thread, stored, history, summary = asyncio.run(run())
+    agent.executor.shutdown()
+
+    assert (stored, summary) == (2, None)
+    assert [m['content'] for m in history] == ['q', 'a']
+    assert threads and loop_thread not in threads
+
+
+def test_redis_summary_ttl_slides_with_the_messages():
+    client = FakeRedis()
+    store = RedisConversationStore(client, max_messages=4, ttl=60)
+    store.append('cid', _exchange(0))
+    store.compact('cid', 'asked q0', _exchange(0))
+    client.expiry.pop('conversation:cid:summary', None)
+
+    store.append('cid', _exchange(1))
+    assert client.expiry['conversation:cid:summary'] > time.monotonic()
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from AnalysisAgent.executor import AnalysisExecutor
+from AnalysisAgent.technical_analysis import calculate_indicators
+
+
+def test_run_io_does_not_block_event_loop():
+    executor = AnalysisExecutor(io_workers=4, cpu_workers=0)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        t = asyncio.create_task(ticker())
+        results = await asyncio.gather(*[executor.run_io(time.sleep, 0.1) for _ in range(4)])
+        t.cancel()
+        return results, ticks
+
+    try:
+        results, ticks = asyncio.run(run())
+        # the loop kept running while the four blocking sleeps overlapped
+        assert len(results) == 4
+        assert ticks >= 5
+
+        metrics = executor.metrics()
+        assert metrics['io']['submitted'] == 4
+        assert metrics['io']['completed'] == 4
+        assert metrics['io']['queue_depth'] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_queue_depth_and_failures_are_tracked():
+    executor = AnalysisExecutor(io_workers=1, cpu_workers=0)
+
+    def boom():
+        raise ValueError('bad symbol')
+
+    async def run():
+        sleeps = [asyncio.ensure_future(executor.run_io(time.sleep, 0.05)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        depth = executor.metrics()['io']['queue_depth']
+        await asyncio.gather(*sleeps)
+        with pytest.raises(ValueError):
+            await executor.run_io(boom)
+        return depth
+
+    try:
+        depth = asyncio.run(run())
+        assert depth == 2
+        metrics = executor.metrics()['io']
+        assert metrics['failed'] == 1
+        assert metrics['max_queue_depth'] == 2
+    finally:
+        executor.shutdown()
+
+
+def test_run_cpu_uses_process_pool():
+    executor = AnalysisExecutor(io_workers=1, cpu_workers=1)
+    close = pd.Series(np.linspace(100, 130, 60))
+    hist = pd.DataFrame({'Close': close, 'Volume': np.full(60, 1e6)})
+
+    try:
+        indicators = asyncio.run(executor.run_cpu(calculate_indicators, hist))
+        assert indicators == calculate_indicators(hist)
+        assert executor.metrics()['cpu']['completed'] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_components_shut_down_only_executors_they_created():
+    from AnalysisAgent.price_data import PriceDataStore
+
+    shared = AnalysisExecutor(io_workers=1, cpu_workers=0)
+    borrowed = PriceDataStore(executor=shared)
+    owned = PriceDataStore()
+
+    borrowed.close()
+    owned.close()
+
+    assert not shared._io_pool._shutdown
+    assert owned.executor._io_pool._shutdown
+    shared.shutdown()
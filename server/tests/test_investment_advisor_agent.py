@@ -1,7 +1,9 @@
 import pytest
 import asyncio
 
+from LLMAgent.conversation_store import InMemoryConversationStore
 from LLMAgent.investment_advisor_agent import InvestmentAdvisorAgent
+from LLMAgent.symbol_recognizer import SymbolRecognizer
 
 
 class DummyVS:
@@ -28,9 +30,10 @@ def test_investment_agent_symbol_extraction_and_message_build(monkeypatch):
     # Attach required attributes manually
     agent.vector_store = DummyVS()
     agent.portfolio_manager = DummyPM()
-    agent.conversations = {}
+    agent.conversations = InMemoryConversationStore()
     agent.system_prompt = "system"
     agent.model = 'dummy'
+    agent.symbol_recognizer = SymbolRecognizer.load()
 
     # Monkeypatch _call_groq_api to return a fake response object with choices and usage
     class FakeResponse:
@@ -45,12 +48,317 @@ def test_investment_agent_symbol_extraction_and_message_build(monkeypatch):
 
     # Test symbol extraction
     symbols = agent._extract_symbols('Should we buy $AAPL and MSFT?')
-    assert 'AAPL' in symbols or 'MSFT' in symbols
+    assert symbols == ['AAPL', 'MSFT']
 
     # Test message building and storage
-    msgs = agent._build_messages('Hello', 'ctx', 'portfolio', 'cid')
+    msgs = agent._build_messages('Hello', 'ctx', 'portfolio', [])
     assert any(m['role'] == 'user' for m in msgs)
 
     # Test storing conversation
-    agent._store_conversation('cid', 'q', 'a')
+    assert asyncio.run(agent._store_conversation('cid', 'q', 'a')) == 2
     assert 'cid' in agent.conversations
+
+
+def test_context_assembly_runs_components_concurrently(make_agent):
+    import time
+
+    class SlowVS:
+        def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+            time.sleep(0.2)
+            return [{'id': f"{symbol}-1", 'symbol': symbol, 'score': 0.9}]
+
+    class SlowPM(DummyPM):
+        async def monitor_existing_positions(self, portfolio):
+            await asyncio.sleep(0.2)
+            return await super().monitor_existing_positions(portfolio)
+
+    agent = make_agent(SlowVS(), SlowPM())
+    started = time.perf_counter()
+    context = asyncio.run(agent._assemble_context('Compare $AAPL and $MSFT', ['AAPL']))
+    elapsed = time.perf_counter() - started
+    agent.executor.shutdown()
+
+    assert sorted(d['id'] for d in context['documents']) == ['AAPL-1', 'MSFT-1']
+    assert 'Portfolio Health Overview' in context['portfolio_summary']
+    assert context['degraded'] == []
+    assert elapsed < 0.5  # three 0.2s components overlap
+    assert {'symbol_extraction', 'retrieval:AAPL', 'retrieval:MSFT', 'portfolio_analysis', 'context_assembly'} <= set(context['timings'])
+
+
+def test_context_assembly_degrades_when_components_are_late(make_agent):
+    import time
+
+    class MixedVS:
+        def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+            if symbol == 'MSFT':
+                time.sleep(0.5)
+            if symbol == 'TSLA':
+                raise RuntimeError('index unavailable')
+            return [{'id': f"{symbol}-1", 'symbol': symbol, 'score': 0.5}]
+
+    class StuckPM(DummyPM):
+        async def monitor_existing_positions(self, portfolio):
+            await asyncio.sleep(5)
+
+    agent = make_agent(MixedVS(), StuckPM(), retrieval_timeout=0.1, context_budget=0.3)
+    started = time.perf_counter()
+    context = asyncio.run(agent._assemble_context('$AAPL $MSFT $TSLA', ['AAPL']))
+    elapsed = time.perf_counter() - started
+    agent.executor.shutdown(wait=False)
+
+    assert [d['id'] for d in context['documents']] == ['AAPL-1']
+    assert sorted(context['degraded']) == ['portfolio_analysis', 'retrieval:MSFT', 'retrieval:TSLA']
+    assert context['portfolio_summary'] == ''
+    assert elapsed < 0.6
+
+
+def test_chat_stream_does_not_block_the_event_loop(make_agent):
+    import time
+
+    agent = make_agent(DummyVS())
+
+    def chunk(text):
+        delta = type('d', (), {'content': text})()
+        return type('c', (), {'choices': [type('ch', (), {'delta': delta})()]})()
+
+    def slow_stream():
+        for text in ('Hold ', 'for ', 'now'):
+            time.sleep(0.05)  # blocking network read inside the SDK
+            yield chunk(text)
+
+    agent._open_groq_stream = lambda messages, temperature, max_tokens: slow_stream()
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        items = [item async for item in agent.chat_stream('What about AAPL?', conversation_id='cid')]
+        task.cancel()
+        return items, ticks
+
+    items, ticks = asyncio.run(run())
+    agent.executor.shutdown()
+
+    assert ''.join(i.get('chunk', '') for i in items) == 'Hold for now'
+    assert items[-1]['done'] is True
+    assert agent.conversations['cid'][-1]['content'] == 'Hold for now'
+    # the loop kept running while chunks were being read
+    assert ticks >= 10
+
+
+def test_repeated_question_is_answered_from_the_response_cache(make_agent):
+    from LLMAgent.response_cache import SemanticResponseCache
+
+    class EmbeddingVS(DummyVS):
+        def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+            return [{'id': 'nvda-1', 'symbol': 'NVDA', 'score': 0.8, 'timestamp': '2025-01-01T10:00:00'}]
+
+        def generate_embedding(self, text):
+            return [1.0, 0.0] if 'NVDA' in text.upper() else [0.0, 1.0]
+
+    calls = []
+
+    def call_groq(messages, temperature, max_tokens):
+        calls.append(messages)
+        message = type('m', (), {'content': 'Hold NVDA [Source 1]'})()
+        return type('r', (), {
+            'choices': [type('c', (), {'message': message})()],
+            'usage': type('u', (), {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15})
+        })()
+
+    cache = SemanticResponseCache()
+    agent = make_agent(EmbeddingVS(), response_cache=cache)
+    agent._call_groq_api = call_groq
+
+    first = asyncio.run(agent.chat('Should I buy NVDA?', conversation_id='a'))
+    second = asyncio.run(agent.chat('should i buy nvda?', conversation_id='b'))
+    cache.invalidate_symbols(['NVDA'])
+    third = asyncio.run(agent.chat('Should I buy NVDA?', conversation_id='c'))
+    agent.executor.shutdown()
+
+    assert (first['cached'], second['cached'], third['cached']) == (False, True, False)
+    assert second['answer'] == first['answer']
+    assert second['usage']['total_tokens'] == 0
+    assert len(calls) == 2
+    assert agent.conversations['b'][-1]['content'] == 'Hold NVDA [Source 1]'
+
+
+def test_chat_prompt_is_packed_into_the_token_budget(make_agent):
+    from LLMAgent.context_packer import ContextPacker
+
+    class WordyVS(DummyVS):
+        def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+            return [
+                {'id': f"{symbol}-{i}", 'symbol': symbol, 'score': 1.0 - i / 10, 'title': f"Story {i}",
+                 'content': "Shares moved sharply. " + "Analysts weighed in at length. " * 80,
+                 'data_type': 'news', 'sentiment': 'positive', 'sentiment_score': 0.5}
+                for i in range(5)
+            ]
+
+    seen = {}
+
+    def call_groq(messages, temperature, max_tokens):
+        seen['messages'] = messages
+        message = type('m', (), {'content': 'See [Source 1]'})()
+        return type('r', (), {
+            'choices': [type('c', (), {'message': message})()],
+            'usage': type('u', (), {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2})
+        })()
+
+    packer = ContextPacker(budget=800)
+    agent = make_agent(WordyVS(), context_packer=packer)
+    agent._call_groq_api = call_groq
+    agent.conversations.append('cid', [{'role': 'user', 'content': 'earlier question ' * 100},
+                                       {'role': 'assistant', 'content': 'earlier answer ' * 100},
+                                       {'role': 'user', 'content': 'And $AAPL?'},
+                                       {'role': 'assistant', 'content': 'AAPL looks fine.'}])
+
+    result = asyncio.run(agent.chat('What about $AAPL?', conversation_id='cid'))
+    agent.executor.shutdown()
+
+    prompt_tokens = sum(packer.count(m['content']) for m in seen['messages'])
+    assert result['packed_tokens'] == prompt_tokens
+    assert prompt_tokens < 800 + packer.count(agent.system_prompt) + 100
+    # only the recent exchange fits the history share
+    assert [m['content'] for m in seen['messages'][1:-1]] == ['And $AAPL?', 'AAPL looks fine.']
+    assert 'Story 0' in seen['messages'][-1]['content']
+    # citations follow the sources that made it into the prompt
+    assert len(result['citations']) == seen['messages'][-1]['content'].count(']\nType: ')
+
+
+def test_older_exchanges_are_folded_into_a_running_summary(make_agent):
+    prompts, summaries = [], []
+
+    def reply(content):
+        message = type('m', (), {'content': content})()
+        return type('r', (), {
+            'choices': [type('c', (), {'message': message})()],
+            'usage': type('u', (), {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2})
+        })()
+
+    def call_groq(messages, temperature, max_tokens):
+        prompts.append(messages)
+        return reply(f"answer {len(prompts)}")
+
+    def call_quick(messages, temperature, max_tokens):
+        summaries.append(messages[-1]['content'])
+        return reply(f"summary {len(summaries)}")
+
+    agent = make_agent(DummyVS(), summary_trigger=4, summary_keep_recent=2)
+    agent._call_groq_api = call_groq
+    agent._call_quick_model = call_quick
+
+    async def run():
+        for i in range(1, 5):
+            await agent.chat(f"question {i}", conversation_id='cid')
+            # the answer is returned before the summary is written
+            assert agent.conversations.summary('cid') == (f"summary {i - 2}" if i > 2 else None)
+            await asyncio.gather(*agent._summarizing.values())
+
+    asyncio.run(run())
+    agent.executor.shutdown()
+
+    assert len(summaries) == 3
+    assert 'Current summary:\nsummary 1' in summaries[1]
+    assert [m['content'] for m in agent.conversations['cid']] == ['question 4', 'answer 4']
+    # the last prompt carries the summary plus only the recent exchange
+    history = prompts[-1][1:-1]
+    assert history[0] == {'role': 'system', 'content': 'Summary of the earlier conversation:\nsummary 2'}
+    assert [m['content'] for m in history[1:]] == ['question 3', 'answer 3']
+
+
+def test_agent_calls_go_through_the_gateway(make_agent):
+    import json
+    import httpx
+    from LLMAgent.llm_gateway import LLMGateway
+
+    seen = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        seen.append((body['model'], body['stream']))
+        if body['stream']:
+            event = {'choices': [{'delta': {'content': 'streamed'}}]}
+            return httpx.Response(200, text=f"data: {json.dumps(event)}\n\ndata: [DONE]\n\n")
+        return httpx.Response(200, json={'choices': [{'message': {'content': f"from {body['model']}"}}],
+                                         'usage': {'prompt_tokens': 3, 'completion_tokens': 2, 'total_tokens': 5}})
+
+    async def run():
+        gateway = LLMGateway(api_key='test', transport=httpx.MockTransport(handler))
+        agent = make_agent(DummyVS(), gateway=gateway)
+        chat = await agent.chat('Is AAPL a buy?', conversation_id='c1')
+        quick = await agent.answer_quick_question('What is a P/E ratio?')
+        streamed = [item async for item in agent.chat_stream('And MSFT?', conversation_id='c2')]
+        await gateway.aclose()
+        agent.executor.shutdown()
+        return chat, quick, streamed
+
+    chat, quick, streamed = asyncio.run(run())
+    assert chat['answer'] == 'from dummy'
+    assert chat['usage']['total_tokens'] == 5
+    assert quick['answer'] == 'from llama-3.1-8b-instant'
+    assert streamed[0]['chunk'] == 'streamed'
+    assert seen == [('dummy', False), ('llama-3.1-8b-instant', False), ('dummy', True)]
+
+
+def test_router_sends_definitional_questions_to_the_quick_path(make_agent):
+    from LLMAgent.query_router import QueryRouter
+
+    class CountingVS(DummyVS):
+        queries = 0
+
+        def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+            CountingVS.queries += 1
+            return []
+
+    def reply(content):
+        message = type('m', (), {'content': content})()
+        return type('r', (), {
+            'choices': [type('c', (), {'message': message})()],
+            'usage': type('u', (), {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2})
+        })()
+
+    router = QueryRouter()
+    agent = make_agent(CountingVS(), router=router)
+    agent._call_groq_api = lambda messages, temperature, max_tokens: reply('full answer')
+    agent._call_quick_model = lambda messages, temperature, max_tokens: reply('quick answer')
+
+    quick = asyncio.run(agent.chat('What is a P/E ratio?', conversation_id='c'))
+    assert (quick['route'], quick['answer'], CountingVS.queries) == ('quick', 'quick answer', 0)
+
+    full = asyncio.run(agent.chat('Should I buy $NVDA?', conversation_id='c'))
+    agent.executor.shutdown()
+    assert (full['route'], full['answer']) == ('rag', 'full answer')
+    assert CountingVS.queries > 0
+    assert [m['content'] for m in agent.conversations['c']][::2] == ['What is a P/E ratio?', 'Should I buy $NVDA?']
+    assert router.stats()['routed'] == {'quick': 1, 'rag': 1}
+
+
+def test_summary_trigger_is_clamped_to_the_store_cap():
+    agent = InvestmentAdvisorAgent(
+        DummyVS(), DummyPM(), groq_api_key='test',
+        conversation_store=InMemoryConversationStore(max_messages=6), summary_trigger=50
+    )
+    assert agent.summary_trigger == 6
+    agent.close()
+
+
+def test_agent_runs_blocking_work_on_a_shared_executor():
+    from AnalysisAgent.executor import AnalysisExecutor
+
+    executor = AnalysisExecutor(io_workers=2, cpu_workers=0)
+    agent = InvestmentAdvisorAgent(DummyVS(), DummyPM(), groq_api_key='test', executor=executor)
+    agent._call_groq_api = lambda messages, temperature, max_tokens: 'answer'
+    answer = asyncio.run(agent._complete([], 0.3, 100))
+    agent.close()  # not the agent's to shut down
+
+    assert answer == 'answer'
+    assert executor.metrics()['io']['completed'] == 1
+    assert asyncio.run(executor.run_io(len, 'abc')) == 3
+    executor.shutdown()
@@ -0,0 +1,40 @@
+from ResearchAgent.rag.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def _index():
+    index = BM25Index()
+    index.add('a', "Apple unveils iPhone 16 Pro with 3.5x zoom", {'symbol': 'AAPL', 'data_type': 'news', 'sentiment_score': 0.4})
+    index.add('b', "Apple shares slip as iPhone demand cools in China", {'symbol': 'AAPL', 'data_type': 'social_media', 'sentiment_score': -0.3})
+    index.add('c', "Nvidia H200 shipments ramp; data center revenue up 112%", {'symbol': 'NVDA', 'data_type': 'news', 'sentiment_score': 0.7})
+    return index
+
+
+def test_tokenize_keeps_tickers_and_figures():
+    assert tokenize("BRK.B rose 3.5% after P&G's Q3") == ['brk.b', 'rose', '3.5', 'after', 'p&g', 's', 'q3']
+
+
+def test_bm25_ranks_exact_terms_under_filters():
+    index = _index()
+    assert [d['id'] for d in index.search("iPhone 16 Pro")] == ['a', 'b']
+    assert index.search("H200")[0]['symbol'] == 'NVDA'
+    assert [d['id'] for d in index.search("iPhone", data_types=['social_media'])] == ['b']
+    assert index.search("iPhone", min_sentiment_score=0.5) == []
+    assert index.search("iPhone", symbol='NVDA') == []
+
+
+def test_readding_a_document_replaces_it():
+    index = _index()
+    index.add('a', "Apple reports record services revenue", {'symbol': 'AAPL'})
+    index.remove('c')
+    assert len(index) == 2
+    assert [d['id'] for d in index.search("iPhone")] == ['b']
+    assert index.search("H200") == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [{'id': 'x', 'score': 0.9}, {'id': 'y', 'score': 0.8}, {'id': 'z', 'score': 0.7}]
+    lexical = [{'id': 'z', 'score': 12.0}, {'id': 'w', 'score': 3.0}]
+    fused = reciprocal_rank_fusion([dense, lexical], top_k=2)
+    assert [d['id'] for d in fused] == ['z', 'x']
+    assert fused[0]['fused_score'] == 1 / 63 + 1 / 61
+    assert fused[0]['score'] == 0.7
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from LLMAgent.llm_gateway import LLMGateway, TokenBucket, parse_rate_limits
+
+
+def _completion(content, total_tokens=10):
+    return {'choices': [{'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': total_tokens - 2, 'completion_tokens': 2, 'total_tokens': total_tokens}}
+
+
+def _gateway(handler, **kwargs):
+    kwargs.setdefault('backoff_base', 0.001)
+    return LLMGateway(api_key='test', transport=httpx.MockTransport(handler), **kwargs)
+
+
+MESSAGES = [{'role': 'user', 'content': 'Should I buy NVDA?'}]
+
+
+def test_retries_rate_limits_and_server_errors():
+    statuses = [429, 503, 200]
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        status = statuses.pop(0)
+        if status != 200:
+            return httpx.Response(status, headers={'retry-after': '0'})
+        return httpx.Response(200, json=_completion('Hold'))
+
+    async def run():
+        gateway = _gateway(handler)
+        response = await gateway.chat(MESSAGES, model='m', max_tokens=50)
+        await gateway.aclose()
+        return response, gateway.stats()
+
+    response, stats = asyncio.run(run())
+    assert response.choices[0].message.content == 'Hold'
+    assert response.usage.total_tokens == 10
+    assert requests[0]['model'] == 'm' and requests[0]['max_tokens'] == 50
+    assert (stats['attempts'], stats['retries'], stats['failures']) == (3, 2, 0)
+
+
+def test_gives_up_after_max_retries_and_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(500 if len(calls) < 10 else 400)
+
+    async def run():
+        gateway = _gateway(handler, max_retries=2)
+        with pytest.raises(httpx.HTTPStatusError):
+            await gateway.chat(MESSAGES, model='m')
+        assert len(calls) == 3
+
+        calls.extend([0] * 10)
+        with pytest.raises(httpx.HTTPStatusError):
+            await gateway.chat(MESSAGES, model='m')
+        assert len(calls) == 14
+        await gateway.aclose()
+
+    asyncio.run(run())
+
+
+def test_global_concurrency_limit():
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return httpx.Response(200, json=_completion('ok'))
+
+    async def run():
+        gateway = _gateway(handler, max_concurrency=3)
+        await asyncio.gather(*[gateway.chat(MESSAGES, model='m') for _ in range(10)])
+        await gateway.aclose()
+
+    asyncio.run(run())
+    assert peak == 3
+
+
+def test_backoff_releases_the_concurrency_slot():
+    finished = []
+
+    def handler(request):
+        question = json.loads(request.content)['messages'][0]['content']
+        if question == 'limited' and 'limited' not in finished:
+            finished.append('limited')
+            return httpx.Response(429, headers={'retry-after': '0.3'})
+        finished.append(question)
+        return httpx.Response(200, json=_completion(question))
+
+    async def run():
+        gateway = _gateway(handler, max_concurrency=1, backoff_max=1.0)
+        limited = asyncio.create_task(gateway.chat([{'role': 'user', 'content': 'limited'}], model='m'))
+        await asyncio.sleep(0.05)
+        # runs while the first request waits out its Retry-After
+        await asyncio.wait_for(gateway.chat([{'role': 'user', 'content': 'other'}], model='m'), timeout=0.2)
+        await limited
+        await gateway.aclose()
+
+    asyncio.run(run())
+    assert finished == ['limited', 'other', 'limited']
+
+
+def test_hedged_request_takes_the_faster_response():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1)  # first attempt stalls
+            return httpx.Response(200, json=_completion('slow'))
+        return httpx.Response(200, json=_completion('fast'))
+
+    async def run():
+        gateway = _gateway(handler, hedge_after=0.05)
+        started = time.perf_counter()
+        response = await gateway.chat(MESSAGES, model='m', hedge=True)
+        elapsed = time.perf_counter() - started
+        await gateway.aclose()
+        return response, elapsed, gateway.stats()
+
+    response, elapsed, stats = asyncio.run(run())
+    assert response.choices[0].message.content == 'fast'
+    assert elapsed < 0.5
+    assert (stats['hedges'], stats['hedge_wins']) == (1, 1)
+
+
+def test_token_bucket_paces_requests_per_model():
+    assert parse_rate_limits('a=600, b=1200') == {'a': 600, 'b': 1200}
+
+    async def run():
+        bucket = TokenBucket(tokens_per_minute=6000)  # 100 tokens/s
+        assert await bucket.acquire(6000) == 0
+        started = time.perf_counter()
+        await bucket.acquire(10)
+        return time.perf_counter() - started
+
+    assert 0.05 < asyncio.run(run()) < 0.5
+
+
+def test_stream_yields_content_deltas():
+    def handler(request):
+        assert json.loads(request.content)['stream'] is True
+        events = [{'choices': [{'delta': {'content': text}}]} for text in ('Hold ', 'for ', 'now')]
+        body = ''.join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=body, headers={'content-type': 'text/event-stream'})
+
+    async def run():
+        gateway = _gateway(handler)
+        chunks = [c async for c in gateway.stream(MESSAGES, model='m')]
+        await gateway.aclose()
+        return chunks
+
+    assert asyncio.run(run()) == ['Hold ', 'for ', 'now']
+
+
+def test_hedge_is_charged_to_the_token_bucket():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return httpx.Response(200, json=_completion('ok', total_tokens=10))
+
+    async def run():
+        gateway = _gateway(handler, hedge_after=0.05, tokens_per_minute={'m': 6000})
+        await gateway.chat(MESSAGES, model='m', max_tokens=100, hedge=True)
+        bucket = gateway._buckets['m']
+        used = bucket.capacity - bucket.tokens
+        await gateway.aclose()
+        return used
+
+    estimate = LLMGateway.estimate_tokens(MESSAGES, 100)
+    # both requests charged, only the winner's unused estimate refunded
+    # (less what the bucket refilled meanwhile)
+    assert estimate < asyncio.run(run()) <= estimate + 10
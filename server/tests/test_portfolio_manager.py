@@ -44,3 +44,147 @@ def test_portfolio_manager_analysis(monkeypatch):
     result = asyncio.run(run())
     assert result['symbol'] == 'TEST'
     assert 'composite_score' in result
+
+
+def test_analyze_many_bounds_concurrency_and_reports_failures(analysis_record):
+    import asyncio
+
+    pm = PortfolioManager(vector_store=DummyVS(), sentiment_agent=None, max_concurrency=3, symbol_timeout=0.5)
+
+    running = 0
+    peak = 0
+
+    async def fake_analyze(symbol):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            if symbol == 'SLOW':
+                await asyncio.sleep(5)
+            if symbol == 'BAD':
+                raise RuntimeError('no data')
+            await asyncio.sleep(0.05)
+            return analysis_record(symbol, 70)
+        finally:
+            running -= 1
+
+    pm.analyze_stock = fake_analyze
+    pm.risk_analyzer = None
+    symbols = ['A', 'SLOW', 'B', 'BAD', 'C', 'D', 'E']
+
+    result = asyncio.run(pm.monitor_existing_positions(symbols))
+
+    assert peak <= 3
+    assert [a['symbol'] for a in result['detailed_analyses']] == ['A', 'B', 'C', 'D', 'E']
+    failed = {f['symbol']: f['error'] for f in result['failed_symbols']}
+    assert set(failed) == {'SLOW', 'BAD'}
+    assert 'timed out' in failed['SLOW']
+    assert result['portfolio_health']['position_breakdown']['buy'] == 5
+
+
+def test_screen_candidates_runs_stages_on_shrinking_sets(analysis_record):
+    import asyncio
+    import pandas as pd
+
+    pm = PortfolioManager(vector_store=DummyVS(), sentiment_agent=None, screening_technical_cutoff=20, screening_top_n=2)
+
+    class UniverseAnalyzer:
+        async def analyze_universe(self, symbols):
+            return pd.Series({'A': 40.0, 'B': 35.0, 'C': 30.0, 'D': 5.0})
+
+    pm.technical_analyzer = UniverseAnalyzer()
+
+    sentiment_calls = []
+
+    async def fake_sentiment(symbol):
+        sentiment_calls.append(symbol)
+        ratio = {'A': 0.9, 'B': 0.8, 'C': 0.1}[symbol]
+        s = {'positive_ratio': ratio, 'negative_ratio': 0.0, 'neutral_ratio': 1 - ratio}
+        return [], s, s
+
+    full_calls = []
+
+    async def fake_analyze(symbol, sentiment=None):
+        full_calls.append(symbol)
+        assert sentiment is not None  # stage 2's sentiment is reused
+        return analysis_record(symbol, {'A': 80, 'B': 60}[symbol])
+
+    pm._analyze_sentiment = fake_sentiment
+    pm.analyze_stock = fake_analyze
+
+    result = asyncio.run(pm.screen_candidates(['A', 'B', 'C', 'D', 'E'], min_score=65, sentiment_cutoff=50))
+
+    # D fails the technical cut-off and E has no price data
+    assert sorted(sentiment_calls) == ['A', 'B', 'C']
+    # C's estimate is below the sentiment cut-off
+    assert full_calls == ['A', 'B']
+    assert [r['symbol'] for r in result['recommendations']] == ['A']
+    assert [(s['stage'], s['candidates_in'], s['candidates_out']) for s in result['stages']] == [
+        ('technical_prefilter', 5, 3),
+        ('sentiment', 3, 2),
+        ('full_analysis', 2, 1),
+    ]
+
+
+def test_screen_candidates_scores_sentiment_once_per_symbol():
+    import asyncio
+    import pandas as pd
+
+    pm = PortfolioManager(vector_store=DummyVS(), sentiment_agent=None, screening_technical_cutoff=20)
+
+    class Analyzer:
+        async def analyze_universe(self, symbols):
+            return pd.Series({'A': 60.0, 'B': 55.0})
+
+        async def analyze(self, symbol):
+            return {'composite_score': {'A': 60.0, 'B': 55.0}[symbol]}
+
+    sentiment_calls = []
+
+    async def fake_sentiment(symbol):
+        sentiment_calls.append(symbol)
+        s = {'positive_ratio': 0.8, 'negative_ratio': 0.0, 'neutral_ratio': 0.2}
+        return [{'id': f"{symbol}-1", 'data_type': 'news'}], s, s
+
+    pm.technical_analyzer = Analyzer()
+    pm._analyze_sentiment = fake_sentiment
+
+    result = asyncio.run(pm.screen_candidates(['A', 'B'], min_score=65, sentiment_cutoff=50))
+
+    assert sorted(sentiment_calls) == ['A', 'B']
+    assert [r['symbol'] for r in result['recommendations']] == ['A', 'B']
+
+
+def test_summary_projection_drops_per_text_detail():
+    import asyncio
+
+    class FakeSentiment:
+        def aggregate_sentiment(self, texts, source='financial'):
+            return {
+                'overall_sentiment': 'positive',
+                'overall_confidence': 0.8,
+                'positive_ratio': 0.6,
+                'negative_ratio': 0.2,
+                'neutral_ratio': 0.2,
+                'individual_sentiments': [{'sentiment': 'positive'} for _ in texts]
+            }
+
+    class DummyTechAnalyzer:
+        async def analyze(self, symbol):
+            return {'composite_score': 50}
+
+    pm = PortfolioManager(vector_store=DummyVS(), sentiment_agent=FakeSentiment())
+    pm.technical_analyzer = DummyTechAnalyzer()
+    pm.risk_analyzer = None
+
+    detail = asyncio.run(pm.analyze_stock_for_entry('TEST'))
+    assert detail['sentiment_analysis']['news']['document_count'] == 1
+    assert 'individual_sentiments' not in detail['sentiment_analysis']['news']
+    assert len(detail['supporting_documents']) == 2
+
+    result = asyncio.run(pm.monitor_existing_positions(['TEST']))
+    summary = result['detailed_analyses'][0]
+    assert summary['document_ids'] == ['1', '2']
+    assert summary['sentiment_scores'] == {'news': 70.0, 'social': 70.0}
+    assert 'supporting_documents' not in summary
+    assert 'sentiment_analysis' not in summary
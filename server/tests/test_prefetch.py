@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+import numpy as np
+
+from AnalysisAgent.executor import AnalysisExecutor
+from PortfolioManager.analysis_cache import AnalysisCache
+from LLMAgent.prefetch import ContextPrefetcher
+
+
+_VOCAB = ['chips', 'demand', 'lawsuit', 'earnings', 'guidance']
+
+
+def _embed(text):
+    text = text.lower()
+    return np.array([1.0 + text.count(word) * 5 for word in _VOCAB], dtype=np.float32)
+
+
+class PoolVS:
+    def __init__(self):
+        self.queried = []
+        self.embedded = []
+        self.docs = {
+            'NVDA': [
+                {'id': 'n1', 'symbol': 'NVDA', 'data_type': 'news', 'title': 'Chips', 'content': 'Chips demand up.'},
+                {'id': 'n2', 'symbol': 'NVDA', 'data_type': 'news', 'title': 'Lawsuit', 'content': 'A lawsuit was filed.'},
+            ]
+        }
+
+    def generate_embedding(self, text):
+        self.embedded.append(text)
+        return _embed(text)
+
+    def fetch_vectors(self, ids):
+        docs = [doc for pool in self.docs.values() for doc in pool if doc['id'] in ids]
+        return {doc['id']: _embed(f"{doc['title']} {doc['content']}") for doc in docs}
+
+    def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+        self.queried.append(symbol)
+        return [{**doc, 'score': 0.5} for doc in self.docs.get(symbol, [])][:top_k]
+
+    def get_recent_documents(self, symbol, hours, data_types):
+        return list(self.docs.get(symbol, []))
+
+
+class AnalyzePM:
+    def __init__(self, analysis_ttl=30.0):
+        self.analyzed = []
+        self.analysis_cache = AnalysisCache(ttl_seconds=analysis_ttl)
+
+    async def analyze_many(self, symbols):
+        self.analyzed.extend(symbols)
+
+        async def analyze(symbol):
+            return type('a', (), {'symbol': symbol})()
+
+        analyses = [await self.analysis_cache.get_or_compute(s, lambda s=s: analyze(s)) for s in symbols]
+        return analyses, {}
+
+
+def _prefetcher(**kwargs):
+    return ContextPrefetcher(PoolVS(), AnalyzePM(), AnalysisExecutor(io_workers=2, cpu_workers=0), **kwargs)
+
+
+def test_prefetch_warms_items_and_ranks_follow_ups_locally():
+    prefetcher = _prefetcher()
+
+    async def run():
+        await prefetcher.schedule(['NVDA', 'NVDA'])
+        return prefetcher.retrieve('NVDA', _embed("any lawsuit news?"), top_k=1)
+
+    docs = asyncio.run(run())
+    assert prefetcher.portfolio_manager.analyzed == ['NVDA']
+    assert [d['id'] for d in docs] == ['n2']
+    # pool vectors come from the index; nothing is re-embedded
+    assert prefetcher.vector_store.embedded == []
+    assert prefetcher.recent_documents('NVDA')[0]['id'] == 'n1'
+    assert prefetcher.retrieve('AMD', _embed("chips"), top_k=1) is None
+
+    stats = prefetcher.stats()
+    assert stats['retrieval'] == {'prefetched': 1, 'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    assert stats['recent_documents']['hit_rate'] == 1.0
+    assert stats['runs'] == {'started': 1, 'over_budget': 0}
+
+
+def test_prefetch_is_dropped_on_upsert_and_expiry():
+    prefetcher = _prefetcher(ttl=0.05)
+    asyncio.run(prefetcher.prefetch(['NVDA']))
+    prefetcher.note_analysis(['NVDA'])
+    prefetcher.invalidate(['NVDA'])
+    assert prefetcher.retrieve('NVDA', _embed("chips")) is None
+
+    asyncio.run(prefetcher.prefetch(['NVDA']))
+    time.sleep(0.06)
+    assert prefetcher.recent_documents('NVDA') is None
+    assert prefetcher.stats()['analysis'] == {'prefetched': 2, 'hits': 1, 'misses': 0, 'hit_rate': 1.0}
+
+
+def test_prefetched_analyses_count_only_while_the_analysis_cache_holds_them():
+    pm = AnalyzePM(analysis_ttl=0.05)
+    prefetcher = ContextPrefetcher(PoolVS(), pm, AnalysisExecutor(io_workers=1, cpu_workers=0), ttl=300)
+    asyncio.run(prefetcher.prefetch(['NVDA', 'AMD']))
+
+    pm.analysis_cache.invalidate('AMD')  # e.g. a new price bar (AlertEngine.mark_dirty)
+    prefetcher.note_analysis(['NVDA', 'AMD'])
+    time.sleep(0.06)  # the analysis cache expires long before the prefetch ttl
+    prefetcher.note_analysis(['NVDA'])
+
+    assert prefetcher.stats()['analysis'] == {'prefetched': 2, 'hits': 1, 'misses': 2, 'hit_rate': 0.333}
+
+
+def test_prefetch_stops_at_budget():
+    class SlowPM(AnalyzePM):
+        async def analyze_many(self, symbols):
+            await asyncio.sleep(1)
+
+    prefetcher = ContextPrefetcher(PoolVS(), SlowPM(), AnalysisExecutor(io_workers=1, cpu_workers=0), budget=0.05)
+    asyncio.run(prefetcher._run(['NVDA']))
+    assert prefetcher.stats()['runs'] == {'started': 1, 'over_budget': 1}
+    assert prefetcher.retrieve('NVDA', _embed("chips")) is None
+
+
+def test_query_embeddings_are_memoized():
+    prefetcher = _prefetcher()
+    first = prefetcher.embedding("chips demand")
+    assert prefetcher.embedding("chips demand") is first
+    assert prefetcher.stats()['embeddings']['hit_rate'] == 0.5
+
+
+def test_chat_follow_up_uses_prefetched_pool(make_agent):
+    prefetcher = _prefetcher()
+    vector_store = prefetcher.vector_store
+    agent = make_agent(vector_store, prefetcher=prefetcher)
+
+    async def run():
+        agent._schedule_prefetch(['NVDA'])
+        await prefetcher._task
+        vector_store.queried.clear()
+        return await agent._assemble_context("Any news on the $NVDA lawsuit?")
+
+    context = asyncio.run(run())
+    assert 'NVDA' not in vector_store.queried
+    assert context['documents'][0]['id'] == 'n2'
+    assert 'retrieval:NVDA' in context['timings']
+
+
+def test_prefetched_and_cold_symbols_are_ranked_on_one_scale(monkeypatch, make_agent):
+    from ResearchAgent.rag.vector_store import VectorStoreManager
+
+    class TopicModel:
+        def encode(self, text, convert_to_numpy=True):
+            return _embed(text)
+
+    monkeypatch.setattr('ResearchAgent.rag.vector_store.SentenceTransformer', lambda name: TopicModel())
+    store = VectorStoreManager(api_key=None, retrieval_mode='hybrid')
+    docs = [
+        {'symbol': symbol, 'data_type': 'news', 'title': f"{symbol} {topic}", 'content': f"{topic} update {i}",
+         'timestamp': f"2025-01-0{i + 1}T10:00:00"}
+        for symbol in ('NVDA', 'AMD') for i, topic in enumerate(['chips', 'demand', 'lawsuit', 'earnings', 'guidance'])
+    ]
+    asyncio.run(store.upsert_document(docs))
+
+    prefetcher = ContextPrefetcher(store, AnalyzePM(), AnalysisExecutor(io_workers=2, cpu_workers=0))
+    asyncio.run(prefetcher.prefetch(['NVDA']))
+    agent = make_agent(store, prefetcher=prefetcher)
+
+    context = asyncio.run(agent._assemble_context("NVDA and AMD guidance"))
+    documents = context['documents']
+    assert prefetcher.stats()['retrieval']['hits'] == 1
+    # Each symbol's best match leads, whichever path retrieved it
+    assert {d['title'] for d in documents[:2]} == {'NVDA guidance', 'AMD guidance'}
+    assert all(0 <= d['score'] <= 1 for d in documents)
+    assert {d['symbol'] for d in documents} == {'NVDA', 'AMD'}
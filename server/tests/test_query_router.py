@@ -0,0 +1,66 @@
+import numpy as np
+
+from LLMAgent.query_router import QueryRouter
+from LLMAgent.symbol_recognizer import SymbolRecognizer
+
+
+def test_rules():
+    router = QueryRouter()
+    assert router.route('What is a P/E ratio?')['route'] == 'quick'
+    assert router.route('Explain what an ETF is')['route'] == 'quick'
+    assert router.route('How does dollar cost averaging work?')['route'] == 'quick'
+
+    assert router.route('Should I buy NVDA?')['reason'] == 'analysis'
+    assert router.route('What is $TSLA?')['reason'] == 'cashtag'
+    assert router.route('How are my holdings doing', has_portfolio=True)['reason'] == 'portfolio'
+    assert router.route('What does that mean?', has_history=True)['reason'] == 'follow_up'
+    assert router.route('What does that mean?')['route'] == 'quick'
+    # nothing matches and no embedder: escalate
+    assert router.route('Thoughts on semiconductors')['route'] == 'rag'
+
+
+def test_questions_naming_a_stock_escalate():
+    router = QueryRouter(symbol_recognizer=SymbolRecognizer.load())
+    for message in ["What is TSLA worth?", "What is happening with Microsoft?",
+                    "What are the risks for Apple?", "Explain what happened to SMCI",
+                    "What is nvidia doing"]:
+        assert router.route(message) == {'route': 'rag', 'reason': 'symbol', 'confidence': 1.0}, message
+    assert router.route('What is EBITDA?')['route'] == 'quick'
+
+
+def test_only_definitional_forms_take_the_quick_path():
+    router = QueryRouter()
+    for message in ["What is diversification?", "What does RSI measure?", "How do options work?",
+                    "Define dividend yield", "What is the difference between a stock and a bond?"]:
+        assert router.route(message)['reason'] == 'definitional', message
+    for message in ["What is going on with the market?", "What are the biggest movers this morning",
+                    "Explain what happened to chip stocks"]:
+        assert router.route(message)['route'] == 'rag', message
+
+
+def test_embedding_classifier_needs_a_clear_margin():
+    vocabulary = ['ratio', 'define', 'mean', 'chip', 'stock', 'earnings']
+
+    def embed(text):
+        words = text.lower().split()
+        return np.array([sum(w.startswith(v) for w in words) for v in vocabulary], dtype=float) + 0.01
+
+    examples = {'quick': ['define ratio', 'ratio mean'], 'rag': ['chip stock earnings', 'stock earnings']}
+    router = QueryRouter(embed=embed, examples=examples, margin=0.1)
+
+    assert router.route('ratios defined simply')['route'] == 'quick'
+    assert router.route('chip stocks')['route'] == 'rag'
+    # about equally close to both intents: escalated
+    assert router.route('stock ratio')['route'] == 'rag'
+    assert router.stats()['reasons'] == {'classifier': 3}
+
+
+def test_stats_estimate_latency_saved():
+    router = QueryRouter()
+    router.record('quick', 0.5)
+    router.record('quick', 0.7)
+    router.record('rag', 4.6)
+    stats = router.stats()
+    assert stats['routed'] == {'quick': 2, 'rag': 1}
+    assert stats['average_latency'] == {'quick': 0.6, 'rag': 4.6}
+    assert stats['estimated_seconds_saved'] == 8.0
@@ -0,0 +1,97 @@
+import asyncio
+
+from LLMAgent.report_digests import ReportDigestStore, digest_key
+
+
+class DocsVS:
+    def __init__(self):
+        self.docs = [{'id': 'n1', 'symbol': 'NVDA', 'data_type': 'news', 'title': 'Chips', 'content': 'Demand up.'}]
+
+    def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+        return []
+
+    def get_recent_documents(self, symbol, hours, data_types):
+        return list(self.docs)
+
+
+class AnalysisPM:
+    action = 'BUY'
+
+    async def analyze_stock_for_entry(self, symbol):
+        return {
+            'symbol': symbol,
+            'composite_score': 72.0,
+            'recommendation': {'action': self.action, 'confidence': 'HIGH', 'score': 72.0},
+            'sentiment_analysis': {
+                'news': {'overall_sentiment': 'positive', 'overall_confidence': 0.8, 'document_count': 1},
+                'social': {'overall_sentiment': 'neutral', 'overall_confidence': 0.0, 'document_count': 0}
+            },
+            'technical_analysis': {'composite_score': 41.0},
+            'supporting_documents': [],
+            'analyzed_at': 'now'
+        }
+
+
+def _reply(content):
+    message = type('m', (), {'content': content})()
+    return type('r', (), {
+        'choices': [type('c', (), {'message': message})()],
+        'usage': type('u', (), {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2})
+    })()
+
+
+def test_digest_is_only_regenerated_when_inputs_change(tmp_path, make_agent):
+    vector_store, portfolio_manager = DocsVS(), AnalysisPM()
+    store = ReportDigestStore(directory=str(tmp_path))
+    agent = make_agent(vector_store, portfolio_manager, report_digests=store)
+    prompts = []
+
+    def call_groq(messages, temperature, max_tokens):
+        prompts.append(messages[-1]['content'])
+        return _reply(f"report {len(prompts)}")
+
+    agent._call_groq_api = call_groq
+
+    async def run():
+        first = await agent.get_report_digest('NVDA')
+        again = await agent.get_report_digest('NVDA')
+
+        # upsert without a change in inputs: checked, not regenerated
+        store.mark_stale(['NVDA'])
+        unchanged = await agent.get_report_digest('NVDA')
+
+        vector_store.docs.append({'id': 'n2', 'symbol': 'NVDA', 'data_type': 'news', 'title': 'Guidance', 'content': 'Raised.'})
+        store.mark_stale(['NVDA'])
+        updated = await agent.get_report_digest('NVDA')
+
+        portfolio_manager.action = 'HOLD'
+        _, regenerated = await agent.refresh_report_digest('NVDA')
+        return first, again, unchanged, updated, regenerated
+
+    first, again, unchanged, updated, regenerated = asyncio.run(run())
+    agent.executor.shutdown()
+
+    assert first['report'] == again['report'] == unchanged['report'] == 'report 1'
+    assert updated['report'] == 'report 2'
+    assert updated['document_ids'] == ['n1', 'n2']
+    assert regenerated is True
+    assert len(prompts) == 3
+    assert 'News Sentiment: Positive' in prompts[0]
+    assert store.stats()['hits'] == 1 and store.stats()['unchanged'] == 1
+
+    # persisted digests are served by a fresh store
+    reloaded = ReportDigestStore(directory=str(tmp_path)).get('NVDA')
+    assert reloaded['report'] == 'report 3'
+    assert reloaded['input_key'] == digest_key(['n2', 'n1'], 'HOLD')
+
+
+def test_digest_symbols_are_case_insensitive(tmp_path):
+    store = ReportDigestStore(directory=str(tmp_path))
+    store.put('nvda', {'report': 'r'})
+    store.mark_stale(['Nvda'])
+
+    assert store.get('NVDA') == {'report': 'r'} and store.is_stale('nvda')
+    store.mark_fresh('NVDA')
+    assert not store.is_stale('nvda')
+    assert store.symbols() == ['NVDA']
+    assert ReportDigestStore(directory=str(tmp_path)).get('nvda') == {'report': 'r'}
@@ -0,0 +1,64 @@
+import asyncio
+
+import LLMAgent.reranker as reranker_module
+from LLMAgent.reranker import CrossEncoderReranker
+
+
+class KeywordCrossEncoder:
+    # Logit grows with the question words found in the document
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        return [sum(word in text.lower() for word in question.lower().split()) - 1.0 for question, text in pairs]
+
+
+def _docs():
+    return [
+        {'id': 'a', 'score': 0.9, 'title': 'Chip stocks rally', 'content': 'Semis up broadly.'},
+        {'id': 'b', 'score': 0.8, 'title': 'NVDA guidance raised', 'content': 'Nvidia raised guidance on data center demand.'},
+        {'id': 'c', 'score': 0.7, 'title': 'Market wrap', 'content': 'Stocks mixed.'},
+        {'id': 'd', 'score': 0.1, 'title': 'NVDA guidance', 'content': 'guidance raised'},
+    ]
+
+
+def test_rerank_keeps_best_of_candidates_and_caches_scores():
+    model = KeywordCrossEncoder()
+    reranker = CrossEncoderReranker(candidates=3, keep=2, model=model)
+
+    ranked = reranker.rerank("nvidia raised guidance", _docs())
+    assert [d['id'] for d in ranked] == ['b', 'a']
+    assert ranked[0]['retrieval_score'] == 0.8 and 0 < ranked[1]['score'] < ranked[0]['score'] < 1
+
+    reranker.rerank("nvidia raised guidance", _docs())
+    assert model.batches == [3]
+    stats = reranker.stats()
+    assert (stats['scored'], stats['cache_hits'], stats['reranked']) == (3, 3, 2)
+
+
+def test_rerank_passes_through_without_a_model(monkeypatch):
+    monkeypatch.setattr(reranker_module, '_HAVE_CROSS_ENCODER', False)
+    reranker = CrossEncoderReranker(candidates=3, keep=2)
+    assert [d['id'] for d in reranker.rerank("q", _docs())] == ['a', 'b']
+    assert reranker.stats()['passthrough'] == 1 and not reranker.stats()['loaded']
+
+
+def test_context_is_reranked_down_to_keep(make_agent):
+    class ManyDocsVS:
+        def __init__(self):
+            self.top_k = []
+
+        def query(self, query_text, symbol=None, top_k=5, min_sentiment_score=None):
+            self.top_k.append(top_k)
+            return [dict(doc, symbol=symbol) for doc in _docs()]
+
+    vector_store = ManyDocsVS()
+    reranker = CrossEncoderReranker(candidates=20, keep=2, model=KeywordCrossEncoder())
+    agent = make_agent(vector_store, reranker=reranker)
+
+    context = asyncio.run(agent._assemble_context("Has NVDA raised guidance?"))
+    assert vector_store.top_k == [20]
+    # 'd' ranked last by retrieval score but is one of the two most relevant
+    assert {d['id'] for d in context['documents']} == {'b', 'd'}
+    assert 'rerank' in context['timings']
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from LLMAgent.response_cache import SemanticResponseCache
+
+
+def _doc(doc_id, symbol, age_minutes=30):
+    return {'id': doc_id, 'symbol': symbol,
+            'timestamp': (datetime.now() - timedelta(minutes=age_minutes)).isoformat()}
+
+
+def test_similar_question_over_same_context_hits():
+    cache = SemanticResponseCache(similarity_threshold=0.9)
+    docs = [_doc('n1', 'NVDA')]
+    fp = cache.fingerprint('model', 'portfolio')
+    cache.store(np.array([1.0, 0.0, 0.1]), ['n1'], fp, {'answer': 'Hold'}, docs)
+
+    assert cache.lookup(np.array([1.0, 0.05, 0.1]), ['n1'], fp) == {'answer': 'Hold'}
+    # dissimilar question, different documents, other portfolio or kind all miss
+    assert cache.lookup(np.array([0.0, 1.0, 0.0]), ['n1'], fp) is None
+    assert cache.lookup(np.array([1.0, 0.0, 0.1]), ['n1', 'n2'], fp) is None
+    assert cache.lookup(np.array([1.0, 0.0, 0.1]), ['n1'], cache.fingerprint('model', 'other')) is None
+    assert cache.lookup(np.array([1.0, 0.0, 0.1]), ['n1'], fp, kind='quick') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 4, 1)
+
+
+def test_ttl_follows_document_freshness():
+    cache = SemanticResponseCache(min_ttl=60, max_ttl=900, freshness_factor=0.25)
+    assert cache.ttl_for([_doc('a', 'AAPL', age_minutes=1)]) == 60
+    assert abs(cache.ttl_for([_doc('a', 'AAPL', age_minutes=20)]) - 300) < 1
+    assert cache.ttl_for([_doc('a', 'AAPL', age_minutes=600)]) == 900
+    assert cache.ttl_for([]) == 900
+
+    cache.min_ttl = 0
+    # A timestamp ahead of the clock counts as age 0, so the TTL is exactly 0
+    cache.store([1.0, 0.0], ['a'], 'fp', {'answer': 'x'}, [_doc('a', 'AAPL', age_minutes=-1)])
+    assert cache.lookup([1.0, 0.0], ['a'], 'fp') is None
+    assert cache.stats()['expired'] == 1
+
+
+def test_upserts_invalidate_and_lru_evicts():
+    cache = SemanticResponseCache(max_entries=2)
+    cache.store([1.0, 0.0], ['a'], 'fp', {'answer': 'aapl'}, [_doc('a', 'AAPL')])
+    cache.store([0.0, 1.0], ['m'], 'fp', {'answer': 'msft'}, [_doc('m', 'MSFT')])
+    assert cache.lookup([1.0, 0.0], ['a'], 'fp') is not None  # AAPL is now most recent
+
+    cache.store([1.0, 1.0], ['t'], 'fp', {'answer': 'tsla'}, [_doc('t', 'TSLA')])
+    assert cache.lookup([0.0, 1.0], ['m'], 'fp') is None
+    assert cache.stats()['evicted'] == 1
+
+    cache.invalidate_symbols(['AAPL'])
+    assert cache.lookup([1.0, 0.0], ['a'], 'fp') is None
+    assert cache.lookup([1.0, 1.0], ['t'], 'fp') == {'answer': 'tsla'}
+    assert cache.stats()['invalidated'] == 1
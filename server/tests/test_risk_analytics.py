@@ -0,0 +1,81 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from AnalysisAgent.executor import AnalysisExecutor
+from PortfolioManager.risk_analytics import PortfolioRiskAnalyzer, compute_risk_metrics
+
+
+def _prices(seed=11, n=120):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, n)
+    tech = rng.normal(0, 0.004, n)
+    returns = pd.DataFrame({
+        'SPY': market,
+        'AAPL': 1.2 * market + tech + rng.normal(0, 0.002, n),
+        'MSFT': 1.1 * market + tech + rng.normal(0, 0.002, n),
+        'XOM': rng.normal(0, 0.012, n),
+    }, index=pd.date_range('2025-01-01', periods=n, freq='B'))
+    return 100 * (1 + returns).cumprod()
+
+
+def test_risk_metrics_match_pairwise_definitions():
+    close = _prices()
+    symbols = ['AAPL', 'MSFT', 'XOM']
+    result = compute_risk_metrics(close, symbols, benchmark='SPY', correlation_threshold=0.7)
+
+    returns = close.pct_change().iloc[1:]
+    for symbol in symbols:
+        pos = result['positions'][symbol]
+        expected_vol = returns[symbol].std() * np.sqrt(252)
+        expected_beta = returns[symbol].cov(returns['SPY']) / returns['SPY'].var()
+        assert pos['volatility'] == pytest.approx(expected_vol, rel=1e-4)
+        assert pos['beta'] == pytest.approx(expected_beta, rel=1e-4)
+
+    w = np.full(3, 1 / 3)
+    cov = returns[symbols].cov().to_numpy() * 252
+    assert result['portfolio_volatility'] == pytest.approx(np.sqrt(w @ cov @ w), rel=1e-4)
+
+    # risk contributions decompose the portfolio volatility
+    total = sum(p['risk_contribution_pct'] for p in result['positions'].values())
+    assert total == pytest.approx(1.0, abs=1e-4)
+
+    assert result['correlation_clusters'] == [['AAPL', 'MSFT']]
+
+
+def test_weights_follow_their_symbols_when_data_is_missing():
+    close = _prices()
+    result = compute_risk_metrics(close, ['AAPL', 'NOPE', 'XOM'], weights=np.array([3.0, 5.0, 1.0]))
+    assert result['symbols'] == ['AAPL', 'XOM']
+    assert result['positions']['AAPL']['weight'] == pytest.approx(0.75)
+
+
+def test_analyzer_caches_results_for_the_day():
+    close = _prices()
+
+    class Store:
+        calls = 0
+        executor = AnalysisExecutor(io_workers=1, cpu_workers=0)
+
+        async def get_history(self, symbols):
+            Store.calls += 1
+            cols = [s for s in symbols if s in close.columns]
+            return close[cols], close[cols] * 0
+
+    analyzer = PortfolioRiskAnalyzer(Store())
+
+    async def run():
+        first = await analyzer.analyze(['AAPL', 'MSFT'])
+        second = await analyzer.analyze(['AAPL', 'MSFT'])
+        return first, second
+
+    try:
+        first, second = asyncio.run(run())
+        assert first is second
+        assert Store.calls == 1
+        assert first['benchmark'] == 'SPY'
+        assert first['portfolio_beta'] is not None
+    finally:
+        Store.executor.shutdown()
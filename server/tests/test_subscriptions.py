@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from PortfolioManager.subscriptions import SubscriptionHub
+
+
+def _update(symbol, score):
+    return {'symbol': symbol, 'composite_score': score}
+
+
+def test_symbols_are_shared_across_clients():
+    async def noop(msg):
+        pass
+
+    async def run():
+        hub = SubscriptionHub()
+        for i in range(200):
+            hub.subscribe(f"c{i}", ['AAPL'] if i % 2 else ['AAPL', 'MSFT'], noop)
+        hub.subscribe('c0', ['TSLA'], noop)
+        stats = hub.stats()
+        for i in range(200):
+            hub.unsubscribe(f"c{i}")
+        return hub, stats
+
+    hub, stats = asyncio.run(run())
+    assert stats['subscribers_per_symbol'] == {'AAPL': 199, 'MSFT': 99, 'TSLA': 1}
+    assert stats['symbols'] == 3
+    assert hub.symbols() == set()
+
+
+def test_slow_client_gets_coalesced_updates_without_blocking_others():
+    fast, slow = [], []
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def send_fast(msg):
+            fast.append(msg)
+
+        async def send_slow(msg):
+            await gate.wait()
+            slow.append(msg)
+
+        hub = SubscriptionHub()
+        hub.subscribe('fast', ['AAPL'], send_fast)
+        hub.subscribe('slow', ['AAPL', 'MSFT'], send_slow)
+
+        for score in (60, 61, 62, 63):
+            hub.publish({'AAPL': _update('AAPL', score), 'MSFT': _update('MSFT', score)})
+            await asyncio.sleep(0.01)
+
+        gate.set()
+        await asyncio.sleep(0.01)
+        return hub.stats()
+
+    stats = asyncio.run(run())
+
+    assert [m['changes']['AAPL']['composite_score'] for m in fast] == [60, 61, 62, 63]
+    assert [m['seq'] for m in fast] == [1, 2, 3, 4]
+    # first cycle was in flight; cycles 2-4 collapsed into one message with the latest values
+    assert [[m['changes'][s]['composite_score'] for s in sorted(m['changes'])] for m in slow] == [[60, 60], [63, 63]]
+    assert stats['updates_coalesced'] == 4
+    assert stats['max_pending'] == 0
+
+
+def test_drop_policy_and_send_timeout():
+    received = []
+    closed = []
+
+    async def run():
+        hub = SubscriptionHub(slow_client_policy='drop', send_timeout=0.05)
+
+        async def stuck(msg):
+            received.append(msg)
+            await asyncio.sleep(1)
+
+        async def close():
+            closed.append(1011)
+
+        hub.subscribe('stuck', ['AAPL'], stuck, close)
+        hub.publish({'AAPL': _update('AAPL', 1)})
+        await asyncio.sleep(0.01)
+        hub.publish({'AAPL': _update('AAPL', 2)})  # send still in flight: dropped
+        await asyncio.sleep(0.1)
+        return hub.stats()
+
+    stats = asyncio.run(run())
+    assert len(received) == 1
+    assert stats['updates_dropped'] == 1
+    assert stats['clients_dropped'] == 1
+    assert stats['clients'] == 0
+    # the timed-out client is disconnected, not just unsubscribed
+    assert closed == [1011]
+
+    with pytest.raises(ValueError):
+        SubscriptionHub(slow_client_policy='block')
+
+
+def test_snapshot_then_deltas_against_what_the_client_has():
+    from PortfolioManager.ws_protocol import apply_delta
+
+    sent = []
+    aapl = {'symbol': 'AAPL', 'composite_score': 60.0, 'recommendation': {'action': 'BUY'},
+            'sentiment_scores': {'news': 70.0, 'social': 50.0}, 'technical_score': 40.0,
+            'document_ids': ['d1'], 'analyzed_at': '2025-01-01T10:00:00'}
+
+    async def run():
+        async def send(msg):
+            sent.append(msg)
+
+        hub = SubscriptionHub()
+        hub.subscribe('c', ['AAPL'], send)
+        hub.send_snapshot('c', {'portfolio_health': {}, 'detailed_analyses': [aapl]})
+        await asyncio.sleep(0)
+
+        # unchanged analysis (just re-run): nothing to send
+        hub.publish({'AAPL': {**aapl, 'analyzed_at': '2025-01-01T10:05:00'}})
+        await asyncio.sleep(0)
+        hub.publish({'AAPL': {**aapl, 'composite_score': 58.5, 'document_ids': ['d1', 'd2'],
+                              'analyzed_at': '2025-01-01T10:10:00'}})
+        await asyncio.sleep(0)
+        # stale update computed before the latest known analysis is ignored
+        hub.publish({'AAPL': {**aapl, 'composite_score': 10.0, 'analyzed_at': '2025-01-01T09:00:00'}})
+        await asyncio.sleep(0)
+        hub.unsubscribe('c')
+
+    asyncio.run(run())
+
+    assert [(m['type'], m['seq']) for m in sent] == [('snapshot', 1), ('delta', 2)]
+    assert 'portfolio_health' in sent[0]
+    delta = sent[1]['changes']['AAPL']
+    assert delta == {'composite_score': 58.5, 'new_document_ids': ['d2'], 'analyzed_at': '2025-01-01T10:10:00'}
+    client_view = apply_delta(aapl, delta)
+    assert client_view['composite_score'] == 58.5
+    assert client_view['document_ids'] == ['d1', 'd2']
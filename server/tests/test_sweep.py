@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+import pytest
+
+from PortfolioManager.backtest import BacktestData
+from PortfolioManager.scoring import ScoringConfig, load_scoring_config
+from PortfolioManager.sweep import SweepRunner, parameter_grid
+
+
+def _data(days=250, symbols=6, seed=5):
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    shape = (days, symbols)
+    return BacktestData(
+        dates=pd.date_range('2023-01-02', periods=days, freq='B'),
+        symbols=[f"S{i}" for i in range(symbols)],
+        technical=rng.uniform(0, 60, shape),
+        news=rng.uniform(20, 100, shape),
+        social=rng.uniform(20, 100, shape),
+        forward_returns=rng.normal(0.0005, 0.01, shape)
+    )
+
+
+def test_parameter_grid_normalizes_weights_and_skips_bad_bands():
+    grid = parameter_grid(news_weight=[0.4, 0.8], technical_weight=[0.4, 0.8], sell_threshold=[40, 55])
+
+    # sell_threshold=55 would sit above hold_threshold, so those are dropped
+    assert all(c.sell_threshold == 40 for c in grid)
+    assert all(c.news_weight + c.social_weight + c.technical_weight == pytest.approx(1.0) for c in grid)
+    assert len(grid) == 4
+
+    # 1:1:1 and 2:2:2 are the same weighting
+    assert len(parameter_grid(news_weight=[1, 2], social_weight=[1, 2], technical_weight=[1, 2])) == 7
+
+    with pytest.raises(ValueError):
+        parameter_grid(nonsense=[1])
+
+
+def test_process_pool_matches_in_process_results():
+    data = _data()
+    configs = parameter_grid(news_weight=[0.3, 0.4, 0.5], entry_threshold=[55, 60, 65], buy_threshold=[58, 60])
+
+    serial = SweepRunner(data, workers=0).run(configs)
+    pooled = SweepRunner(data, workers=2, chunk_size=4).run(configs)
+
+    assert len(serial) == len(configs)
+    assert serial['rank'].tolist() == list(range(1, len(configs) + 1))
+    assert serial['sharpe'].is_monotonic_decreasing
+    np.testing.assert_allclose(pooled['sharpe'], serial['sharpe'])
+    assert pooled[['news_weight', 'entry_threshold']].equals(serial[['news_weight', 'entry_threshold']])
+
+
+def test_load_scoring_config_from_sweep_row(tmp_path):
+    table = SweepRunner(_data(), workers=0).run(parameter_grid(entry_threshold=[55, 70]))
+    path = tmp_path / 'scoring.json'
+    path.write_text(json.dumps(table.iloc[0].to_dict()))
+
+    config = load_scoring_config(str(path))
+    assert config.entry_threshold == table.iloc[0]['entry_threshold']
+    assert load_scoring_config(None) == ScoringConfig()
@@ -0,0 +1,29 @@
+from LLMAgent.symbol_recognizer import SymbolRecognizer, load_universe
+
+
+def test_shipped_universe_loads():
+    universe = load_universe()
+    assert universe['GOOGL'] == ['Alphabet', 'Google']
+    assert {'AAPL', 'MSFT', 'NVDA', 'TSLA'} <= set(universe)
+
+
+def test_tickers_and_names_are_recognized_in_order():
+    recognizer = SymbolRecognizer.load()
+    assert recognizer.extract("Is Bank of America a better buy than $JPM or nvda?") == ['BAC', 'JPM', 'NVDA']
+    assert recognizer.extract("Thoughts on Coca-Cola, P&G and Google?") == ['KO', 'PG', 'GOOGL']
+    assert recognizer.extract("SHOULD I BUY TSLA OR AMD NOW") == ['TSLA', 'AMD']
+
+
+def test_english_words_are_not_symbols():
+    recognizer = SymbolRecognizer.load()
+    assert recognizer.extract("WHAT ABOUT THE MARKET TODAY? IT IS ALL DOWN") == []
+    assert recognizer.extract("it's time to shop now, the cost is low") == []
+    assert recognizer.extract("is $NOW cheap? And Target?") == ['NOW', 'TGT']
+    assert recognizer.extract("teslas and metaverse") == []
+
+
+def test_unknown_symbols_need_to_join_the_universe():
+    recognizer = SymbolRecognizer({'AAPL': ['Apple']})
+    assert recognizer.extract("$PLTR vs Apple") == ['AAPL']
+    recognizer.add_symbols(['PLTR', 'AAPL'])
+    assert recognizer.extract("$PLTR vs Apple") == ['PLTR', 'AAPL']
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from AnalysisAgent.technical_analysis import TechnicalAnalyzer
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    # Avoid loading the ML model
+    monkeypatch.setattr(TechnicalAnalyzer, 'load_model', lambda self: None)
+    return TechnicalAnalyzer()
+
+
+def test_vectorized_technical_score_matches_scalar(analyzer):
+    rng = np.random.default_rng(7)
+    n = 500
+
+    price = rng.uniform(50, 150, n)
+    indicators = []
+    ml_signals = []
+    for i in range(n):
+        indicators.append({
+            # include the exact RSI band edges
+            'rsi': float(rng.choice([30, 40, 60, 70, rng.uniform(0, 100)])),
+            'ma_20': float(rng.choice([price[i], rng.uniform(50, 150)])),
+            'ma_50': float(rng.uniform(50, 150)),
+            'current_price': float(price[i]),
+            'macd': float(rng.normal()),
+            'macd_signal': float(rng.normal()),
+            'volume_trend': float(rng.uniform(1e5, 1e6))
+        })
+        ml_signals.append({
+            'signal': 'BUY' if rng.random() > 0.5 else 'SELL',
+            'confidence': float(rng.random())
+        })
+
+    expected = np.array([
+        analyzer._calculate_technical_score(ind, sig)
+        for ind, sig in zip(indicators, ml_signals)
+    ])
+
+    indicator_arrays, ml_arrays = analyzer._stack_indicators(indicators, ml_signals)
+    scores = analyzer._calculate_technical_scores(indicator_arrays, ml_arrays)
+
+    assert scores.shape == (n,)
+    np.testing.assert_allclose(scores, expected)
+    assert scores.min() >= 0 and scores.max() <= 100
+
+
+def test_indicator_arrays_match_per_symbol_indicators():
+    import pandas as pd
+    from AnalysisAgent.technical_analysis import calculate_indicators, calculate_indicator_arrays
+
+    rng = np.random.default_rng(3)
+    index = pd.date_range('2025-01-01', periods=60, freq='B')
+    close = pd.DataFrame({
+        'AAA': 100 + rng.normal(0, 1, 60).cumsum(),
+        'BBB': 50 + rng.normal(0, 1, 60).cumsum(),
+    }, index=index)
+    volume = pd.DataFrame({
+        'AAA': rng.uniform(1e5, 1e6, 60),
+        'BBB': rng.uniform(1e5, 1e6, 60),
+    }, index=index)
+
+    arrays = calculate_indicator_arrays(close, volume)
+
+    for i, symbol in enumerate(close.columns):
+        hist = pd.DataFrame({'Close': close[symbol], 'Volume': volume[symbol]})
+        expected = calculate_indicators(hist)
+        for key, value in expected.items():
+            assert arrays[key][i] == pytest.approx(value)
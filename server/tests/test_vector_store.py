@@ -61,3 +61,33 @@ def test_generate_embedding_and_upsert(monkeypatch):
     import asyncio
     v = asyncio.run(vsm.upsert_document(docs))
     assert isinstance(v, dict)
+
+
+def test_hybrid_query_finds_exact_terms_dense_retrieval_misses(monkeypatch):
+    import asyncio
+
+    class TopicModel:
+        # Embeds by topic only, like a semantic model that blurs product names
+        def encode(self, text, convert_to_numpy=True):
+            text = text.lower()
+            return np.array([1.0 + text.count('chip'), 1.0 + text.count('lawsuit')])
+
+    monkeypatch.setattr('ResearchAgent.rag.vector_store.SentenceTransformer', lambda name: TopicModel())
+    vsm = VectorStoreManager(api_key=None)
+    docs = [
+        {'symbol': 'NVDA', 'data_type': 'news', 'title': 'lawsuit filed', 'content': 'lawsuit over patents', 'timestamp': '1'},
+        {'symbol': 'NVDA', 'data_type': 'news', 'title': 'settlement', 'content': 'lawsuit settled', 'timestamp': '2'},
+        {'symbol': 'NVDA', 'data_type': 'news', 'title': 'H200 ramps', 'content': 'chip maker ships H200 H200', 'timestamp': '3'},
+        {'symbol': 'AMD', 'data_type': 'news', 'title': 'MI300 rival', 'content': 'chip chip chip', 'timestamp': '4'},
+    ]
+    asyncio.run(vsm.upsert_document(docs))
+    assert len(vsm.lexical_index) == 4
+
+    dense = vsm.query("lawsuit H200", symbol='NVDA', top_k=2)
+    hybrid = vsm.query("lawsuit H200", symbol='NVDA', top_k=2, mode='hybrid')
+    assert 'H200 ramps' not in [d['title'] for d in dense]
+    assert 'H200 ramps' in [d['title'] for d in hybrid]
+    assert all(d['symbol'] == 'NVDA' for d in vsm.query("H200", symbol='NVDA', mode='hybrid'))
+
+    with pytest.raises(ValueError):
+        VectorStoreManager(api_key=None, retrieval_mode='sparse')
@@ -0,0 +1,27 @@
+import pytest
+
+from PortfolioManager import ws_protocol
+
+
+def test_json_encoding_round_trip():
+    message = {'seq': 3, 'type': 'delta', 'changes': {'AAPL': {'composite_score': 61.5}}}
+    kind, payload = ws_protocol.encode(message, 'json')
+    assert kind == 'text'
+    assert ws_protocol.decode(payload) == message
+
+
+def test_msgpack_negotiation_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(ws_protocol, '_HAVE_MSGPACK', False)
+    assert ws_protocol.negotiate_encoding('msgpack') == 'json'
+    assert ws_protocol.negotiate_encoding(None) == 'json'
+
+
+def test_msgpack_round_trip_is_smaller():
+    pytest.importorskip('msgpack')
+    message = {'seq': 1, 'type': 'delta',
+               'changes': {f"S{i}": {'composite_score': 50.0 + i, 'new_document_ids': ['a' * 32]} for i in range(50)}}
+    kind, payload = ws_protocol.encode(message, 'msgpack')
+    assert kind == 'bytes'
+    assert ws_protocol.decode(payload) == message
+    assert len(payload) < len(ws_protocol.encode(message, 'json')[1])
+    assert ws_protocol.negotiate_encoding('msgpack') == 'msgpack'